@@ -0,0 +1,124 @@
+# activation_lease.py
+"""
+إيجار تفعيل محلي يُحفظ داخل ملف حالة التفعيل: ذاكرة تخزين مؤقت لآخر نتيجة تحقق ناجحة من Firestore، وليس توقيعًا.
+يسمح بفتح التطبيق فورًا عند بدء التشغيل دون انتظار Firestore، ثم يُعاد التحقق عبر الإنترنت في الخلفية
+(ActivationCheckThread) وتتوقف المراقبة إذا رُفض الكود.
+
+تنبيه أمني: كل ما يلزم لحساب المجموع الاختباري موجود على الجهاز، فيستطيع من يملك الجهاز صنع إيجار صالح.
+المجموع الاختباري يكشف فقط التلف أو نسخ الملف إلى جهاز آخر. لا تُبنَ عليه أي صلاحية لا يعيد Firestore تأكيدها؛
+الحماية الحقيقية تتطلب إيجارًا يوقّعه الخادم ويُتحقق منه بمفتاح عام فقط.
+لا يستورد firebase_admin عمدًا حتى يبقى الفحص سريعًا.
+"""
+import os
+import json
+import hmac
+import hashlib
+import logging
+import time
+
+from config import (
+    ACTIVATION_STATUS_FILE, DEVICE_ID_FILE,
+    ACTIVATION_LEASE_MAX_DAYS, ACTIVATION_LEASE_CLOCK_SKEW_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = "lease"
+
+
+def _read_device_id():
+    try:
+        with open(DEVICE_ID_FILE, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _checksum(activation_code, device_id, issued_at, expires_at):
+    # مجموع اختباري لكشف التلف والنسخ إلى جهاز آخر فقط، وليس توقيعًا (انظر تنبيه أعلى الملف)
+    payload = f"{activation_code}|{device_id}|{issued_at:.0f}|{expires_at:.0f}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _load_activation_file():
+    try:
+        with open(ACTIVATION_STATUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_lease():
+    """
+    يتحقق من الإيجار المحلي دون أي اتصال بالشبكة. النتيجة مؤقتة إلى أن يؤكدها Firestore في الخلفية.
+    Returns:
+        tuple: (is_valid, activation_code)
+    """
+    data = _load_activation_file()
+    if not data or not data.get("is_activated"):
+        return False, None
+    lease = data.get(LEASE_KEY)
+    activation_code = data.get("activation_code")
+    if not lease or not activation_code:
+        return False, None
+
+    device_id = _read_device_id()
+    if not device_id:
+        return False, None
+
+    try:
+        issued_at = float(lease["issued_at"])
+        expires_at = float(lease["expires_at"])
+        checksum = str(lease["checksum"])
+    except (KeyError, TypeError, ValueError):
+        logger.warning("بيانات الإيجار المحلي تالفة. سيتم التحقق عبر الإنترنت.")
+        return False, None
+
+    if not hmac.compare_digest(checksum, _checksum(activation_code, device_id, issued_at, expires_at)):
+        logger.warning("المجموع الاختباري للإيجار المحلي غير مطابق (تلف أو جهاز آخر). سيتم التحقق عبر الإنترنت.")
+        return False, None
+
+    now = time.time()
+    # إرجاع ساعة الجهاز إلى ما قبل تاريخ الإصدار يُعتبر محاولة لتمديد الإيجار
+    if now + ACTIVATION_LEASE_CLOCK_SKEW_SECONDS < issued_at or now >= expires_at:
+        logger.info("الإيجار المحلي منتهي أو ساعة الجهاز غير متسقة. سيتم التحقق عبر الإنترنت.")
+        return False, None
+    return True, activation_code
+
+
+def save_lease(activation_code, code_expires_at=None):
+    """
+    يحفظ إيجارًا جديدًا للكود في ملف حالة التفعيل بعد تحقق ناجح من Firestore.
+    مدته لا تتجاوز ACTIVATION_LEASE_MAX_DAYS ولا تاريخ انتهاء الكود (expiresAt) إن وُجد.
+    """
+    data = _load_activation_file()
+    if not data or data.get("activation_code") != activation_code:
+        logger.warning("لا يمكن إصدار إيجار: ملف التفعيل المحلي غير موجود أو لا يطابق الكود.")
+        return False
+
+    device_id = _read_device_id()
+    if not device_id:
+        return False
+
+    issued_at = time.time()
+    expires_at = issued_at + ACTIVATION_LEASE_MAX_DAYS * 86400
+    if code_expires_at is not None:
+        expires_at = min(expires_at, code_expires_at.timestamp())
+    if expires_at <= issued_at:
+        return False
+
+    data[LEASE_KEY] = {
+        "issued_at": round(issued_at),
+        "expires_at": round(expires_at),
+        "checksum": _checksum(activation_code, device_id, round(issued_at), round(expires_at)),
+    }
+    temp_file = ACTIVATION_STATUS_FILE + ".tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(temp_file, ACTIVATION_STATUS_FILE)
+    except OSError as e:
+        logger.error(f"خطأ أثناء حفظ الإيجار المحلي: {e}")
+        return False
+    logger.info(f"تم تجديد الإيجار المحلي للكود '{activation_code}' حتى {time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at))}.")
+    return True
@@ -0,0 +1,88 @@
+# activation_threads.py
+"""
+خيوط بدء التشغيل (التحقق من التفعيل، معلومات الجهاز) في وحدة خفيفة منفصلة عن threads.py:
+تُستورد من خيط الواجهة عند أول دورة لحلقة الأحداث، فلا يجب أن تجر معها api_client و requests
+وبقية وحدات المراقبة. firebase_service و activation_lease تُستوردان داخل run() في خيط الخلفية.
+"""
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class ActivationCheckThread(QThread):
+    """
+    يتحقق من التفعيل في الخلفية حتى لا تتأخر النافذة الرئيسية.
+    إذا وُجد إيجار محلي صالح (ذاكرة مؤقتة لآخر تحقق، وليس توقيعًا) تُرسل النتيجة "active" فورًا،
+    ثم يُعاد التحقق عبر Firestore ويُرسل "revoked" إذا رُفض الكود.
+    النتائج: "active" أو "needs_activation" أو "revoked" أو "firebase_unavailable".
+    """
+    activation_checked_signal = pyqtSignal(str, str, str) # result, local_code, message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.firebase_service = None
+
+    def run(self):
+        import activation_lease
+        has_valid_lease, leased_code = activation_lease.check_lease()
+        if has_valid_lease:
+            logger.info(f"ActivationCheckThread: إيجار تفعيل محلي صالح للكود: {leased_code}. سيتم التجديد في الخلفية.")
+            self.activation_checked_signal.emit("active", leased_code, "")
+
+        # الاستيراد هنا لأن تحميل firebase_admin وحده يستغرق وقتًا ملحوظًا عند بدء التشغيل
+        from firebase_service import FirebaseService
+        self.firebase_service = FirebaseService()
+        is_locally_activated, local_code = self.firebase_service.check_local_activation()
+
+        if is_locally_activated and local_code:
+            logger.info(f"ActivationCheckThread: البرنامج مفعل محليًا بالكود: {local_code}. يتم التحقق من صلاحية الكود عبر الإنترنت...")
+            if not self.firebase_service.is_initialized():
+                logger.error("ActivationCheckThread: خدمة Firebase غير مهيأة عند التحقق من الكود المحلي.")
+                if not has_valid_lease:
+                    self.activation_checked_signal.emit("firebase_unavailable", local_code,
+                        "لا يمكن الاتصال بخدمة Firebase للتحقق من التفعيل المحلي. يرجى التحقق من اتصالك بالإنترنت والمحاولة مرة أخرى.")
+                return
+            try:
+                is_valid, message, code_expires_at = self.firebase_service.verify_local_activation_online(local_code)
+            except Exception as e_fb_check:
+                logger.exception(f"ActivationCheckThread: خطأ أثناء التحقق من الكود المحلي '{local_code}' في Firebase: {e_fb_check}")
+                if has_valid_lease:
+                    # خطأ شبكة وليس رفضًا: نُبقي الإيجار الحالي ونعيد المحاولة عند التشغيل القادم
+                    return
+                is_valid = False
+                code_expires_at = None
+                message = f"حدث خطأ أثناء التحقق من التفعيل المحلي عبر الإنترنت: {e_fb_check}. يرجى المحاولة مرة أخرى."
+            if is_valid:
+                activation_lease.save_lease(local_code, code_expires_at)
+                if not has_valid_lease:
+                    self.activation_checked_signal.emit("active", local_code, message)
+                return
+            self.firebase_service.remove_local_activation()
+            self.activation_checked_signal.emit("revoked" if has_valid_lease else "needs_activation", "", message)
+            return
+
+        logger.info("ActivationCheckThread: البرنامج غير مفعل محليًا. يتطلب التفعيل عبر الإنترنت.")
+        if not self.firebase_service.is_initialized():
+            self.activation_checked_signal.emit("firebase_unavailable", "", "")
+            return
+        self.activation_checked_signal.emit("needs_activation", "", "")
+
+
+class DeviceInfoThread(QThread):
+    """يجمع معلومات الجهاز (IP العام والمحلي...) في الخلفية بالتوازي مع التحقق من التفعيل."""
+    device_info_ready_signal = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.device_info = None
+
+    def run(self):
+        from firebase_service import FirebaseService
+        try:
+            self.device_info = FirebaseService.get_device_info()
+        except Exception as e:
+            logger.exception(f"DeviceInfoThread: خطأ أثناء جمع معلومات الجهاز: {e}")
+            self.device_info = {}
+        logger.info(f"معلومات الجهاز المجمعة عند بدء التشغيل: {self.device_info}")
+        self.device_info_ready_signal.emit(self.device_info)
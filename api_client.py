@@ -2,40 +2,359 @@
 import requests
 import json
 import time
+import copy
 import logging
+import threading
 import urllib3
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from config import BASE_API_URL, MAIN_SITE_CHECK_URL, MAX_RETRIES, MAX_BACKOFF_DELAY, SESSION
+from config import (
+    BASE_API_URL, MAIN_SITE_CHECK_URL, MAX_RETRIES, MAX_BACKOFF_DELAY, SESSION,
+    REQUEST_DEADLINES, DEFAULT_REQUEST_DEADLINE_SECONDS, MIN_ATTEMPT_SECONDS,
+    DEFAULT_SETTINGS, SETTING_HTTP_POOL_SIZE, WARMUP_TIMEOUT_SECONDS, HTTP_TRANSPORT_HTTP2,
+    API_RATE_LIMIT_PER_SECOND, API_RATE_LIMIT_BURST, HEDGED_ENDPOINTS, HEDGE_AFTER_PERCENTILE,
+    HEDGE_MAX_FRACTION, HEDGE_BUDGET_BURST, HEDGE_EXECUTOR_WORKERS
+)
+from response_cache import RESPONSE_CACHE
+from server_clock import SERVER_CLOCK
+from circuit_breaker import CIRCUIT_BREAKERS
+from latency_tracker import ENDPOINT_LATENCIES, CONNECT_KEY
+from pdf_stream import write_pdf_stream, PdfStreamError, STREAM_CHUNK_SIZE
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__) 
 
+_pool_lock = threading.Lock()
+_configured_pool_size = None
+
+
+def configure_session_pool(session, pool_size):
+    """
+    يركّب HTTPAdapter على الجلسة المشتركة بحجم مجمع اتصالات يناسب عدد الخيوط العاملة.
+    إعادة المحاولة على مستوى urllib3 معطلة حتى تُطبق سياسة _make_request وحدها (التأخير، 429...).
+    لا يُعاد التركيب إلا إذا تغير الحجم، لأن كل AnemAPIClient جديد يستدعي هذه الدالة.
+    """
+    global _configured_pool_size
+    with _pool_lock:
+        if _configured_pool_size == pool_size:
+            return
+        adapter = HTTPAdapter(
+            pool_connections=2, # مضيف واحد فعليًا (ac-controle.anem.dz)
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=0, read=False, raise_on_status=False),
+            pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _configured_pool_size = pool_size
+        logger.info(f"تم ضبط مجمع اتصالات HTTP: {pool_size} اتصالات لكل مضيف.")
+
+
+class TokenBucketRateLimiter:
+    """
+    حد معدل عام لجميع الطلبات نحو الواجهة البرمجية مهما كان الخيط المرسل (المراقبة، التحميل الجماعي...).
+    عند استلام 429 يُوقف الجميع مؤقتًا بدل أن يواصل كل خيط إرسال طلباته.
+    """
+    def __init__(self, rate_per_second, burst):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_seconds = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_seconds = (1 - self._tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+API_RATE_LIMITER = TokenBucketRateLimiter(API_RATE_LIMIT_PER_SECOND, API_RATE_LIMIT_BURST)
+
+
+class HedgeBudget:
+    """
+    يحد الطلبات الإضافية (hedge) بنسبة من الطلبات القابلة للتحوط: كل طلب أصلي يضيف max_fraction إلى الرصيد
+    وكل طلب إضافي يستهلك 1. الرصيد لا يتجاوز burst حتى لا تتراكم دفعة كبيرة بعد فترة هادئة.
+    """
+    def __init__(self, max_fraction, burst):
+        self.max_fraction = max_fraction
+        self.burst = burst
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.max_fraction)
+
+    def try_acquire(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class _HedgeExecutor:
+    """
+    مجمع خيوط الطلبات المتحوَّطة. try_submit لا يضع المهمة في الطابور أبدًا: إذا لم يكن هناك خيط شاغر يعيد None،
+    فلا يُحسب وقت الانتظار في الطابور كبطء من الخادم ولا يُرسل طلب إضافي والنظام مشغول أصلًا.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def try_submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._busy >= self.max_workers:
+                return None
+            self._busy += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-hedge")
+            executor = self._executor
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+        return executor.submit(run)
+
+
+HEDGE_BUDGET = HedgeBudget(HEDGE_MAX_FRACTION, HEDGE_BUDGET_BURST)
+HEDGE_EXECUTOR = _HedgeExecutor(HEDGE_EXECUTOR_WORKERS)
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+# طلبات GET الجارية حاليًا، مشتركة بين جميع نسخ AnemAPIClient (المراقبة، الفحص الفردي، تحميل الشهادات...)
+_inflight_lock = threading.Lock()
+_inflight_calls = {}
+
+
+def _single_flight(key, fn):
+    """
+    إذا كان طلب مطابق (نفس المسار والمعاملات) جاريًا بالفعل ينتظر المستدعي نتيجته بدل إرسال طلب جديد.
+    كل مستدعٍ يحصل على نسخة مستقلة من النتيجة حتى لا يؤثر تعديل أحدهم على الآخرين.
+    """
+    with _inflight_lock:
+        call = _inflight_calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _InFlightCall()
+            _inflight_calls[key] = call
+        else:
+            call.followers += 1
+
+    if not is_leader:
+        call.done.wait()
+        logger.debug(f"تم دمج طلب مطابق جارٍ: {key[0]}")
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    try:
+        call.result = fn()
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight_calls.pop(key, None)
+            followers = call.followers # بعد الإزالة لا ينضم أي مستدعٍ جديد
+        call.done.set()
+    if followers:
+        logger.debug(f"طلب {key[0]} خدم {followers} مستدعين إضافيين بنفس الاستجابة.")
+        return copy.deepcopy(call.result)
+    return call.result
+
 
 class AnemAPIClient:
-    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout):
+    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout, pool_size=None, transport=None, hedge_requests=False):
         self.session = SESSION 
+        self.hedge_requests = hedge_requests
         self.base_url = BASE_API_URL
         self.initial_backoff_general = initial_backoff_general
         self.initial_backoff_429 = initial_backoff_429
         self.request_timeout = request_timeout
+        pool_size = pool_size or DEFAULT_SETTINGS[SETTING_HTTP_POOL_SIZE]
+        configure_session_pool(SESSION, pool_size)
+        self.transport_in_use = "HTTP/1.1"
+        if transport == HTTP_TRANSPORT_HTTP2:
+            from http2_transport import get_shared_http2_session
+            http2_session = get_shared_http2_session(SESSION.headers, pool_size, SESSION.verify)
+            if http2_session is not None:
+                self.session = http2_session
+                self.transport_in_use = "HTTP/2"
+
+    def warmup_connections(self, count=1):
+        """
+        يفتح عدة اتصالات TLS بالتوازي (طلب HEAD خفيف للموقع الرئيسي، نفس مضيف الواجهة البرمجية)
+        لتبقى جاهزة في المجمع، فلا يقع زمن المصافحة على طلبات الدورة أو الحجز.
+        """
+        if self.transport_in_use == "HTTP/2":
+            count = 1 # اتصال HTTP/2 واحد يكفي لجميع الطلبات المتزامنة
+        count = max(1, min(count, _configured_pool_size or 1))
+
+        def _open_connection():
+            try:
+                sent_at = time.time()
+                response = self.session.head(MAIN_SITE_CHECK_URL, timeout=WARMUP_TIMEOUT_SECONDS, verify=False, allow_redirects=False)
+                received_at = time.time()
+                SERVER_CLOCK.observe(response.headers.get('Date'), sent_at, received_at)
+                ENDPOINT_LATENCIES.record(CONNECT_KEY, received_at - sent_at) # اتصال جديد في الغالب: مصافحة TCP/TLS + طلب صغير
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"فشل تسخين الاتصال بـ {MAIN_SITE_CHECK_URL}: {e}")
+
+        warmup_threads = [threading.Thread(target=_open_connection, daemon=True) for _ in range(count)]
+        for t in warmup_threads: t.start()
+        for t in warmup_threads: t.join(WARMUP_TIMEOUT_SECONDS * 2)
+        logger.debug(f"تم تسخين {count} اتصالات بالخادم.")
+
+    def warmup_connections_async(self, count=1):
+        threading.Thread(target=self.warmup_connections, args=(count,), daemon=True).start()
+
+
+    @staticmethod
+    def _deadline_for(endpoint):
+        for endpoint_prefix, deadline_seconds in REQUEST_DEADLINES.items():
+            if endpoint.startswith(endpoint_prefix):
+                return deadline_seconds
+        return DEFAULT_REQUEST_DEADLINE_SECONDS
+
+    def _make_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False, deadline_seconds=None):
+        if method.upper() == 'GET' and not is_site_check and not extra_headers:
+            cached_response = RESPONSE_CACHE.get(endpoint, params)
+            if cached_response is not None:
+                logger.debug(f"استجابة مخزنة مؤقتًا لـ {endpoint} {params}")
+                return cached_response, None
+            # طلبات GET متساوية القيمة (idempotent): طلب واحد على الشبكة لكل المستدعين المتزامنين
+            flight_key = (endpoint, tuple(sorted((params or {}).items())))
+            if self.hedge_requests and endpoint in HEDGED_ENDPOINTS:
+                send = lambda: self._send_hedged(endpoint, params, deadline_seconds)
+            else:
+                send = lambda: self._send_request(method, endpoint, params, data, extra_headers, is_site_check, deadline_seconds=deadline_seconds)
+            response_data, error_msg = _single_flight(flight_key, send)
+            if error_msg is None:
+                RESPONSE_CACHE.put(endpoint, params, response_data)
+            return response_data, error_msg
+        return self._send_request(method, endpoint, params, data, extra_headers, is_site_check, deadline_seconds=deadline_seconds)
+
+    def _send_hedged(self, endpoint, params, deadline_seconds=None):
+        """
+        طلب GET متحوَّط: إذا لم تصل استجابة خلال النسبة المئوية 95 لزمن هذا المسار يُرسل طلب ثانٍ مطابق،
+        وأول استجابة ناجحة تُعتمد ويُلغى الآخر (لا يعيد المحاولة بعدها). قبل توفر عينات كافية، أو إذا لم يكن
+        في HEDGE_EXECUTOR خيط شاغر، يُرسل طلب واحد عادي من الخيط المستدعي.
+        """
+        HEDGE_BUDGET.on_request()
+        hedge_after = ENDPOINT_LATENCIES.percentile(endpoint, HEDGE_AFTER_PERCENTILE)
+        if hedge_after is None:
+            return self._send_request('GET', endpoint, params, deadline_seconds=deadline_seconds)
 
+        deadline_budget = deadline_seconds or self._deadline_for(endpoint)
+        started_at = time.monotonic()
+        primary_cancel, hedge_cancel = threading.Event(), threading.Event()
+        primary_sent = threading.Event()
 
-    def _make_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False):
+        def send_primary():
+            try:
+                return self._send_request('GET', endpoint, params, deadline_seconds=deadline_budget,
+                                          cancel_event=primary_cancel, sent_event=primary_sent)
+            finally:
+                primary_sent.set() # انتهى دون إرسال (قاطع مفتوح، مهلة...): لا داعي للانتظار
+        primary = HEDGE_EXECUTOR.try_submit(send_primary)
+        if primary is None:
+            return self._send_request('GET', endpoint, params, deadline_seconds=deadline_budget)
+
+        # مؤقت p95 يبدأ عند إرسال الطلب فعليًا، وليس أثناء انتظار حد المعدل العام
+        primary_sent.wait(deadline_budget)
+        done, _ = wait([primary], timeout=hedge_after)
+        remaining_budget = deadline_budget - (time.monotonic() - started_at)
+        if done or remaining_budget < MIN_ATTEMPT_SECONDS or not HEDGE_BUDGET.try_acquire():
+            return primary.result()
+
+        hedge = HEDGE_EXECUTOR.try_submit(self._send_request, 'GET', endpoint, params,
+                                          deadline_seconds=remaining_budget, cancel_event=hedge_cancel)
+        if hedge is None: # المجمع ممتلئ: لا طلب إضافي
+            HEDGE_BUDGET.refund()
+            return primary.result()
+        logger.debug(f"لا استجابة من {endpoint} بعد {hedge_after:.2f} ثانية (p95). إرسال طلب موازٍ.")
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                response_data, error_msg = future.result()
+                if error_msg is None:
+                    (hedge_cancel if future is primary else primary_cancel).set()
+                    if future is hedge:
+                        logger.info(f"الطلب الموازي لـ {endpoint} سبق الطلب الأصلي ({time.monotonic() - started_at:.2f} ثانية).")
+                    return response_data, error_msg
+        return primary.result() # فشل الطلبان: خطأ الطلب الأصلي
+
+    def _send_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False, stream_to_file=None, deadline_seconds=None, cancel_event=None, sent_event=None):
+        # stream_to_file: مسار ملف PDF يُكتب فيه المحتوى أثناء الاستلام بدل تحليل JSON كاملًا في الذاكرة
+        # deadline_seconds: المهلة الكلية للطلب بكل محاولاته (الافتراضي حسب المسار من REQUEST_DEADLINES)
+        # cancel_event: طلب متحوَّط خاسر، لا تُرسل محاولات أخرى بعد ضبطه
+        # sent_event: يُضبط قبل إرسال أول محاولة فعليًا (بعد حد المعدل)، لمؤقت التحوط في _send_hedged
         url = f"{self.base_url}/{endpoint}" if not is_site_check else MAIN_SITE_CHECK_URL
 
         headers = self.session.headers.copy()
         if extra_headers:
             headers.update(extra_headers)
 
+        # فحص الموقع الرئيسي لا يمر عبر قواطع الدائرة (ليس مسارًا في الواجهة البرمجية)
+        breaker = None if is_site_check else CIRCUIT_BREAKERS.for_endpoint(endpoint)
         current_retry = 0
         max_retries_for_this_call = 0 if is_site_check else MAX_RETRIES 
         current_delay_general = self.initial_backoff_general
         current_delay_429 = self.initial_backoff_429
+        deadline_budget = None if is_site_check else (deadline_seconds or self._deadline_for(endpoint))
+        deadline_at = None if deadline_budget is None else time.monotonic() + deadline_budget
+
+        def retry_fits_deadline(delay_before_retry):
+            return deadline_at is None or time.monotonic() + delay_before_retry + MIN_ATTEMPT_SECONDS <= deadline_at
+
+        def deadline_error(last_error):
+            deadline_error_message = f"فشل الاتصال بالخادم ضمن المهلة الكلية للطلب ({deadline_budget:.0f} ثانية). ({last_error.split(':')[0].strip()})"
+            logger.error(f"لا وقت كافٍ لإعادة المحاولة لـ {url} قبل انتهاء المهلة الكلية بعد خطأ: {last_error}. الرسالة المُعادة: {deadline_error_message}")
+            return None, deadline_error_message
 
         last_error_message_for_request = "فشل غير محدد" # قيمة افتراضية للخطأ الأخير
 
         while current_retry <= max_retries_for_this_call:
+            if cancel_event is not None and cancel_event.is_set():
+                return None, "أُلغي الطلب (وصلت استجابة الطلب الموازي أولًا)."
             actual_delay_to_use = current_delay_general 
             log_prefix = f"الطلب {method.upper()} إلى {url}"
             if is_site_check:
@@ -43,12 +362,31 @@ class AnemAPIClient:
             
             logger.debug(f"{log_prefix} (محاولة {current_retry + 1}/{max_retries_for_this_call + 1}) مع البيانات: {params or data}")
             
+            if breaker is not None and not breaker.allow_request():
+                rejection_message = breaker.rejection_message()
+                logger.info(f"{log_prefix}: {rejection_message}")
+                return None, rejection_message
+
             try:
                 response = None
-                request_timeout_val = 5 if is_site_check else self.request_timeout
+                connect_timeout_val = read_timeout_val = 5
+                if not is_site_check:
+                    API_RATE_LIMITER.acquire()
+                    # مهلتا الاتصال والقراءة مشتقتان من زمن استجابة هذا المسار؛ الإعداد request_timeout هو الحد الأقصى
+                    connect_timeout_val, read_timeout_val = ENDPOINT_LATENCIES.timeouts_for(endpoint, self.request_timeout)
+                if deadline_at is not None:
+                    # مهلة المحاولة لا تتجاوز ما تبقى من المهلة الكلية
+                    remaining_seconds = max(deadline_at - time.monotonic(), MIN_ATTEMPT_SECONDS)
+                    connect_timeout_val = min(connect_timeout_val, remaining_seconds)
+                    read_timeout_val = min(read_timeout_val, remaining_seconds)
+                request_timeout_val = (connect_timeout_val, read_timeout_val)
 
+                sent_at = time.time()
+                if sent_event is not None: sent_event.set()
                 if method.upper() == 'GET':
-                    response = self.session.get(url, params=params, headers=headers, timeout=request_timeout_val, verify=False)
+                    response = self.session.get(url, params=params, headers=headers, timeout=request_timeout_val, verify=False, stream=bool(stream_to_file))
+                elif method.upper() == 'HEAD':
+                    response = self.session.head(url, headers=headers, timeout=request_timeout_val, verify=False, allow_redirects=False)
                 elif method.upper() == 'POST':
                     headers['Content-Type'] = 'application/json' 
                     response = self.session.post(url, json=data, headers=headers, timeout=request_timeout_val, verify=False)
@@ -57,15 +395,28 @@ class AnemAPIClient:
                     logger.error(unsupported_method_error)
                     return None, unsupported_method_error
 
+                received_at = time.time()
                 logger.debug(f"استجابة الخادم لـ {url}: {response.status_code}")
+                SERVER_CLOCK.observe(response.headers.get('Date'), sent_at, received_at)
+                ENDPOINT_LATENCIES.record(CONNECT_KEY if is_site_check else endpoint, received_at - sent_at)
+                if breaker is not None:
+                    # 429 يعالجه حد المعدل العام؛ القاطع يحسب أعطال الخادم فقط
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
 
                 if response.status_code == 429: 
                     actual_delay_to_use = current_delay_429
                     logger.warning(f"خطأ 429 (طلبات كثيرة جدًا) من الخادم لـ {url}. الانتظار {actual_delay_to_use} ثانية.")
+                    if stream_to_file: response.close()
+                    API_RATE_LIMITER.pause(actual_delay_to_use)
                     if current_retry >= max_retries_for_this_call:
                         final_429_error = "طلبات كثيرة جدًا للخادم (429). يرجى الانتظار والمحاولة لاحقًا."
                         logger.error(f"تم تجاوز الحد الأقصى لإعادة المحاولة (429) لـ {url}. الرسالة المُعادة: {final_429_error}")
                         return None, final_429_error
+                    if not retry_fits_deadline(actual_delay_to_use):
+                        return deadline_error("طلبات كثيرة جدًا (429)")
                     time.sleep(actual_delay_to_use)
                     current_delay_429 = min(current_delay_429 * 2, MAX_BACKOFF_DELAY) 
                     current_retry += 1
@@ -73,11 +424,27 @@ class AnemAPIClient:
                     continue
                 
                 actual_delay_to_use = current_delay_general # إعادة التعيين إلى التأخير العام إذا لم يكن الخطأ 429
+                if is_site_check and response.status_code < 500:
+                    return True, None # أي استجابة (حتى 405 لطلب HEAD) تعني أن الخادم يرد
                 response.raise_for_status() 
                 
                 if is_site_check: 
                     return True, None 
                 
+                if stream_to_file:
+                    try:
+                        bytes_written = write_pdf_stream(response.iter_content(STREAM_CHUNK_SIZE), stream_to_file)
+                    except PdfStreamError as e_stream:
+                        logger.error(f"استجابة PDF غير صالحة من {url}: {e_stream}. بداية الاستجابة: {e_stream.response_preview[:200]!r}")
+                        return None, str(e_stream)
+                    except OSError as e_write:
+                        logger.error(f"خطأ في كتابة ملف PDF {stream_to_file}: {e_write}")
+                        return None, f"خطأ في حفظ الملف: {e_write}"
+                    finally:
+                        response.close()
+                    logger.debug(f"تم حفظ {bytes_written} بايت من {url} في {stream_to_file}")
+                    return {"file_path": stream_to_file, "size": bytes_written}, None
+
                 try:
                     json_response = response.json()
                     if endpoint == 'RendezVous/Create' and isinstance(json_response, dict) and json_response.get("Eligible") is False:
@@ -108,26 +475,33 @@ class AnemAPIClient:
             except requests.exceptions.SSLError as e:
                 error_message = f"خطأ SSL عند الاتصال بـ {url}: {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
                 logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 last_error_message_for_request = error_message
             except requests.exceptions.ConnectTimeout as e: 
                 error_message = f"انتهت مهلة الاتصال بالخادم ({url}): {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
+                ENDPOINT_LATENCIES.record(CONNECT_KEY, connect_timeout_val) # عينة مقطوعة عند المهلة: ترفع المهلة التالية إن تكررت
                 logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 last_error_message_for_request = error_message
             except requests.exceptions.ReadTimeout as e: 
                 error_message = f"انتهت مهلة القراءة من الخادم ({url}): {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
+                ENDPOINT_LATENCIES.record(endpoint, read_timeout_val)
                 logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 last_error_message_for_request = error_message
             except requests.exceptions.Timeout as e: # هذا يشمل ConnectTimeout و ReadTimeout بشكل عام
                 error_message = f"انتهت مهلة الطلب لـ {url}: {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
                 logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 last_error_message_for_request = error_message
             except requests.exceptions.ConnectionError as e:
                 error_message = f"خطأ في الاتصال بالخادم ({url}): {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
                 logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 last_error_message_for_request = error_message
             except requests.exceptions.HTTPError as e: 
@@ -136,6 +510,7 @@ class AnemAPIClient:
                 if is_site_check: return False, error_message
                 logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}. الاستجابة: {response.text[:200] if response else 'N/A'}")
                 last_error_message_for_request = error_message
+                if stream_to_file and response is not None: response.close() # إعادة الاتصال إلى المجمع قبل المحاولة التالية
                 
                 if endpoint == 'RendezVous/Create' and response is not None:
                     try:
@@ -156,6 +531,7 @@ class AnemAPIClient:
             except requests.exceptions.RequestException as e: 
                 error_message = f"خطأ عام في الطلب لـ {url}: {str(e)}"
                 if is_site_check: return False, error_message
+                if breaker is not None: breaker.record_failure()
                 logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 generic_request_error_msg = "حدث خطأ عام أثناء محاولة الاتصال بالخادم."
                 logger.error(f"الطلب إلى {url} فشل بخطأ عام. الرسالة المُعادة: {generic_request_error_msg}")
@@ -165,6 +541,8 @@ class AnemAPIClient:
                 final_error_message_after_retries = f"فشل الاتصال بالخادم بعد عدة محاولات. ({last_error_message_for_request.split(':')[0].strip()})" 
                 logger.error(f"تم تجاوز الحد الأقصى لإعادة المحاولة لـ {url} بعد خطأ: {last_error_message_for_request}. الرسالة المُعادة: {final_error_message_after_retries}")
                 return None, final_error_message_after_retries
+            if not retry_fits_deadline(actual_delay_to_use):
+                return deadline_error(last_error_message_for_request)
             
             time.sleep(actual_delay_to_use)
             current_delay_general = min(current_delay_general * 2, MAX_BACKOFF_DELAY) 
@@ -177,9 +555,10 @@ class AnemAPIClient:
 
 
     def check_main_site_availability(self):
-        logger.info(f"بدء فحص توفر الموقع الرئيسي: {MAIN_SITE_CHECK_URL}")
-        # يتم التعامل مع is_site_check داخل _make_request لتعطيل إعادة المحاولة
-        available, error_msg = self._make_request('GET', '', is_site_check=True) 
+        """فحص خفيف: طلب HEAD بدون إعادة محاولة (لا تُحمّل صفحة الموقع)، عبر اتصال من المجمع إن وُجد."""
+        logger.debug(f"بدء فحص توفر الموقع الرئيسي: {MAIN_SITE_CHECK_URL}")
+        # يتم التعامل مع is_site_check داخل _send_request لتعطيل إعادة المحاولة
+        available, error_msg = self._make_request('HEAD', '', is_site_check=True) 
         if error_msg: 
             # لا نسجل كـ error هنا لأن هذا الفحص دوري، والخطأ متوقع أحيانًا
             logger.warning(f"فحص توفر الموقع فشل: {error_msg}")
@@ -217,6 +596,16 @@ class AnemAPIClient:
         headers = {'g-recaptcha-response': ''} 
         return self._make_request('POST', 'RendezVous/Create', data=payload, extra_headers=headers)
 
+    def download_pdf_to_file(self, report_type, pre_inscription_id, destination_path):
+        """
+        يحمّل الشهادة مباشرة إلى destination_path (تحليل تدريجي + فك base64 على دفعات + استبدال ذري).
+        Returns:
+            tuple: ({"file_path", "size"} أو None, رسالة الخطأ أو None)
+        """
+        endpoint = f"download/{report_type}"
+        params = {"PreInscriptionId": pre_inscription_id}
+        return self._send_request('GET', endpoint, params=params, stream_to_file=destination_path)
+
     def download_pdf(self, report_type, pre_inscription_id):
         endpoint = f"download/{report_type}"
         params = {"PreInscriptionId": pre_inscription_id}
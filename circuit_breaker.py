@@ -0,0 +1,155 @@
+# circuit_breaker.py
+"""
+قاطع دائرة لكل مسار في الواجهة البرمجية (validateCandidate، GetAvailableDates، download/RdvReport...).
+مغلق: الطلبات تمر وتُحسب نسبة الأخطاء في نافذة زمنية. مفتوح: الطلبات تُرفض فورًا دون إرسالها.
+نصف مفتوح: بعد مدة الانتظار يمر طلب واحد فقط من نفس المسار كاختبار؛ نجاحه يغلق القاطع وفشله يعيد فتحه لمدة أطول.
+تعطل مسار واحد (مثل تحميل الشهادات) لا يوقف بقية المسارات.
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+from config import (CIRCUIT_WINDOW_SECONDS, CIRCUIT_MIN_REQUESTS, CIRCUIT_ERROR_RATE_THRESHOLD,
+                    CIRCUIT_OPEN_SECONDS, CIRCUIT_MAX_OPEN_SECONDS, CIRCUIT_PROBE_TIMEOUT_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+CIRCUIT_OPEN_ERROR_PREFIX = "توقف مؤقت لطلبات"
+
+
+class CircuitBreaker:
+    def __init__(self, name, window_seconds=60, min_requests=5, error_rate_threshold=0.5,
+                 open_seconds=30, max_open_seconds=300, probe_timeout_seconds=60):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._outcomes = deque() # (monotonic ts, نجاح؟) داخل النافذة
+        self._error_count = 0
+        self._open_seconds = open_seconds
+        self._opened_until = 0.0
+        self._probe_started_at = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() >= self._opened_until:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def retry_in(self):
+        """الثواني المتبقية قبل السماح بطلب الاختبار (0 إذا لم يكن القاطع مفتوحًا)."""
+        with self._lock:
+            if self._state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self._opened_until - time.monotonic())
+
+    def expedite_probe(self):
+        """يسمح بطلب الاختبار فورًا (مثلًا بعد أن أكد فحص خفيف أن الخادم عاد يرد)."""
+        with self._lock:
+            if self._state == STATE_OPEN:
+                self._opened_until = time.monotonic()
+
+    def allow_request(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == STATE_OPEN:
+                if now < self._opened_until:
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probe_started_at = None
+                logger.info(f"قاطع الدائرة [{self.name}]: نصف مفتوح، إرسال طلب اختبار.")
+            if self._state == STATE_HALF_OPEN:
+                # طلب اختبار واحد في كل مرة؛ طلب اختبار عالق لا يمنع اختبارًا جديدًا إلى الأبد
+                if self._probe_started_at is not None and now - self._probe_started_at < self.probe_timeout_seconds:
+                    return False
+                self._probe_started_at = now
+            return True
+
+    def _prune(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, succeeded = self._outcomes.popleft()
+            if not succeeded:
+                self._error_count -= 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._state = STATE_CLOSED
+                self._outcomes.clear()
+                self._error_count = 0
+                self._open_seconds = self.base_open_seconds
+                logger.info(f"قاطع الدائرة [{self.name}]: نجح طلب الاختبار، استئناف الطلبات.")
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == STATE_HALF_OPEN:
+                self._open_seconds = min(self._open_seconds * 2, self.max_open_seconds)
+                self._open(now, "فشل طلب الاختبار")
+                return
+            if self._state == STATE_OPEN:
+                return
+            self._outcomes.append((now, False))
+            self._error_count += 1
+            self._prune(now)
+            total = len(self._outcomes)
+            if total >= self.min_requests and self._error_count / total >= self.error_rate_threshold:
+                self._open(now, f"{self._error_count}/{total} طلبات فاشلة خلال {self.window_seconds} ثانية")
+
+    def _open(self, now, reason):
+        self._state = STATE_OPEN
+        self._opened_until = now + self._open_seconds
+        self._probe_started_at = None
+        self._outcomes.clear()
+        self._error_count = 0
+        logger.warning(f"قاطع الدائرة [{self.name}]: مفتوح لمدة {self._open_seconds} ثانية ({reason}).")
+
+    def rejection_message(self):
+        return f"{CIRCUIT_OPEN_ERROR_PREFIX} {self.name} بعد أخطاء متكررة، إعادة المحاولة بعد {int(self.retry_in()) + 1} ثانية."
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def for_endpoint(self, endpoint):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, **self.breaker_options)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def any_open(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return any(breaker.state != STATE_CLOSED for breaker in breakers)
+
+    def summary(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        not_closed = [f"{breaker.name}: {breaker.state}" for breaker in breakers if breaker.state != STATE_CLOSED]
+        return "، ".join(not_closed) if not_closed else "كل المسارات تعمل"
+
+
+CIRCUIT_BREAKERS = CircuitBreakerRegistry(
+    window_seconds=CIRCUIT_WINDOW_SECONDS, min_requests=CIRCUIT_MIN_REQUESTS,
+    error_rate_threshold=CIRCUIT_ERROR_RATE_THRESHOLD, open_seconds=CIRCUIT_OPEN_SECONDS,
+    max_open_seconds=CIRCUIT_MAX_OPEN_SECONDS, probe_timeout_seconds=CIRCUIT_PROBE_TIMEOUT_SECONDS
+)
@@ -1,6 +1,6 @@
 # config.py
-import requests
 import logging
+import threading
 
 # --- File Names and Paths ---
 LOG_FILE = "anem_app.log"
@@ -9,25 +9,51 @@ STYLESHEET_FILE = "styles_dark.txt"
 SETTINGS_FILE = "app_settings.json" # File to store settings
 FIREBASE_SERVICE_ACCOUNT_KEY_FILE = "firebase_service_account_key.json" # اسم ملف مفتاح حساب خدمة Firebase
 ACTIVATION_STATUS_FILE = "activation_status.json" # اسم الملف المحلي لحالة التفعيل
+DEVICE_ID_FILE = "device_id.dat" # المعرف الفريد المحلي للجهاز (UUID)
+RESPONSE_CACHE_FILE = "api_response_cache.json" # Persisted API responses (see RESPONSE_CACHE_POLICIES)
+STATUS_HISTORY_DB_FILE = "status_history.sqlite3" # سجل انتقالات حالات الأعضاء (SQLite، إضافي فقط)
+SLOT_LEARNER_FILE = "slot_release_patterns.json" # توزيع أوقات ظهور المواعيد لكل مؤسسة (see slot_learner.py)
+PDF_OUTPUT_DIR_NAME = "ملفات_المنحة_البرنامج" # مجلد الشهادات داخل مجلد المستندات (Documents)
+PDF_STORE_DIR_NAME = ".store" # Content-addressed PDF store (blobs + manifest.json) inside PDF_OUTPUT_DIR_NAME; member folders are views on it
+PDF_MIN_VALID_SIZE_BYTES = 128 # Smaller files are error pages or truncated downloads, never real certificates
+PDF_INDEX_WATCH_FILESYSTEM = True # Keep the in-memory certificate file index current with a QFileSystemWatcher (external deletions/copies)
 
 # --- API Configuration ---
 BASE_API_URL = "https://ac-controle.anem.dz/AllocationChomage/api"
-MAIN_SITE_CHECK_URL = "https://ac-controle.anem.dz/" # For checking general site availability
+MAIN_SITE_CHECK_URL = "https://ac-controle.anem.dz/" # For checking general site availability (HEAD only, the page itself is never downloaded)
 
 # --- Session Object (shared across API clients if needed) ---
-SESSION = requests.Session()
-SESSION.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-    'Accept': 'application/json, text/plain, */*',
-    'Accept-Language': 'ar-DZ,ar;q=0.9,fr-FR;q=0.8,fr;q=0.7,en-US;q=0.6,en;q=0.5',
-    'Origin': 'https://minha.anem.dz',
-    'Referer': 'https://minha.anem.dz/',
-    'Sec-Fetch-Dest': 'empty',
-    'Sec-Fetch-Mode': 'cors',
-    'Sec-Fetch-Site': 'same-site',
-    'Cache-Control': 'no-cache', # Ensure fresh data
-    'Pragma': 'no-cache' # For older HTTP/1.0 servers
-})
+# SESSION يُنشأ عند أول استخدام (config.SESSION أو from config import SESSION)
+# حتى لا يُحمَّل requests عند بدء التشغيل قبل ظهور النافذة.
+_session = None
+_session_lock = threading.Lock()
+
+def _create_session():
+    import requests
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
+        'Accept': 'application/json, text/plain, */*',
+        'Accept-Language': 'ar-DZ,ar;q=0.9,fr-FR;q=0.8,fr;q=0.7,en-US;q=0.6,en;q=0.5',
+        'Origin': 'https://minha.anem.dz',
+        'Referer': 'https://minha.anem.dz/',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-site',
+        'Cache-Control': 'no-cache', # Ensure fresh data
+        'Pragma': 'no-cache', # For older HTTP/1.0 servers
+        'Connection': 'keep-alive'
+    })
+    return session
+
+def __getattr__(name):
+    global _session
+    if name == "SESSION":
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+        return _session
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Settings Keys (used for consistency in accessing settings dict) ---
 SETTING_MIN_MEMBER_DELAY = "min_member_delay"
@@ -36,6 +62,12 @@ SETTING_MONITORING_INTERVAL = "monitoring_interval"
 SETTING_BACKOFF_429 = "backoff_429"           # Delay after HTTP 429
 SETTING_BACKOFF_GENERAL = "backoff_general"   # General retry delay
 SETTING_REQUEST_TIMEOUT = "request_timeout"   # Timeout for API requests
+SETTING_HTTP_POOL_SIZE = "http_pool_size"     # Max kept-alive connections per host in SESSION
+SETTING_HTTP_TRANSPORT = "http_transport"     # HTTP_TRANSPORT_HTTP1 (requests) or HTTP_TRANSPORT_HTTP2 (httpx, optional)
+SETTING_HEDGE_REQUESTS = "hedge_requests" # Send a second identical GET when the first is slower than the endpoint's p95 (HEDGED_ENDPOINTS only)
+
+HTTP_TRANSPORT_HTTP1 = "http1"
+HTTP_TRANSPORT_HTTP2 = "http2"
 
 # --- Default Settings (if settings file is missing or corrupted) ---
 DEFAULT_SETTINGS = {
@@ -44,19 +76,106 @@ DEFAULT_SETTINGS = {
     SETTING_MONITORING_INTERVAL: 1,  # minutes (e.g., 1 minute)
     SETTING_BACKOFF_429: 60,          # seconds (e.g., 60 seconds)
     SETTING_BACKOFF_GENERAL: 5,       # seconds (e.g., 5 seconds)
-    SETTING_REQUEST_TIMEOUT: 30       # seconds (e.g., 30 seconds)
+    SETTING_REQUEST_TIMEOUT: 30,      # seconds (e.g., 30 seconds)
+    SETTING_HTTP_POOL_SIZE: 10,       # connections (monitoring + single checks + PDF downloads + initial fetches)
+    SETTING_HTTP_TRANSPORT: HTTP_TRANSPORT_HTTP1,
+    SETTING_HEDGE_REQUESTS: False
 }
 
 # --- Retry Mechanism Constants (used by AnemAPIClient) ---
 MAX_RETRIES = 3  # Max number of retries for a single API call (excluding initial attempt)
 MAX_BACKOFF_DELAY = 120  # Maximum delay (in seconds) for exponential backoff
+# Overall budget per API call (all attempts + timeouts + backoff sleeps); a retry that cannot finish in time is skipped.
+# endpoint prefix -> seconds. Keeps the worst case per member bounded in the single monitoring thread.
+REQUEST_DEADLINES = {
+    "RendezVous/GetAvailableDates": 25,
+    "validateCandidate/query": 45,
+    "PreInscription/GetPreInscription": 45,
+    "RendezVous/Create": 60,
+    "download/": 180,
+}
+DEFAULT_REQUEST_DEADLINE_SECONDS = 60
+MIN_ATTEMPT_SECONDS = 3 # No new attempt is started with less than this left before the deadline
+
+# --- Latency-adaptive Timeouts (see latency_tracker.py) ---
+# timeout = p99 of the last LATENCY_WINDOW_SIZE latencies x LATENCY_TIMEOUT_FACTOR, between the minimum and the request_timeout setting
+LATENCY_WINDOW_SIZE = 200
+LATENCY_MIN_SAMPLES = 20 # Until then the request_timeout setting is used as is
+LATENCY_TIMEOUT_PERCENTILE = 0.99
+LATENCY_TIMEOUT_FACTOR = 3.0
+MIN_READ_TIMEOUT_SECONDS = 5
+MIN_CONNECT_TIMEOUT_SECONDS = 3
+
+# --- Hedged Requests (SETTING_HEDGE_REQUESTS) ---
+HEDGED_ENDPOINTS = ("validateCandidate/query", "RendezVous/GetAvailableDates") # Read-only GETs only
+HEDGE_AFTER_PERCENTILE = 0.95 # The second request goes out once the first has taken longer than this percentile
+HEDGE_MAX_FRACTION = 0.05 # Hedges are capped at 5% of hedgeable calls (they also go through API_RATE_LIMITER)
+HEDGE_BUDGET_BURST = 5 # Unused hedge budget accumulates up to this many hedges
+HEDGE_EXECUTOR_WORKERS = 16
+
+# --- Global Rate Limit (shared by every AnemAPIClient / thread) ---
+API_RATE_LIMIT_PER_SECOND = 4.0 # Sustained request rate to the API
+API_RATE_LIMIT_BURST = 4 # Requests allowed back-to-back before the rate applies
+
+# --- Bulk PDF Download ---
+BULK_PDF_DOWNLOAD_WORKERS = 3 # Parallel members in BulkPdfDownloadThread (still bounded by the global rate limit)
+
+# --- Per-Member Jobs (initial info fetch, instant check) ---
+MEMBER_JOB_WORKERS = 4 # Worker threads shared by all initial fetches and instant checks, whatever the number of members
+
+# --- Bulk Member Import (CSV/XLSX) ---
+MEMBER_IMPORT_FETCH_BATCH_SIZE = 100 # Initial fetches handed to MemberJobPool per batch after an import
+MEMBER_IMPORT_FETCH_INTERVAL_MS = 2000 # Delay between batches; a batch is skipped while the pool still has queued jobs
+
+# --- Connection Warmup ---
+WARMUP_LEAD_SECONDS = 3 # Open TLS connections this many seconds before a wait ends
+WARMUP_CONNECTIONS = 2 # Number of connections pre-established per warmup
+WARMUP_TIMEOUT_SECONDS = 5
+
+# --- API Response Cache ---
+RESPONSE_CACHE_MAX_ENTRIES = 512
+# endpoint prefix -> (TTL seconds, persist to RESPONSE_CACHE_FILE, field that must be present for the response to be cached)
+# Endpoints not listed here (validateCandidate, GetAvailableDates, RendezVous/Create) are never cached.
+# PDFs are streamed straight to disk (download_pdf_to_file); the saved file acts as their cache.
+RESPONSE_CACHE_POLICIES = {
+    "PreInscription/GetPreInscription": (7 * 24 * 3600, True, "nomDemandeurAr"),
+}
+
+# --- Member Status History ---
+STATUS_HISTORY_RETENTION_DAYS = 90 # Older transitions are deleted on startup and hourly
+STATUS_HISTORY_FLUSH_INTERVAL_SECONDS = 2.0 # Transitions are written in batches by a background thread
+STATUS_HISTORY_BATCH_SIZE = 500
+
+# --- Slot Release Learner (adaptive monitoring cadence) ---
+SLOT_LEARNER_HALF_LIFE_DAYS = 14 # Weight of an observed release halves every N days
+SLOT_LEARNER_MIN_RELEASES = 3 # Below this many (decayed) releases a structure keeps the uniform cadence
+SLOT_LEARNER_PRIOR_PER_HOUR = 1.0 # Added to every hour so a single observation does not dominate
+SLOT_POLLING_MIN_RATE = 0.5 # Cold hours: checked at half the configured frequency at most
+SLOT_POLLING_MAX_RATE = 3.0 # Hot hours: checked up to 3x the configured frequency
+
+# --- Server Clock (estimated from HTTP Date headers, see server_clock.py) ---
+SERVER_CLOCK_MAX_DRIFT_PER_SECOND = 1e-4 # Previous offset bounds widen by this much per elapsed second
+SERVER_CLOCK_RTT_SMOOTHING = 0.2 # EWMA weight of the newest round-trip time sample
+
+# --- Per-endpoint Circuit Breakers (see circuit_breaker.py) ---
+CIRCUIT_WINDOW_SECONDS = 60 # Error rate is measured over the attempts of the last N seconds
+CIRCUIT_MIN_REQUESTS = 5 # Fewer attempts than this in the window never open the circuit
+CIRCUIT_ERROR_RATE_THRESHOLD = 0.5 # Network errors/timeouts/5xx ratio that opens the circuit
+CIRCUIT_OPEN_SECONDS = 30 # First open period; doubles after each failed half-open probe
+CIRCUIT_MAX_OPEN_SECONDS = 300
+CIRCUIT_PROBE_TIMEOUT_SECONDS = 60 # A half-open probe with no outcome after this long allows another probe
+SITE_PROBE_INITIAL_DELAY_SECONDS = 1 # While the validation circuit is open the site is probed with HEAD after 1s, 2s, 4s...
+SITE_PROBE_MAX_DELAY_SECONDS = 30
 
 # --- Other Application Constants ---
 MAX_ERROR_DISPLAY_LENGTH = 70 # Max length for truncated error messages in the table
+STARTUP_TIME_BUDGET_MS = 1000 # Budget checked by --exit-after-startup (time until the main window is shown)
 APP_ID_FALLBACK = 'anem-booking-app-pyqt14-refactored' # Fallback if __app_id is not defined
 
 # --- Firebase Activation Constants ---
 FIRESTORE_ACTIVATION_CODES_COLLECTION = "activation_codes" # اسم مجموعة أكواد التفعيل في Firestore
+ACTIVATION_LEASE_MAX_DAYS = 7 # أقصى مدة لصلاحية الإيجار المحلي (ذاكرة مؤقتة غير موقّعة) قبل وجوب التحقق عبر الإنترنت
+ACTIVATION_LEASE_CLOCK_SKEW_SECONDS = 300 # السماح بفارق بسيط في ساعة الجهاز عند فحص تاريخ إصدار الإيجار
 
 # Attempt to get __app_id, provide a fallback if not defined (e.g., when running outside specific env)
 # This part is for environments where __app_id might be injected.
@@ -13,7 +13,7 @@ import uuid # لإنشاء معرف فريد للجهاز إذا لم يكن م
 import requests # لمحاولة الحصول على IP العام
 
 # استيراد الثوابت من ملف config.py
-from config import FIREBASE_SERVICE_ACCOUNT_KEY_FILE, ACTIVATION_STATUS_FILE, FIRESTORE_ACTIVATION_CODES_COLLECTION
+from config import FIREBASE_SERVICE_ACCOUNT_KEY_FILE, ACTIVATION_STATUS_FILE, FIRESTORE_ACTIVATION_CODES_COLLECTION, DEVICE_ID_FILE
 
 logger = logging.getLogger(__name__)
 
@@ -146,6 +146,53 @@ class FirebaseService:
             logger.exception(f"حدث خطأ عام أثناء التحقق من كود التفعيل '{code_to_verify}' في Firestore: {e}")
             return False, f"خطأ عام في الاتصال بقاعدة البيانات للتحقق من الكود: {e}", None
 
+    @staticmethod
+    def get_expires_at(code_data):
+        """يحوّل حقل expiresAt (Timestamp أو datetime) إلى datetime، أو None إذا لم يكن للكود تاريخ انتهاء."""
+        expires_at_timestamp = (code_data or {}).get("expiresAt")
+        if not expires_at_timestamp:
+            return None
+        if isinstance(expires_at_timestamp, datetime.datetime):
+            return expires_at_timestamp
+        return expires_at_timestamp.to_datetime()
+
+    def verify_local_activation_online(self, local_code):
+        """
+        يتحقق عبر Firestore من أن الكود المحفوظ محليًا لا يزال صالحًا (ACTIVE وغير منتهي الصلاحية).
+        Returns:
+            tuple: (is_valid, message, expires_at) حيث expires_at تاريخ انتهاء الكود أو None.
+        Raises:
+            Exception: عند فشل الاتصال بـ Firestore (يتعامل معه المستدعي).
+        """
+        code_ref = self.db.collection(FIRESTORE_ACTIVATION_CODES_COLLECTION).document(local_code.strip())
+        code_doc = code_ref.get()
+        if not code_doc.exists:
+            logger.warning(f"الكود المحلي '{local_code}' غير موجود في Firebase. يتطلب إعادة تفعيل.")
+            return False, "كود التفعيل المحلي غير موجود في قاعدة البيانات.", None
+
+        code_data = code_doc.to_dict()
+        firebase_status = code_data.get("status", "").upper()
+        expires_at_dt = self.get_expires_at(code_data)
+        if expires_at_dt:
+            current_time_for_expiry_check = datetime.datetime.now(expires_at_dt.tzinfo if hasattr(expires_at_dt, 'tzinfo') else None)
+            if expires_at_dt < current_time_for_expiry_check:
+                logger.warning(f"الكود المحلي '{local_code}' منتهي الصلاحية بتاريخ: {expires_at_dt}.")
+                return False, "كود التفعيل منتهي الصلاحية.", expires_at_dt
+
+        if firebase_status == "ACTIVE":
+            logger.info(f"الكود المحلي '{local_code}' صالح وحالته 'ACTIVE' في Firebase.")
+            return True, "الكود صالح.", expires_at_dt
+        logger.warning(f"الكود المحلي '{local_code}' حالته في Firebase هي '{firebase_status}' (وليست ACTIVE). يتطلب إعادة تفعيل.")
+        return False, f"حالة كود التفعيل في قاعدة البيانات: {firebase_status}.", expires_at_dt
+
+    def remove_local_activation(self):
+        try:
+            if os.path.exists(ACTIVATION_STATUS_FILE):
+                os.remove(ACTIVATION_STATUS_FILE)
+                logger.info("تم حذف ملف التفعيل المحلي غير الصالح أو المنتهي.")
+        except Exception as e:
+            logger.error(f"خطأ أثناء حذف ملف التفعيل المحلي: {e}")
+
     def mark_code_as_used(self, code_to_mark, device_info=None):
         """
         يُحدّث حالة كود التفعيل في Firestore إلى 'ACTIVE' ويسجل وقت التفعيل ومعلومات الجهاز.
@@ -182,16 +229,18 @@ class FirebaseService:
             logger.exception(f"حدث خطأ عام أثناء تحديث كود التفعيل '{code_to_mark}' في Firestore: {e}")
             return False
 
-    def get_device_info(self):
+    @staticmethod
+    def get_device_info():
         """
         يحاول الحصول على معلومات متنوعة عن الجهاز.
+        لا يعتمد على تهيئة Firebase، لذلك يمكن تشغيله في خيط خلفي بالتوازي مع التحقق من التفعيل.
         Returns:
             dict: قاموس يحتوي على معلومات الجهاز.
         """
         device_info = {}
         
         # 1. المعرف الفريد للجهاز (UUID مخزن محليًا)
-        local_device_id_file = "device_id.dat"
+        local_device_id_file = DEVICE_ID_FILE
         generated_id = None
         try:
             if os.path.exists(local_device_id_file):
@@ -3,7 +3,7 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QDialog, QFormLayout, QDialogButtonBox,
     QSpinBox, QStyle, QApplication, QDesktopWidget, QTextEdit,
-    QScrollArea, QFrame,QSizePolicy # تمت إضافة QFrame و QSizePolicy
+    QScrollArea, QFrame,QSizePolicy, QComboBox, QCheckBox # تمت إضافة QFrame و QSizePolicy
 )
 from PyQt5.QtCore import Qt, QTimer, QPoint, QEasingCurve, QPropertyAnimation, QRegularExpression
 from PyQt5.QtGui import QIcon, QRegularExpressionValidator, QColor, QPixmap, QFont # تمت إضافة QPixmap و QFont
@@ -253,7 +253,8 @@ class SettingsDialog(QDialog):
         from config import (
             SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
             SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429,
-            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS
+            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, SETTING_HTTP_POOL_SIZE, SETTING_HTTP_TRANSPORT,
+            SETTING_HEDGE_REQUESTS, HTTP_TRANSPORT_HTTP1, HTTP_TRANSPORT_HTTP2, DEFAULT_SETTINGS
         )
 
         self.current_settings = current_settings
@@ -289,14 +290,44 @@ class SettingsDialog(QDialog):
         self.request_timeout_spin.setRange(5, 120) 
         self.request_timeout_spin.setValue(self.current_settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT]))
         self.request_timeout_spin.setSuffix(" ثانية")
-
+        self.request_timeout_spin.setToolTip("المهلة الفعلية لكل مسار تُشتق من زمن استجابته، وهذه القيمة حدها الأقصى.")
+
+        from latency_tracker import ENDPOINT_LATENCIES, CONNECT_KEY
+        max_timeout = self.current_settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT])
+        timeout_lines = []
+        for key, sample_count, p50, p99, derived_timeout in ENDPOINT_LATENCIES.snapshot(max_timeout):
+            name = "الاتصال" if key == CONNECT_KEY else key
+            if p99 is None:
+                timeout_lines.append(f"{name}: {derived_timeout:.0f}ث (عينات غير كافية: {sample_count})")
+            else:
+                timeout_lines.append(f"{name}: {derived_timeout:.1f}ث (p50 {p50:.2f}ث، p99 {p99:.2f}ث، {sample_count} طلب)")
+        self.current_timeouts_label = QLabel("\n".join(timeout_lines) or "لا توجد طلبات بعد: تُستخدم أقصى مهلة.", self)
+        self.current_timeouts_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        self.http_pool_size_spin = QSpinBox(self)
+        self.http_pool_size_spin.setRange(1, 50) 
+        self.http_pool_size_spin.setValue(self.current_settings.get(SETTING_HTTP_POOL_SIZE, DEFAULT_SETTINGS[SETTING_HTTP_POOL_SIZE]))
+        self.http_pool_size_spin.setSuffix(" اتصال")
+
+        self.http_transport_combo = QComboBox(self)
+        self.http_transport_combo.addItem("HTTP/1.1 (requests)", HTTP_TRANSPORT_HTTP1)
+        self.http_transport_combo.addItem("HTTP/2 (httpx - تجريبي)", HTTP_TRANSPORT_HTTP2)
+        current_transport = self.current_settings.get(SETTING_HTTP_TRANSPORT, DEFAULT_SETTINGS[SETTING_HTTP_TRANSPORT])
+        self.http_transport_combo.setCurrentIndex(max(0, self.http_transport_combo.findData(current_transport)))
+
+        self.hedge_requests_check = QCheckBox("إرسال طلب ثانٍ للتحقق والتواريخ إذا تأخر الأول أكثر من المعتاد (5% من الطلبات على الأكثر)", self)
+        self.hedge_requests_check.setChecked(bool(self.current_settings.get(SETTING_HEDGE_REQUESTS, DEFAULT_SETTINGS[SETTING_HEDGE_REQUESTS])))
 
         layout.addRow("أقل تأخير بين الأعضاء:", self.min_delay_spin)
         layout.addRow("أقصى تأخير بين الأعضاء:", self.max_delay_spin)
         layout.addRow("الفاصل الزمني لدورة المراقبة:", self.monitoring_interval_spin)
         layout.addRow("تأخير أولي لخطأ 429 (طلبات كثيرة):", self.backoff_429_spin)
         layout.addRow("تأخير أولي للأخطاء العامة:", self.backoff_general_spin)
-        layout.addRow("مهلة الطلب للواجهة البرمجية (API):", self.request_timeout_spin)
+        layout.addRow("أقصى مهلة للطلب للواجهة البرمجية (API):", self.request_timeout_spin)
+        layout.addRow("المهل الحالية حسب زمن الاستجابة:", self.current_timeouts_label)
+        layout.addRow("حجم مجمع اتصالات HTTP:", self.http_pool_size_spin)
+        layout.addRow("بروتوكول الاتصال بالخادم:", self.http_transport_combo)
+        layout.addRow("الطلبات المتحوَّطة:", self.hedge_requests_check)
 
 
         self.buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel, Qt.Horizontal, self)
@@ -310,7 +341,8 @@ class SettingsDialog(QDialog):
         from config import (
             SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
             SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429,
-            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT
+            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, SETTING_HTTP_POOL_SIZE, SETTING_HTTP_TRANSPORT,
+            SETTING_HEDGE_REQUESTS
         )
         min_val = self.min_delay_spin.value()
         max_val = self.max_delay_spin.value()
@@ -324,7 +356,10 @@ class SettingsDialog(QDialog):
             SETTING_MONITORING_INTERVAL: self.monitoring_interval_spin.value(),
             SETTING_BACKOFF_429: self.backoff_429_spin.value(),
             SETTING_BACKOFF_GENERAL: self.backoff_general_spin.value(),
-            SETTING_REQUEST_TIMEOUT: self.request_timeout_spin.value()
+            SETTING_REQUEST_TIMEOUT: self.request_timeout_spin.value(),
+            SETTING_HTTP_POOL_SIZE: self.http_pool_size_spin.value(),
+            SETTING_HTTP_TRANSPORT: self.http_transport_combo.currentData(),
+            SETTING_HEDGE_REQUESTS: self.hedge_requests_check.isChecked()
         }
 
 class ViewMemberDialog(QDialog):
@@ -0,0 +1,164 @@
+# http2_transport.py
+"""
+ناقل HTTP/2 اختياري (httpx) بنفس الواجهة التي يستخدمها AnemAPIClient من requests.Session
+(get / post / head / headers)، حتى تتشارك الطلبات المتزامنة (فحص الأعضاء، التواريخ) اتصالًا واحدًا.
+يتطلب: pip install httpx[http2]. إذا لم تكن الحزمة متوفرة يعود العميل إلى requests.
+"""
+import logging
+import threading
+
+import requests
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def _to_httpx_timeout(timeout):
+    if isinstance(timeout, (tuple, list)):
+        connect_timeout, read_timeout = timeout
+        return httpx.Timeout(read_timeout, connect=connect_timeout)
+    return httpx.Timeout(timeout)
+
+
+def _map_httpx_error(error):
+    """يحوّل استثناءات httpx إلى ما يقابلها في requests حتى تبقى معالجة _make_request كما هي."""
+    message = str(error) or error.__class__.__name__
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(message)
+    if isinstance(error, (httpx.ReadTimeout, httpx.WriteTimeout)):
+        return requests.exceptions.ReadTimeout(message)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.Timeout(message)
+    if isinstance(error, httpx.ConnectError):
+        if "ssl" in message.lower() or "certificate" in message.lower():
+            return requests.exceptions.SSLError(message)
+        return requests.exceptions.ConnectionError(message)
+    if isinstance(error, (httpx.NetworkError, httpx.RemoteProtocolError)):
+        return requests.exceptions.ConnectionError(message)
+    return requests.exceptions.RequestException(message)
+
+
+class Http2Response:
+    """
+    غلاف صغير حول httpx.Response يوفر ما يستخدمه الكود من requests.Response.
+    stream=True: الجسم لم يُقرأ بعد؛ iter_content يقرؤه على دفعات من الشبكة، و text/content/json تقرؤه كاملًا عند الحاجة.
+    """
+    def __init__(self, response, streamed=False):
+        self._response = response
+        self._streamed = streamed
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    def _read(self):
+        if self._streamed:
+            try:
+                self._response.read()
+            except httpx.HTTPError as e:
+                raise _map_httpx_error(e) from e
+
+    @property
+    def text(self):
+        self._read()
+        return self._response.text
+
+    @property
+    def content(self):
+        self._read()
+        return self._response.content
+
+    def json(self):
+        self._read()
+        return self._response.json()
+
+    def iter_content(self, chunk_size=65536):
+        if not self._streamed:
+            # الجسم مقروء بالكامل مسبقًا؛ نقسمه فقط للحفاظ على نفس الواجهة
+            content = self._response.content
+            for start in range(0, len(content), chunk_size):
+                yield content[start:start + chunk_size]
+            return
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e: # انقطاع أثناء التحميل يُعالج كخطأ requests في _send_request
+            raise _map_httpx_error(e) from e
+
+    def close(self):
+        self._response.close()
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def __bool__(self):
+        # requests.Response يُقيَّم False لرموز الخطأ؛ _make_request يعتمد على ذلك في رسائل السجل
+        return self.status_code < 400
+
+
+class Http2Session:
+    def __init__(self, base_headers=None, max_connections=10, verify=True):
+        # التحقق من شهادة TLS يُحدد مرة واحدة للعميل (httpx لا يدعمه لكل طلب)، ويتبع إعداد جلسة requests
+        self.headers = dict(base_headers or {})
+        self.headers.pop('Connection', None) # غير مسموح في HTTP/2
+        self.verify = verify
+        self._client = httpx.Client(
+            http2=True,
+            verify=verify,
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def _request(self, method, url, params=None, json=None, headers=None, timeout=None, allow_redirects=True, stream=False):
+        request_headers = {k: v for k, v in (headers or {}).items() if k.lower() != 'connection'}
+        try:
+            request = self._client.build_request(
+                method, url, params=params, json=json, headers=request_headers,
+                timeout=_to_httpx_timeout(timeout) if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+            # stream=True: تُعاد الاستجابة بعد الترويسات فقط (مثل requests)، والمستدعي يغلقها بعد القراءة
+            response = self._client.send(request, stream=stream, follow_redirects=allow_redirects)
+        except httpx.HTTPError as e:
+            raise _map_httpx_error(e) from e
+        return Http2Response(response, streamed=stream)
+
+    def get(self, url, params=None, headers=None, timeout=None, verify=None, allow_redirects=True, stream=False):
+        return self._request("GET", url, params=params, headers=headers, timeout=timeout, allow_redirects=allow_redirects, stream=stream)
+
+    def post(self, url, json=None, headers=None, timeout=None, verify=None, allow_redirects=True):
+        return self._request("POST", url, json=json, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+
+    def head(self, url, headers=None, timeout=None, verify=None, allow_redirects=False):
+        return self._request("HEAD", url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+
+    def close(self):
+        self._client.close()
+
+
+def get_shared_http2_session(base_headers, max_connections, verify=True):
+    """
+    يعيد جلسة HTTP/2 مشتركة بين جميع العملاء (مثل config.SESSION)، أو None إذا تعذر إنشاؤها
+    (httpx غير مثبت أو حزمة h2 مفقودة). verify: قيمة SESSION.verify (True أو مسار حزمة شهادات).
+    """
+    global _shared_session
+    if not HTTPX_AVAILABLE:
+        logger.warning("ناقل HTTP/2 مطلوب لكن httpx غير مثبت. سيتم استخدام HTTP/1.1 (requests).")
+        return None
+    with _shared_session_lock:
+        if _shared_session is None:
+            try:
+                _shared_session = Http2Session(base_headers, max_connections, verify)
+                logger.info("تم تفعيل ناقل HTTP/2 (httpx) للواجهة البرمجية.")
+            except ImportError as e:
+                logger.warning(f"تعذر تفعيل HTTP/2 (حزمة h2 مفقودة؟): {e}. سيتم استخدام HTTP/1.1 (requests).")
+                return None
+    return _shared_session
@@ -0,0 +1,73 @@
+# latency_tracker.py
+"""
+زمن استجابة كل مسار في الواجهة البرمجية (آخر عدد محدود من الطلبات) لاشتقاق مهلة الطلب منه
+بدل قيمة ثابتة واحدة: المهلة = النسبة المئوية 99 × معامل، بين حد أدنى وأقصى مهلة في الإعدادات.
+مهلة الاتصال تُشتق من زمن طلبات HEAD (التسخين وفحص الموقع) التي تفتح في الغالب اتصالًا جديدًا.
+الطلب الذي انتهت مهلته يُسجل بقيمة المهلة نفسها، فترتفع النسبة المئوية عندما يبطؤ الخادم.
+"""
+import logging
+import threading
+from collections import deque
+
+from config import (LATENCY_WINDOW_SIZE, LATENCY_MIN_SAMPLES, LATENCY_TIMEOUT_PERCENTILE,
+                    LATENCY_TIMEOUT_FACTOR, MIN_READ_TIMEOUT_SECONDS, MIN_CONNECT_TIMEOUT_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+CONNECT_KEY = "connect" # عينات الاتصال (مشتركة بين كل المسارات: مضيف واحد)
+
+
+class LatencyTracker:
+    def __init__(self, window_size=200, min_samples=20, percentile=0.99, factor=3.0,
+                 min_read_timeout=5, min_connect_timeout=3):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.percentile_value = percentile
+        self.factor = factor
+        self.min_read_timeout = min_read_timeout
+        self.min_connect_timeout = min_connect_timeout
+        self._samples = {} # key -> deque من الأزمنة بالثواني
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window_size)
+            samples.append(seconds)
+
+    def percentile(self, key, q):
+        """النسبة المئوية q (بين 0 و 1) لعينات key، أو None إذا كانت العينات أقل من min_samples."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _derived_timeout(self, key, minimum, maximum):
+        value = self.percentile(key, self.percentile_value)
+        if value is None:
+            return maximum
+        return min(maximum, max(minimum, value * self.factor))
+
+    def timeouts_for(self, endpoint, max_timeout):
+        """(مهلة الاتصال، مهلة القراءة) لهذا المسار؛ max_timeout (الإعداد) قبل توفر عينات كافية."""
+        return (self._derived_timeout(CONNECT_KEY, self.min_connect_timeout, max_timeout),
+                self._derived_timeout(endpoint, self.min_read_timeout, max_timeout))
+
+    def snapshot(self, max_timeout):
+        """لكل مفتاح: (عدد العينات، p50، p99، المهلة المشتقة) لعرضها في نافذة الإعدادات."""
+        with self._lock:
+            keys = sorted(self._samples)
+            counts = {key: len(self._samples[key]) for key in keys}
+        rows = []
+        for key in keys:
+            minimum = self.min_connect_timeout if key == CONNECT_KEY else self.min_read_timeout
+            rows.append((key, counts[key], self.percentile(key, 0.5), self.percentile(key, 0.99),
+                         self._derived_timeout(key, minimum, max_timeout)))
+        return rows
+
+
+ENDPOINT_LATENCIES = LatencyTracker(LATENCY_WINDOW_SIZE, LATENCY_MIN_SAMPLES, LATENCY_TIMEOUT_PERCENTILE,
+                                    LATENCY_TIMEOUT_FACTOR, MIN_READ_TIMEOUT_SECONDS, MIN_CONNECT_TIMEOUT_SECONDS)
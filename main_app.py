@@ -5,35 +5,37 @@ import os
 import logging
 import random
 import time 
-import datetime 
+from collections import deque
+
+_STARTUP_TIME = time.perf_counter() # بداية قياس زمن بدء التشغيل (--profile-startup)
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QTableWidget, QTableWidgetItem,
     QMessageBox, QHeaderView, QStatusBar, QFrame, QAction, QStyle,
-    QMenu, QLineEdit, QComboBox, QAbstractItemView, QDesktopWidget, QDialog
+    QMenu, QLineEdit, QComboBox, QAbstractItemView, QDesktopWidget, QDialog, QFileDialog
 )
-from PyQt5.QtCore import QTimer, Qt, QDateTime, QLocale, QStandardPaths, QUrl
+from PyQt5.QtCore import QTimer, Qt, QDateTime, QLocale, QUrl, QFileSystemWatcher
 from PyQt5.QtGui import QIcon, QColor, QPalette, QDesktopServices, QFontDatabase
 
-from firebase_service import FirebaseService
-from gui_components import ToastNotification, AddMemberDialog, EditMemberDialog, SettingsDialog, ViewMemberDialog, ActivationDialog
 
-from api_client import AnemAPIClient
 from member import Member 
-from threads import FetchInitialInfoThread, MonitoringThread, SingleMemberCheckThread, DownloadAllPdfsThread 
+import activation_lease
+# gui_components و threads و api_client (ومعها requests و firebase_admin) تُستورد عند أول استخدام لتسريع ظهور النافذة
 from config import (
     DATA_FILE, STYLESHEET_FILE, SETTINGS_FILE,
     DEFAULT_SETTINGS, SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
     SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429, SETTING_BACKOFF_GENERAL,
-    SETTING_REQUEST_TIMEOUT, MAX_ERROR_DISPLAY_LENGTH,
-    FIREBASE_SERVICE_ACCOUNT_KEY_FILE, 
-    FIRESTORE_ACTIVATION_CODES_COLLECTION
+    SETTING_REQUEST_TIMEOUT, SETTING_HTTP_POOL_SIZE, SETTING_HTTP_TRANSPORT, SETTING_HEDGE_REQUESTS, MAX_ERROR_DISPLAY_LENGTH, STARTUP_TIME_BUDGET_MS,
+    FIREBASE_SERVICE_ACCOUNT_KEY_FILE, PDF_INDEX_WATCH_FILESYSTEM,
+    MEMBER_IMPORT_FETCH_BATCH_SIZE, MEMBER_IMPORT_FETCH_INTERVAL_MS
 )
 from logger_setup import setup_logging
-from utils import QColorConstants, get_icon_name_for_status 
+from utils import QColorConstants, get_icon_name_for_status, get_status_style, build_status_icon_cache, StartupProfiler, get_member_pdf_dir 
 
 logger = setup_logging()
+startup_profiler = StartupProfiler(_STARTUP_TIME, enabled="--profile-startup" in sys.argv)
+startup_profiler.mark("imports")
 
 def load_custom_fonts():
     font_dir = "fonts" 
@@ -66,16 +68,15 @@ class AnemApp(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self._should_initialize_ui = False 
-        # logger.info("AnemApp __init__: بدء التهيئة الأولية.") # تعليق مخفف
-        self._initialize_and_check_activation() 
-        if not self.activation_successful:
-            logger.critical("AnemApp __init__: فشل تفعيل البرنامج. لن يتم إكمال تهيئة واجهة المستخدم.")
-            return 
-        self._should_initialize_ui = True
-        # logger.info("AnemApp __init__: نجح التفعيل. جاري إكمال تهيئة واجهة المستخدم.") # تعليق مخفف
+        # النافذة تظهر فورًا من البيانات المحلية؛ التحقق من التفعيل وجمع معلومات الجهاز يتمان في الخلفية
+        self.activation_state = "pending" # pending / active / failed
+        self.firebase_service = None
+        self.device_info = None
+        self.activation_check_thread = None
+        self.device_info_thread = None
         
         load_custom_fonts() 
+        startup_profiler.mark("fonts")
         QApplication.setLayoutDirection(Qt.RightToLeft) 
         self.setWindowTitle("برنامج إدارة مواعيد منحة البطالة")
         desktop = QApplication.desktop()
@@ -86,6 +87,7 @@ class AnemApp(QMainWindow):
 
         self.settings = {}
         self.load_app_settings() 
+        startup_profiler.mark("settings")
 
         self.suppress_initial_messages = True 
         self.toast_notifications = [] 
@@ -93,137 +95,119 @@ class AnemApp(QMainWindow):
         self.filtered_members_list = [] 
         self.is_filter_active = False 
         
-        self.api_client = AnemAPIClient(
-            initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
-            initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
-            request_timeout=self.settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT])
-        )
-
-        self.initial_fetch_threads = [] 
-        self.single_check_thread = None 
+        self._api_client = None # يُنشأ عند أول طلب (انظر الخاصية api_client)
+
+        self.member_job_pool = None # يُنشأ عند أول إضافة/تعديل عضو أو فحص فوري
+        self.member_import_thread = None 
+        self.members_export_thread = None 
+        self.pending_initial_fetches = deque() # أعضاء مستوردون بانتظار إرسال جلب معلوماتهم الأولية
+        self.initial_fetch_batch_timer = QTimer(self)
+        self.initial_fetch_batch_timer.timeout.connect(self._submit_initial_fetch_batch)
         self.active_download_all_pdfs_threads = {} 
+        self.bulk_pdf_download_thread = None 
+        self.pdf_index_watcher = None 
+        self.bulk_pdf_download_silent = True 
         self.active_spinner_row_in_view = -1 
         self.spinner_char_idx = 0
         self.spinner_chars = ['◐', '◓', '◑', '◒'] 
         self.row_spinner_timer = QTimer(self) 
         self.row_spinner_timer.timeout.connect(self.update_active_row_spinner_display)
         self.row_spinner_timer_interval = 150 
+        self.status_icons = build_status_icon_cache(self.style()) # أيقونات الحالات تُبنى مرة واحدة فقط
 
-        self.monitoring_thread = MonitoringThread(self.members_list, self.settings.copy())
-        self.monitoring_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-        self.monitoring_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-        self.monitoring_thread.global_log_signal.connect(self.update_status_bar_message) 
-        self.monitoring_thread.member_being_processed_signal.connect(self.handle_member_processing_signal)
-        self.monitoring_thread.countdown_update_signal.connect(self.update_countdown_timer_display) 
+        self.monitoring_thread = None # يُنشأ عند أول بدء للمراقبة
 
         self.init_ui() 
+        startup_profiler.mark("ui_build")
         self.load_stylesheet() 
+        startup_profiler.mark("stylesheet")
         self.load_members_data() 
         QTimer.singleShot(0, self.apply_app_settings)
+        QTimer.singleShot(0, self._start_background_activation_check)
         logger.info("AnemApp __init__: اكتملت التهيئة.") # رسالة أخف
 
-    def _initialize_and_check_activation(self):
-        # logger.info("_initialize_and_check_activation: بدء تهيئة Firebase والتحقق من التفعيل.") # تعليق مخفف
-        self.firebase_service = FirebaseService()
-        self.activation_successful = self._perform_activation_check_logic()
-        # logger.info(f"_initialize_and_check_activation: نتيجة التحقق من التفعيل: {self.activation_successful}") # تعليق مخفف
-
-    def _perform_activation_check_logic(self):
-        logger.info("_perform_activation_check_logic: بدء التحقق من تفعيل البرنامج...")
-        is_locally_activated, local_code = self.firebase_service.check_local_activation()
-        
-        # جمع معلومات الجهاز مرة واحدة في البداية
-        current_device_info = self.firebase_service.get_device_info()
-        logger.info(f"معلومات الجهاز المجمعة عند بدء التشغيل: {current_device_info}")
-
-
-        if is_locally_activated and local_code:
-            logger.info(f"_perform_activation_check_logic: البرنامج مفعل محليًا بالكود: {local_code}. يتم التحقق من صلاحية الكود عبر الإنترنت...")
-            
-            if not self.firebase_service.is_initialized():
-                logger.error("_perform_activation_check_logic: خدمة Firebase غير مهيأة عند التحقق من الكود المحلي.")
-                QMessageBox.critical(None, "خطأ في Firebase", "لا يمكن الاتصال بخدمة Firebase للتحقق من التفعيل المحلي. يرجى التحقق من اتصالك بالإنترنت والمحاولة مرة أخرى.")
-                return False
+    def _start_background_activation_check(self):
+        # activation_threads وحدة خفيفة: threads تجر api_client و requests إلى خيط الواجهة قبل أول رسم
+        from activation_threads import ActivationCheckThread, DeviceInfoThread
+        self._activation_check_started_at = time.perf_counter()
+        self.start_button.setEnabled(False)
+        self.update_status_bar_message("جاري التحقق من تفعيل البرنامج...", is_general_message=True)
+        self.device_info_thread = DeviceInfoThread(self)
+        self.device_info_thread.device_info_ready_signal.connect(self._on_device_info_ready)
+        self.device_info_thread.start()
+        self.activation_check_thread = ActivationCheckThread(self)
+        self.activation_check_thread.activation_checked_signal.connect(self._on_activation_checked)
+        self.activation_check_thread.start()
+        startup_profiler.record("activation_start (GUI)", time.perf_counter() - self._activation_check_started_at)
+
+    def _on_device_info_ready(self, device_info):
+        self.device_info = device_info
+
+    def _get_device_info_blocking(self):
+        # معلومات الجهاز مطلوبة فقط عند تسجيل كود جديد؛ ننتظر الخيط إن لم ينتهِ بعد
+        if self.device_info is None and self.device_info_thread is not None:
+            self.device_info_thread.wait()
+            self.device_info = self.device_info_thread.device_info
+        return self.device_info or {}
+
+    def _on_activation_checked(self, result, local_code, message):
+        self.firebase_service = self.activation_check_thread.firebase_service
+        if startup_profiler.enabled and self.activation_state == "pending":
+            print(f"  activation (background)      {(time.perf_counter() - self._activation_check_started_at) * 1000:9.1f} ms -> {result}")
+        if result == "active":
+            logger.info(f"_on_activation_checked: البرنامج مفعل بالكود: {local_code}")
+            self._set_activation_state("active")
+            return
 
-            try:
-                code_ref = self.firebase_service.db.collection(FIRESTORE_ACTIVATION_CODES_COLLECTION).document(local_code.strip())
-                code_doc = code_ref.get()
-
-                if code_doc.exists:
-                    code_data = code_doc.to_dict()
-                    firebase_status = code_data.get("status", "").upper()
-                    # firebase_device_id = code_data.get("activatedByDeviceID") # يمكن استخدامه للمقارنة إذا أردت
-                    # local_generated_device_id = current_device_info.get("generated_device_id")
-
-                    expires_at_timestamp = code_data.get("expiresAt")
-                    if expires_at_timestamp:
-                        if isinstance(expires_at_timestamp, datetime.datetime):
-                            expires_at_dt = expires_at_timestamp
-                        else: 
-                            expires_at_dt = expires_at_timestamp.to_datetime()
-                        
-                        current_time_for_expiry_check = datetime.datetime.now(expires_at_dt.tzinfo if hasattr(expires_at_dt, 'tzinfo') else None)
-                        if expires_at_dt < current_time_for_expiry_check:
-                            logger.warning(f"_perform_activation_check_logic: الكود المحلي '{local_code}' منتهي الصلاحية بتاريخ: {expires_at_dt}.")
-                            try:
-                                from config import ACTIVATION_STATUS_FILE as ASF_PATH
-                                if os.path.exists(ASF_PATH): os.remove(ASF_PATH)
-                                logger.info("_perform_activation_check_logic: تم حذف ملف التفعيل المحلي المنتهي الصلاحية.")
-                            except Exception as e_remove_expired:
-                                logger.error(f"_perform_activation_check_logic: خطأ أثناء حذف ملف التفعيل المحلي المنتهي الصلاحية: {e_remove_expired}")
-                            is_locally_activated = False
-                            local_code = None
-
-                    if is_locally_activated and firebase_status == "ACTIVE":
-                        # إذا كنت تريد تحديث معلومات الجهاز في Firebase عند كل تشغيل ناجح للتطبيق المفعل:
-                        # self.firebase_service.mark_code_as_used(local_code, current_device_info) # هذا سيسجل lastUsedAt ومعلومات الجهاز المحدثة
-                        logger.info(f"_perform_activation_check_logic: الكود المحلي '{local_code}' صالح وحالته 'ACTIVE' في Firebase.")
-                        return True 
-                    elif is_locally_activated: 
-                        logger.warning(f"_perform_activation_check_logic: الكود المحلي '{local_code}' حالته في Firebase هي '{firebase_status}' (وليست ACTIVE). يتطلب إعادة تفعيل.")
-                        is_locally_activated = False 
-                        local_code = None
-                else: 
-                    logger.warning(f"_perform_activation_check_logic: الكود المحلي '{local_code}' غير موجود في Firebase. يتطلب إعادة تفعيل.")
-                    is_locally_activated = False
-                    local_code = None
-
-            except Exception as e_fb_check:
-                logger.exception(f"_perform_activation_check_logic: خطأ أثناء التحقق من الكود المحلي '{local_code}' في Firebase: {e_fb_check}")
-                QMessageBox.warning(None, "خطأ في التحقق", f"حدث خطأ أثناء التحقق من التفعيل المحلي عبر الإنترنت: {e_fb_check}. يرجى المحاولة مرة أخرى.")
-                is_locally_activated = False
-                local_code = None
-            
-            if not is_locally_activated: 
-                try:
-                    from config import ACTIVATION_STATUS_FILE as ASF_PATH 
-                    if os.path.exists(ASF_PATH):
-                        os.remove(ASF_PATH)
-                    logger.info("_perform_activation_check_logic: تم حذف ملف التفعيل المحلي غير الصالح أو المنتهي.")
-                except Exception as e_remove:
-                    logger.error(f"_perform_activation_check_logic: خطأ أثناء حذف ملف التفعيل المحلي: {e_remove}")
-
-        logger.info("_perform_activation_check_logic: البرنامج غير مفعل محليًا أو الكود المحلي لم يعد صالحًا. يتطلب التفعيل عبر الإنترنت.")
-        if not self.firebase_service.is_initialized():
-            logger.critical(f"_perform_activation_check_logic: خدمة Firebase غير مهيأة. تأكد من وجود ملف '{FIREBASE_SERVICE_ACCOUNT_KEY_FILE}' وأنه صالح.")
-            return False
+        if result == "firebase_unavailable":
+            logger.critical(f"_on_activation_checked: خدمة Firebase غير مهيأة. تأكد من وجود ملف '{FIREBASE_SERVICE_ACCOUNT_KEY_FILE}' وأنه صالح.")
+            QMessageBox.critical(self, "خطأ فادح في Firebase",
+                                 message or f"لا يمكن تهيئة خدمة Firebase. الرجاء التأكد من وجود ملف '{FIREBASE_SERVICE_ACCOUNT_KEY_FILE}' وأنه صالح.\nسيتم إغلاق البرنامج.",
+                                 QMessageBox.Ok)
+            self._set_activation_state("failed")
+            return
 
+        if result == "revoked":
+            # الإيجار المحلي كان صالحًا لكن Firestore رفض الكود: نوقف المراقبة ونطلب التفعيل من جديد
+            logger.warning(f"_on_activation_checked: تم إلغاء صلاحية كود التفعيل: {message}")
+            self.activation_state = "pending"
+            self.start_button.setEnabled(False)
+            if self._is_monitoring_running():
+                self.stop_monitoring()
+                self.start_button.setEnabled(False)
+
+        if message:
+            QMessageBox.warning(self, "التفعيل مطلوب", message)
+        self._set_activation_state("active" if self._run_activation_dialog_loop() else "failed")
+
+    def _set_activation_state(self, state):
+        self.activation_state = state
+        if state == "active":
+            self.start_button.setEnabled(not self._is_monitoring_running())
+            self.update_status_bar_message("تم التحقق من التفعيل. البرنامج جاهز.", is_general_message=True)
+        elif state == "failed":
+            logger.critical("فشل تفعيل البرنامج. سيتم إغلاق التطبيق.")
+            self.close()
+
+    def _run_activation_dialog_loop(self):
+        from gui_components import ActivationDialog
+        logger.info("_run_activation_dialog_loop: البرنامج غير مفعل محليًا أو الكود المحلي لم يعد صالحًا. يتطلب التفعيل عبر الإنترنت.")
         while True: 
-            activation_dialog = ActivationDialog(None) 
+            activation_dialog = ActivationDialog(self) 
             screen_geometry = QApplication.desktop().screenGeometry()
             x_pos = (screen_geometry.width() - activation_dialog.width()) // 2
             y_pos = (screen_geometry.height() - activation_dialog.height()) // 2
             activation_dialog.move(x_pos, y_pos)
             
-            # logger.info("_perform_activation_check_logic: قبل استدعاء activation_dialog.exec_()") # تعليق مخفف
+            # logger.info("_run_activation_dialog_loop: قبل استدعاء activation_dialog.exec_()") # تعليق مخفف
             result = activation_dialog.exec_() 
-            # logger.info(f"_perform_activation_check_logic: بعد استدعاء activation_dialog.exec_(). النتيجة: {result} (Accepted={QDialog.Accepted}, Rejected={QDialog.Rejected})") # تعليق مخفف
+            # logger.info(f"_run_activation_dialog_loop: بعد استدعاء activation_dialog.exec_(). النتيجة: {result} (Accepted={QDialog.Accepted}, Rejected={QDialog.Rejected})") # تعليق مخفف
 
             if result == QDialog.Accepted: 
                 entered_code = activation_dialog.get_activation_code()
-                # logger.info(f"_perform_activation_check_logic: المستخدم ضغط 'تفعيل'. الكود المدخل: '{entered_code}'") # تعليق مخفف
+                # logger.info(f"_run_activation_dialog_loop: المستخدم ضغط 'تفعيل'. الكود المدخل: '{entered_code}'") # تعليق مخفف
                 if not entered_code:
-                    logger.warning("_perform_activation_check_logic: لم يتم إدخال كود تفعيل.")
+                    logger.warning("_run_activation_dialog_loop: لم يتم إدخال كود تفعيل.")
                     activation_dialog.show_status_message("الرجاء إدخال كود التفعيل.", is_error=True)
                     continue 
 
@@ -232,13 +216,13 @@ class AnemApp(QMainWindow):
                 activation_dialog.activate_button.setEnabled(False)
                 activation_dialog.activation_code_input.setEnabled(False)
                 QApplication.processEvents() 
-                # logger.debug(f"_perform_activation_check_logic: جاري استدعاء firebase_service.verify_activation_code('{entered_code}')") # تعليق مخفف
+                # logger.debug(f"_run_activation_dialog_loop: جاري استدعاء firebase_service.verify_activation_code('{entered_code}')") # تعليق مخفف
 
                 try:
                     is_valid_for_new_use, message, code_data_from_verify = self.firebase_service.verify_activation_code(entered_code)
-                    # logger.info(f"_perform_activation_check_logic: نتيجة verify_activation_code: is_valid_for_new_use={is_valid_for_new_use}, message='{message}'") # تعليق مخفف
+                    # logger.info(f"_run_activation_dialog_loop: نتيجة verify_activation_code: is_valid_for_new_use={is_valid_for_new_use}, message='{message}'") # تعليق مخفف
                 except Exception as e_verify:
-                    logger.exception(f"_perform_activation_check_logic: حدث خطأ استثنائي أثناء verify_activation_code: {e_verify}")
+                    logger.exception(f"_run_activation_dialog_loop: حدث خطأ استثنائي أثناء verify_activation_code: {e_verify}")
                     is_valid_for_new_use = False
                     message = "حدث خطأ غير متوقع أثناء التحقق من الكود. يرجى المحاولة مرة أخرى."
                 finally:
@@ -247,38 +231,40 @@ class AnemApp(QMainWindow):
                     QApplication.processEvents()
 
                 if is_valid_for_new_use: 
-                    logger.info(f"_perform_activation_check_logic: كود صالح للاستخدام. جاري تحديث Firebase. معلومات الجهاز: {current_device_info}")
+                    current_device_info = self._get_device_info_blocking()
+                    logger.info(f"_run_activation_dialog_loop: كود صالح للاستخدام. جاري تحديث Firebase. معلومات الجهاز: {current_device_info}")
                     mark_success = False
                     try:
                         # تمرير معلومات الجهاز هنا
                         mark_success = self.firebase_service.mark_code_as_used(entered_code, current_device_info)
                     except Exception as e_mark:
-                        logger.exception(f"_perform_activation_check_logic: حدث خطأ استثنائي أثناء mark_code_as_used: {e_mark}")
+                        logger.exception(f"_run_activation_dialog_loop: حدث خطأ استثنائي أثناء mark_code_as_used: {e_mark}")
                     
                     if mark_success:
                         # تمرير معلومات الجهاز هنا أيضًا للحفظ المحلي
                         self.firebase_service.save_local_activation(entered_code, current_device_info)
-                        logger.info(f"_perform_activation_check_logic: تم تفعيل البرنامج بنجاح بالكود: {entered_code}")
+                        activation_lease.save_lease(entered_code, self.firebase_service.get_expires_at(code_data_from_verify))
+                        logger.info(f"_run_activation_dialog_loop: تم تفعيل البرنامج بنجاح بالكود: {entered_code}")
                         activation_dialog.show_status_message("تم التفعيل بنجاح!", is_error=False)
-                        QMessageBox.information(None, "نجاح التفعيل", "تم تفعيل البرنامج بنجاح!")
+                        QMessageBox.information(self, "نجاح التفعيل", "تم تفعيل البرنامج بنجاح!")
                         activation_dialog.accept() 
                         return True 
                     else:
-                        logger.error(f"_perform_activation_check_logic: فشل تحديث حالة الكود '{entered_code}' في Firebase.")
+                        logger.error(f"_run_activation_dialog_loop: فشل تحديث حالة الكود '{entered_code}' في Firebase.")
                         activation_dialog.show_status_message("خطأ في الخادم عند تحديث الكود.", is_error=True)
                         continue 
                 else: 
-                    logger.warning(f"_perform_activation_check_logic: فشل التحقق من الكود '{entered_code}': {message}")
+                    logger.warning(f"_run_activation_dialog_loop: فشل التحقق من الكود '{entered_code}': {message}")
                     activation_dialog.show_status_message(message, is_error=True)
                     continue 
             
             elif result == QDialog.Rejected: 
-                logger.warning("_perform_activation_check_logic: عملية التفعيل ألغيت من قبل المستخدم.")
-                QMessageBox.information(None, "التفعيل مطلوب", "البرنامج يتطلب تفعيلًا للاستخدام. سيتم إغلاق التطبيق الآن.")
+                logger.warning("_run_activation_dialog_loop: عملية التفعيل ألغيت من قبل المستخدم.")
+                QMessageBox.information(self, "التفعيل مطلوب", "البرنامج يتطلب تفعيلًا للاستخدام. سيتم إغلاق التطبيق الآن.")
                 return False
             else: 
-                logger.error(f"_perform_activation_check_logic: نتيجة غير متوقعة من activation_dialog.exec_(): {result}. سيتم اعتبار العملية ملغاة.")
-                QMessageBox.information(None, "التفعيل مطلوب", "تم إلغاء عملية التفعيل. سيتم إغلاق التطبيق الآن.")
+                logger.error(f"_run_activation_dialog_loop: نتيجة غير متوقعة من activation_dialog.exec_(): {result}. سيتم اعتبار العملية ملغاة.")
+                QMessageBox.information(self, "التفعيل مطلوب", "تم إلغاء عملية التفعيل. سيتم إغلاق التطبيق الآن.")
                 return False
     
     def init_ui(self):
@@ -292,6 +278,12 @@ class AnemApp(QMainWindow):
         settings_action = QAction(QIcon.fromTheme("preferences-system"), "الإعدادات...", self)
         settings_action.triggered.connect(self.open_settings_dialog)
         file_menu.addAction(settings_action)
+        import_members_action = QAction(QIcon.fromTheme("document-open"), "استيراد أعضاء من ملف (CSV/Excel)...", self)
+        import_members_action.triggered.connect(self.import_members_from_file)
+        file_menu.addAction(import_members_action)
+        export_members_action = QAction(QIcon.fromTheme("document-save-as"), "تصدير الأعضاء وحالاتهم (CSV/Excel)...", self)
+        export_members_action.triggered.connect(self.export_members_to_file)
+        file_menu.addAction(export_members_action)
         
         tools_menu = menubar.addMenu("أدوات") 
         self.toggle_search_filter_action = QAction("إظهار/إخفاء البحث والفلترة", self)
@@ -306,6 +298,11 @@ class AnemApp(QMainWindow):
         self.toggle_details_action.triggered.connect(self.toggle_column_visibility)
         tools_menu.addAction(self.toggle_details_action)
 
+        tools_menu.addSeparator()
+        download_missing_pdfs_action = QAction(QIcon.fromTheme("document-save"), "تحميل جميع الشهادات الناقصة", self)
+        download_missing_pdfs_action.triggered.connect(lambda: self.start_bulk_pdf_download(silent=False))
+        tools_menu.addAction(download_missing_pdfs_action)
+
         file_menu.addSeparator()
         exit_action = QAction(QIcon.fromTheme("application-exit"), "خروج", self)
         exit_action.triggered.connect(self.close)
@@ -574,6 +571,7 @@ class AnemApp(QMainWindow):
         menu.exec_(self.table.viewport().mapToGlobal(position))
 
     def view_member_info(self, original_member_index): 
+        from gui_components import ViewMemberDialog
         if 0 <= original_member_index < len(self.members_list):
             member = self.members_list[original_member_index]
             member_display_name = self._get_member_display_name_with_index(member, original_member_index)
@@ -594,26 +592,17 @@ class AnemApp(QMainWindow):
                  self._show_toast(f"العضو '{member_display_name}' قيد المعالجة حاليًا. يرجى الانتظار.", type="warning")
                  return
 
-            if self.single_check_thread and self.single_check_thread.isRunning():
-                self._show_toast("فحص آخر قيد التنفيذ بالفعل. يرجى الانتظار.", type="warning")
-                return
-
             logger.info(f"طلب فحص فوري للعضو: {member_display_name}")
             self.update_status_bar_message(f"بدء الفحص الفوري للعضو: {member_display_name}...", is_general_message=False) 
             self._show_toast(f"بدء الفحص الفوري للعضو: {member_display_name}", type="info")
             
-            self.single_check_thread = SingleMemberCheckThread(member, original_member_index, self.api_client, self.settings.copy())
-            self.single_check_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-            self.single_check_thread.new_data_fetched_signal.connect(self.update_member_name_in_table) 
-            self.single_check_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-            self.single_check_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
-            self.single_check_thread.global_log_signal.connect(self.update_status_bar_message) 
-            self.single_check_thread.start()
+            self._ensure_member_job_pool().submit_check(member, self.api_client)
         else:
             logger.warning(f"check_member_now: فهرس خاطئ {original_member_index}")
             self._show_toast("خطأ في بدء الفحص الفوري (فهرس غير صالح).", type="error") 
 
     def download_all_member_pdfs(self, original_member_index): 
+        from threads import DownloadAllPdfsThread
         if not (0 <= original_member_index < len(self.members_list)):
             self._show_toast("فهرس عضو غير صالح لتحميل الشهادات.", type="error")
             return
@@ -647,9 +636,67 @@ class AnemApp(QMainWindow):
         self.active_download_all_pdfs_threads[original_member_index] = all_pdfs_thread
         all_pdfs_thread.start()
 
+    def start_bulk_pdf_download(self, members=None, silent=False):
+        # members=None: فحص جميع الأعضاء بحثًا عن شهادات ناقصة أو تالفة
+        from threads import BulkPdfDownloadThread
+        if self.bulk_pdf_download_thread is not None and self.bulk_pdf_download_thread.isRunning():
+            if not silent:
+                self._show_toast("تحميل الشهادات الناقصة قيد التنفيذ بالفعل.", type="warning")
+            return # طلبات المراقبة المؤجلة تُعاد في الدورة التالية
+
+        self.bulk_pdf_download_silent = silent
+        self.bulk_pdf_download_thread = BulkPdfDownloadThread(self.members_list, self.api_client, members)
+        self.bulk_pdf_download_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
+        self.bulk_pdf_download_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
+        self.bulk_pdf_download_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
+        self.bulk_pdf_download_thread.progress_signal.connect(self.handle_bulk_pdf_download_progress)
+        self.bulk_pdf_download_thread.bulk_download_finished_signal.connect(self.handle_bulk_pdf_download_finished)
+        self.bulk_pdf_download_thread.global_log_signal.connect(self.update_status_bar_message)
+        self.bulk_pdf_download_thread.start()
+
+    def handle_bulk_pdf_download_progress(self, done_count, total_count, failed_count):
+        progress_msg = f"تحميل الشهادات الناقصة: {done_count}/{total_count}"
+        if failed_count:
+            progress_msg += f" (فشل {failed_count})"
+        self.update_status_bar_message(progress_msg, is_general_message=True)
+
+    def handle_bulk_pdf_download_finished(self, total_count, succeeded_count, failed_count):
+        self._ensure_pdf_index_watcher()
+        if total_count:
+            self.save_members_data()
+            summary_msg = f"اكتمل تحميل الشهادات الناقصة: نجح {succeeded_count}، فشل {failed_count} من {total_count} عضو."
+            self.update_status_bar_message(summary_msg, is_general_message=True)
+            if not self.bulk_pdf_download_silent:
+                self._show_toast(summary_msg, type="success" if not failed_count else "warning", duration=6000)
+        elif not self.bulk_pdf_download_silent:
+            self._show_toast("لا توجد شهادات ناقصة لتحميلها.", type="info")
+
+    def _ensure_pdf_index_watcher(self):
+        # يُضبط بعد أن يبني خيط عامل فهرس الملفات، حتى لا يُمسح مجلد الشهادات في خيط الواجهة
+        if not PDF_INDEX_WATCH_FILESYSTEM:
+            return
+        from pdf_store import get_pdf_store
+        file_index = get_pdf_store().file_index
+        if not file_index.is_built:
+            return
+        if self.pdf_index_watcher is None:
+            self.pdf_index_watcher = QFileSystemWatcher(self)
+            self.pdf_index_watcher.directoryChanged.connect(self._on_pdf_directory_changed)
+        already_watched = set(self.pdf_index_watcher.directories())
+        new_dirs = [d for d in file_index.watched_dirs() if d not in already_watched]
+        if new_dirs:
+            self.pdf_index_watcher.addPaths(new_dirs)
+
+    def _on_pdf_directory_changed(self, dir_path):
+        from pdf_store import get_pdf_store
+        new_dirs = get_pdf_store().file_index.refresh_dir(dir_path)
+        if new_dirs:
+            self.pdf_index_watcher.addPaths(new_dirs)
+
     def _clear_active_download_thread(self, original_member_index): 
         if original_member_index in self.active_download_all_pdfs_threads:
             del self.active_download_all_pdfs_threads[original_member_index]
+        self._ensure_pdf_index_watcher()
         self.handle_member_processing_signal(original_member_index, False)
         if 0 <= original_member_index < len(self.members_list):
             member = self.members_list[original_member_index]
@@ -697,6 +744,7 @@ class AnemApp(QMainWindow):
         
         if honneur_path: member.pdf_honneur_path = honneur_path 
         if rdv_path: member.pdf_rdv_path = rdv_path       
+        previous_status = member.status
         
         if all_success:
             if member.status != "مستفيد حاليًا من المنحة":
@@ -716,14 +764,7 @@ class AnemApp(QMainWindow):
             elif rdv_path: folder_to_open = os.path.dirname(rdv_path)
             
             if not folder_to_open and member.pre_inscription_id: 
-                documents_location = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
-                base_app_dir_name = "ملفات_المنحة_البرنامج"
-                member_name_for_folder_path = member.get_full_name_ar()
-                if not member_name_for_folder_path or member_name_for_folder_path.isspace(): 
-                    member_name_for_folder_path = member.nin 
-                safe_folder_name_part = "".join(c for c in member_name_for_folder_path if c.isalnum() or c in (' ', '_', '-')).rstrip().replace(" ", "_")
-                if not safe_folder_name_part: safe_folder_name_part = member.nin 
-                folder_to_open = os.path.join(documents_location, base_app_dir_name, safe_folder_name_part)
+                folder_to_open = get_member_pdf_dir(member)
 
             if folder_to_open and os.path.exists(folder_to_open):
                 reply = QMessageBox.question(self, 'فتح المجلد', f"تم حفظ الملفات بنجاح في المجلد:\n{folder_to_open}\n\nهل تريد فتح هذا المجلد؟",
@@ -746,6 +787,8 @@ class AnemApp(QMainWindow):
             self._show_toast(final_toast_msg, type="error", duration=7000)
             self.update_status_bar_message(f"فشل تحميل بعض شهادات العضو {member_name_display}.", is_general_message=True) 
 
+        from status_history import STATUS_HISTORY
+        STATUS_HISTORY.record(member, previous_status, "pdf_download")
         self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
         self.save_members_data() 
 
@@ -764,6 +807,7 @@ class AnemApp(QMainWindow):
             return
         
         removed_member_info = self.members_list.pop(original_member_index)
+        self._cancel_member_jobs(removed_member_info)
         
         if self.is_filter_active:
             self.apply_filter_and_search() 
@@ -810,6 +854,7 @@ class AnemApp(QMainWindow):
             self._show_toast(f"فشل حفظ الإعدادات: {e}", type="error")
 
     def open_settings_dialog(self):
+        from gui_components import SettingsDialog
         dialog = SettingsDialog(self.settings.copy(), self)
         if dialog.exec_() == SettingsDialog.Accepted:
             new_settings = dialog.get_settings()
@@ -820,20 +865,45 @@ class AnemApp(QMainWindow):
             logger.info("تم تحديث إعدادات التطبيق.")
             self.update_status_bar_message("تم تحديث الإعدادات.", is_general_message=True)
 
+    @property
+    def api_client(self):
+        if self._api_client is None:
+            from api_client import AnemAPIClient
+            self._api_client = AnemAPIClient(
+                initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
+                initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
+                request_timeout=self.settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT]),
+                pool_size=self.settings.get(SETTING_HTTP_POOL_SIZE, DEFAULT_SETTINGS[SETTING_HTTP_POOL_SIZE]),
+                transport=self.settings.get(SETTING_HTTP_TRANSPORT, DEFAULT_SETTINGS[SETTING_HTTP_TRANSPORT]),
+                hedge_requests=self.settings.get(SETTING_HEDGE_REQUESTS, DEFAULT_SETTINGS[SETTING_HEDGE_REQUESTS])
+            )
+        return self._api_client
+
+    def _ensure_monitoring_thread(self):
+        if self.monitoring_thread is None:
+            from threads import MonitoringThread
+            self.monitoring_thread = MonitoringThread(self.members_list, self.settings.copy())
+            self.monitoring_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
+            self.monitoring_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
+            self.monitoring_thread.global_log_signal.connect(self.update_status_bar_message) 
+            self.monitoring_thread.member_being_processed_signal.connect(self.handle_member_processing_signal)
+            self.monitoring_thread.countdown_update_signal.connect(self.update_countdown_timer_display) 
+            self.monitoring_thread.pdf_downloads_requested_signal.connect(lambda members: self.start_bulk_pdf_download(members, silent=True))
+        return self.monitoring_thread
+
+    def _is_monitoring_running(self):
+        return self.monitoring_thread is not None and self.monitoring_thread.isRunning()
+
     def apply_app_settings(self):
-        self.api_client = AnemAPIClient(
-            initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
-            initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
-            request_timeout=self.settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT])
-        )
+        self._api_client = None # سيُعاد إنشاؤه بالإعدادات الجديدة عند أول استخدام
         # logger.info("تم تحديث AnemAPIClient الرئيسي بالإعدادات الجديدة.") # تعليق مخفف
 
-        if self.monitoring_thread.isRunning():
+        if self._is_monitoring_running():
             # logger.info("المراقبة جارية، سيتم تحديث إعدادات خيط المراقبة.") # تعليق مخفف
             self.monitoring_thread.update_thread_settings(self.settings.copy())
             monitoring_interval_minutes = self.settings.get(SETTING_MONITORING_INTERVAL, DEFAULT_SETTINGS[SETTING_MONITORING_INTERVAL])
             self.update_status_bar_message(f"المراقبة جارية (الدورة كل {monitoring_interval_minutes} دقيقة)...", is_general_message=False)
-        else:
+        elif self.monitoring_thread is not None:
             self.monitoring_thread.settings = self.settings.copy() 
             self.monitoring_thread._apply_settings() 
 
@@ -847,6 +917,7 @@ class AnemApp(QMainWindow):
         return f"{name_part} (رقم {original_index + 1})"
 
     def _show_toast(self, message, type="info", duration=4000, member_obj=None, original_idx_if_member=None):
+        from gui_components import ToastNotification
         max_toast_len = 150 
         display_message = message
         
@@ -871,6 +942,13 @@ class AnemApp(QMainWindow):
         toast.showMessage(display_message, type, duration, parent_window=self)
         toast.timer.timeout.connect(lambda t=toast: self._remove_toast_reference(t))
 
+    def _get_status_icon(self, icon_name_str):
+        icon = self.status_icons.get(icon_name_str)
+        if icon is None: # اسم غير معروف مسبقًا (نادر): يُبنى مرة واحدة ثم يُخزن
+            icon = self.style().standardIcon(getattr(QStyle, icon_name_str, QStyle.SP_CustomBase))
+            self.status_icons[icon_name_str] = icon
+        return icon
+
     def _remove_toast_reference(self, toast_instance):
         if toast_instance in self.toast_notifications:
             self.toast_notifications.remove(toast_instance)
@@ -924,9 +1002,7 @@ class AnemApp(QMainWindow):
         if not member.is_processing: 
             is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(original_member_index) and \
                                        self.active_download_all_pdfs_threads[original_member_index].isRunning()
-            is_still_single_checking = self.single_check_thread and \
-                                       self.single_check_thread.isRunning() and \
-                                       self.single_check_thread.index == original_member_index
+            is_still_single_checking = self.member_job_pool is not None and self.member_job_pool.has_active_job(member)
             
             if not is_still_pdf_downloading and not is_still_single_checking:
                 self.row_spinner_timer.stop()
@@ -997,9 +1073,7 @@ class AnemApp(QMainWindow):
             # logger.debug(f"HMP Signal: Processing FINISHED for member {member_display_name} at table row {row_in_table_to_update}") # تعليق مخفف
             is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(original_member_index) and \
                                        self.active_download_all_pdfs_threads[original_member_index].isRunning()
-            is_still_single_checking = self.single_check_thread and \
-                                       self.single_check_thread.isRunning() and \
-                                       self.single_check_thread.index == original_member_index
+            is_still_single_checking = self.member_job_pool is not None and self.member_job_pool.has_active_job(member)
             
             if not is_still_pdf_downloading and not is_still_single_checking:
                 if self.active_spinner_row_in_view == row_in_table_to_update: 
@@ -1038,6 +1112,9 @@ class AnemApp(QMainWindow):
         alternate_bg_color = QColor(self.table.palette().color(QPalette.AlternateBase)) if self.table.alternatingRowColors() else default_bg_color
         processing_bg_color = QColorConstants.PROCESSING_ROW_DARK_THEME 
         selection_bg_color_from_qss = QColor("#00A2E8") 
+        specific_color = get_status_style(member.status).color 
+        row_bg_color = alternate_bg_color if (self.table.alternatingRowColors() and row_index_in_table % 2 != 0) else default_bg_color
+        text_color = self.table.palette().color(QPalette.Text)
 
         for col in range(self.table.columnCount()):
             item = self.table.item(row_index_in_table, col)
@@ -1053,40 +1130,170 @@ class AnemApp(QMainWindow):
                     if item.foreground().color() != Qt.white: 
                          item.setForeground(Qt.white)
                 else: 
-                    status_text_for_color = member.status
-                    specific_color = None
-                    if status_text_for_color == "مستفيد حاليًا من المنحة": specific_color = QColorConstants.BENEFITING_GREEN_DARK_THEME
-                    elif status_text_for_color == "بيانات الإدخال خاطئة": specific_color = QColorConstants.PINK_DARK_THEME
-                    elif status_text_for_color == "لديه موعد مسبق": specific_color = QColorConstants.LIGHT_BLUE_DARK_THEME
-                    elif status_text_for_color == "غير مؤهل للحجز": specific_color = QColorConstants.ORANGE_RED_DARK_THEME
-                    elif status_text_for_color == "مكتمل": specific_color = QColorConstants.LIGHT_GREEN_DARK_THEME
-                    elif "فشل" in status_text_for_color or "غير مؤهل" in status_text_for_color or "خطأ" in status_text_for_color:
-                        specific_color = QColorConstants.LIGHT_PINK_DARK_THEME
-                    elif "يتطلب تسجيل مسبق" in status_text_for_color: specific_color = QColorConstants.LIGHT_YELLOW_DARK_THEME
-                    
                     if specific_color:
                         item.setBackground(specific_color)
                     else:
-                        if self.table.alternatingRowColors() and row_index_in_table % 2 != 0 :
-                            item.setBackground(alternate_bg_color)
-                        else:
-                            item.setBackground(default_bg_color)
-                    item.setForeground(self.table.palette().color(QPalette.Text))
+                        item.setBackground(row_bg_color)
+                    item.setForeground(text_color)
+
+
+    def _ensure_member_job_pool(self):
+        if self.member_job_pool is None:
+            from threads import MemberJobPool
+            self.member_job_pool = MemberJobPool(self.members_list, parent=self)
+            self.member_job_pool.update_member_gui_signal.connect(self.update_member_gui_in_table)
+            self.member_job_pool.new_data_fetched_signal.connect(self.update_member_name_in_table)
+            self.member_job_pool.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
+            self.member_job_pool.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
+            self.member_job_pool.global_log_signal.connect(self.update_status_bar_message)
+        self.member_job_pool.members_list_ref = self.members_list
+        return self.member_job_pool
+
+    def _cancel_member_jobs(self, member):
+        if self.member_job_pool is not None:
+            self.member_job_pool.cancel(member)
+        try:
+            self.pending_initial_fetches.remove(member)
+        except ValueError:
+            pass
 
+    def import_members_from_file(self):
+        from threads import MemberImportThread
+        if self.member_import_thread and self.member_import_thread.isRunning():
+            self._show_toast("استيراد آخر قيد التنفيذ بالفعل. يرجى الانتظار.", type="warning")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "استيراد أعضاء", "", "ملفات الأعضاء (*.csv *.xlsx);;CSV (*.csv);;Excel (*.xlsx)")
+        if not file_path:
+            return
+        logger.info(f"بدء استيراد الأعضاء من الملف: {file_path}")
+        self.update_status_bar_message(f"جاري استيراد الأعضاء من {os.path.basename(file_path)}...", is_general_message=True)
+        self.member_import_thread = MemberImportThread(file_path, list(self.members_list))
+        self.member_import_thread.progress_signal.connect(self.handle_member_import_progress)
+        self.member_import_thread.import_finished_signal.connect(self.handle_member_import_finished)
+        self.member_import_thread.import_failed_signal.connect(self.handle_member_import_failed)
+        self.member_import_thread.start()
+
+    def handle_member_import_progress(self, rows_read):
+        self.update_status_bar_message(f"جاري استيراد الأعضاء: تمت قراءة {rows_read} صف...", is_general_message=True)
+
+    def handle_member_import_failed(self, error_message):
+        logger.error(f"فشل استيراد الأعضاء: {error_message}")
+        self.update_status_bar_message(f"فشل استيراد الأعضاء: {error_message}", is_general_message=True)
+        self._show_toast(f"فشل استيراد الأعضاء: {error_message}", type="error", duration=6000)
+
+    def handle_member_import_finished(self, result):
+        # أعضاء قد يكونون أُضيفوا يدويًا أثناء القراءة: فحص أخير بنفس الفهارس قبل الدمج
+        known_nins = {m.nin for m in self.members_list}
+        known_wassit_numbers = {m.wassit_no for m in self.members_list}
+        new_members = []
+        for member in result.members:
+            if member.nin in known_nins or member.wassit_no in known_wassit_numbers:
+                result.duplicate_count += 1
+                continue
+            known_nins.add(member.nin)
+            known_wassit_numbers.add(member.wassit_no)
+            new_members.append(member)
+
+        for row_number, reason in result.invalid_rows[:20]:
+            logger.warning(f"استيراد الأعضاء: تم تجاهل الصف {row_number}: {reason}")
+        if len(result.invalid_rows) > 20:
+            logger.warning(f"استيراد الأعضاء: تم تجاهل {len(result.invalid_rows) - 20} صفوف غير صالحة أخرى.")
+        for row_number, warning in result.warning_rows[:20]:
+            logger.info(f"استيراد الأعضاء: الصف {row_number} استُورد مع تحذير: {warning}")
+
+        if new_members:
+            self.members_list.extend(new_members)
+            if self.is_filter_active:
+                self.apply_filter_and_search()
+            else:
+                self.update_table()
+            self.save_members_data()
+            self._queue_initial_fetches(new_members)
+
+        summary_msg = (f"اكتمل الاستيراد: {len(new_members)} عضو جديد، {result.duplicate_count} مكرر، "
+                       f"{len(result.invalid_rows)} صف غير صالح (من {result.rows_read} صف).")
+        if result.warning_rows:
+            summary_msg += f" {len(result.warning_rows)} عضو مستورد لا يطابق قواعد غير مؤكدة (مفتاح CCP/بنية NIN)، انظر السجل."
+        logger.info(summary_msg)
+        self.update_status_bar_message(summary_msg, is_general_message=True)
+        self._show_toast(summary_msg, type="success" if not (result.invalid_rows or result.warning_rows) else "warning", duration=8000)
+
+    def export_members_to_file(self):
+        from threads import MembersExportThread
+        if self.members_export_thread and self.members_export_thread.isRunning():
+            self._show_toast("تصدير آخر قيد التنفيذ بالفعل. يرجى الانتظار.", type="warning")
+            return
+        members_to_export = self.members_list
+        if self.is_filter_active and len(self.filtered_members_list) != len(self.members_list):
+            reply = QMessageBox.question(
+                self, "تصدير الأعضاء",
+                f"تصدير الأعضاء المعروضين حسب البحث/الفلترة فقط ({len(self.filtered_members_list)})؟\n"
+                f"اختر 'لا' لتصدير جميع الأعضاء ({len(self.members_list)}).",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes
+            )
+            if reply == QMessageBox.Cancel:
+                return
+            if reply == QMessageBox.Yes:
+                members_to_export = self.filtered_members_list
+        if not members_to_export:
+            self._show_toast("لا يوجد أعضاء لتصديرهم.", type="info")
+            return
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "تصدير الأعضاء", "الأعضاء.xlsx", "Excel (*.xlsx);;CSV (*.csv)")
+        if not file_path:
+            return
+        if not os.path.splitext(file_path)[1]:
+            file_path += ".csv" if "csv" in selected_filter.lower() else ".xlsx"
+        logger.info(f"بدء تصدير {len(members_to_export)} عضو إلى {file_path}")
+        self.members_export_thread = MembersExportThread(list(members_to_export), file_path)
+        self.members_export_thread.progress_signal.connect(self.handle_members_export_progress)
+        self.members_export_thread.export_finished_signal.connect(self.handle_members_export_finished)
+        self.members_export_thread.export_failed_signal.connect(self.handle_members_export_failed)
+        self.members_export_thread.start()
+
+    def handle_members_export_progress(self, done_count, total_count):
+        self.update_status_bar_message(f"جاري تصدير الأعضاء: {done_count}/{total_count}...", is_general_message=True)
+
+    def handle_members_export_finished(self, exported_count, file_path):
+        summary_msg = f"تم تصدير {exported_count} عضو إلى {os.path.basename(file_path)}."
+        self.update_status_bar_message(summary_msg, is_general_message=True)
+        self._show_toast(summary_msg, type="success", duration=6000)
+
+    def handle_members_export_failed(self, error_message):
+        logger.error(f"فشل تصدير الأعضاء: {error_message}")
+        self.update_status_bar_message(f"فشل تصدير الأعضاء: {error_message}", is_general_message=True)
+        self._show_toast(f"فشل تصدير الأعضاء: {error_message}", type="error", duration=6000)
+
+    def _queue_initial_fetches(self, members):
+        self.pending_initial_fetches.extend(members)
+        if not self.initial_fetch_batch_timer.isActive():
+            self._submit_initial_fetch_batch()
+            self.initial_fetch_batch_timer.start(MEMBER_IMPORT_FETCH_INTERVAL_MS)
+
+    def _submit_initial_fetch_batch(self):
+        # دفعات صغيرة حتى لا تمتلئ قائمة انتظار المجمع بعشرات الآلاف من المهام دفعة واحدة
+        pool = self._ensure_member_job_pool()
+        if pool.pending_count() < MEMBER_IMPORT_FETCH_BATCH_SIZE:
+            for _ in range(min(MEMBER_IMPORT_FETCH_BATCH_SIZE, len(self.pending_initial_fetches))):
+                pool.submit_initial_fetch(self.pending_initial_fetches.popleft(), self.api_client)
+        if not self.pending_initial_fetches:
+            self.initial_fetch_batch_timer.stop()
 
     def add_member(self):
+        from gui_components import AddMemberDialog
+        from validators import validate_member_fields, unverified_rule_warnings
         dialog = AddMemberDialog(self)
         if dialog.exec_() == AddMemberDialog.Accepted:
             data = dialog.get_data()
             if not (data["nin"] and data["wassit_no"] and data["ccp"]): 
                 self._show_toast("يرجى ملء حقول رقم التعريف، رقم الوسيط، والحساب البريدي.", type="warning")
                 return
-            if len(data["nin"]) != 18:
-                self._show_toast("رقم التعريف الوطني يجب أن يتكون من 18 رقمًا.", type="error")
-                return
-            if len(data["ccp"]) != 12: 
-                self._show_toast("رقم الحساب البريدي يجب أن يتكون من 12 رقمًا (10 للحساب + 2 للمفتاح).", type="error")
+            input_error = validate_member_fields(data["nin"], data["wassit_no"], data["ccp"])
+            if input_error:
+                self._show_toast(input_error, type="error")
                 return
+            field_warnings = unverified_rule_warnings(data["nin"])
+            if field_warnings:
+                self._show_toast(f"تحذير (سيُضاف العضو): {' '.join(field_warnings)}", type="warning")
             for idx, m in enumerate(self.members_list):
                 if m.nin == data["nin"] or m.wassit_no == data["wassit_no"]:
                     member_name_display = self._get_member_display_name_with_index(m, idx)
@@ -1108,15 +1315,11 @@ class AnemApp(QMainWindow):
             self.update_status_bar_message(f"تمت إضافة العضو: {member_display_name_add}. جاري جلب المعلومات الأولية...", is_general_message=False) 
             self._show_toast(f"تمت إضافة العضو: {member_display_name_add}. جاري جلب المعلومات الأولية...", type="info") 
             
-            fetch_thread = FetchInitialInfoThread(member, current_original_index, self.api_client, self.settings.copy())
-            fetch_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-            fetch_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-            fetch_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-            fetch_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
-            self.initial_fetch_threads.append(fetch_thread)
-            fetch_thread.start()
+            self._ensure_member_job_pool().submit_initial_fetch(member, self.api_client)
 
     def edit_member_details(self, item): 
+        from gui_components import EditMemberDialog
+        from validators import validate_member_fields, unverified_rule_warnings
         row_in_table = -1
         if not item: 
             selected_rows = self.table.selectionModel().selectedRows()
@@ -1146,12 +1349,13 @@ class AnemApp(QMainWindow):
             if not (new_data["nin"] and new_data["wassit_no"] and new_data["ccp"]):
                 self._show_toast("يرجى ملء حقول رقم التعريف، رقم الوسيط، والحساب البريدي.", type="warning")
                 return
-            if len(new_data["nin"]) != 18:
-                self._show_toast("رقم التعريف الوطني يجب أن يتكون من 18 رقمًا.", type="error")
-                return
-            if len(new_data["ccp"]) != 12: 
-                self._show_toast("رقم الحساب البريدي يجب أن يتكون من 12 رقمًا (10 للحساب + 2 للمفتاح).", type="error")
+            input_error = validate_member_fields(new_data["nin"], new_data["wassit_no"], new_data["ccp"])
+            if input_error:
+                self._show_toast(input_error, type="error")
                 return
+            field_warnings = unverified_rule_warnings(new_data["nin"])
+            if field_warnings:
+                self._show_toast(f"تحذير (سيُحفظ التعديل): {' '.join(field_warnings)}", type="warning")
                 
             nin_changed = member_to_edit.nin != new_data["nin"]
             wassit_changed = member_to_edit.wassit_no != new_data["wassit_no"]
@@ -1176,6 +1380,7 @@ class AnemApp(QMainWindow):
 
             if nin_changed or wassit_changed:
                 logger.info(f"تم تغيير المعرفات الرئيسية للعضو {member_display_after_edit}. إعادة تعيين الحالة وجلب المعلومات.")
+                previous_status = member_to_edit.status
                 member_to_edit.status = "جديد" 
                 member_to_edit.set_activity_detail("تم تعديل المعرفات، يتطلب إعادة التحقق.")
                 member_to_edit.nom_fr = ""
@@ -1185,6 +1390,8 @@ class AnemApp(QMainWindow):
                 member_to_edit.pre_inscription_id = None
                 member_to_edit.demandeur_id = None
                 member_to_edit.structure_id = None
+                from status_history import STATUS_HISTORY
+                STATUS_HISTORY.record(member_to_edit, previous_status, "edit")
                 member_to_edit.rdv_date = None
                 member_to_edit.rdv_id = None
                 member_to_edit.rdv_source = None 
@@ -1203,13 +1410,7 @@ class AnemApp(QMainWindow):
                 self.update_status_bar_message(f"تم تعديل بيانات العضو {member_display_after_edit}. جاري إعادة جلب المعلومات...", is_general_message=False) 
                 self._show_toast(f"تم تعديل بيانات العضو {member_display_after_edit}. جاري إعادة جلب المعلومات...", type="info") 
                 
-                fetch_thread = FetchInitialInfoThread(member_to_edit, original_member_index, self.api_client, self.settings.copy())
-                fetch_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-                fetch_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-                fetch_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-                fetch_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
-                self.initial_fetch_threads.append(fetch_thread)
-                fetch_thread.start()
+                self._ensure_member_job_pool().submit_initial_fetch(member_to_edit, self.api_client)
             else:
                 if self.is_filter_active: self.apply_filter_and_search()
                 else: self.update_table_row(original_member_index, member_to_edit) 
@@ -1256,6 +1457,7 @@ class AnemApp(QMainWindow):
                 original_idx_before_delete = self.members_list.index(member_to_delete) 
                 deleted_member_display_name = self._get_member_display_name_with_index(member_to_delete, original_idx_before_delete)
                 self.members_list.remove(member_to_delete)
+                self._cancel_member_jobs(member_to_delete)
                 logger.info(f"تم حذف العضو: {deleted_member_display_name}")
                 deleted_count +=1
             else:
@@ -1344,8 +1546,7 @@ class AnemApp(QMainWindow):
             if status_item: status_item.setText(member.status)
             icon_item = self.table.item(row_in_table, self.COL_ICON)
             if icon_item:
-                qt_icon = self.style().standardIcon(getattr(QStyle, get_icon_name_for_status(member.status), QStyle.SP_CustomBase))
-                icon_item.setIcon(qt_icon)
+                icon_item.setIcon(self._get_status_icon(get_icon_name_for_status(member.status)))
                 icon_item.setText("")
         
     def update_member_gui_in_table(self, original_member_index, status_text, detail_text, icon_name_str):
@@ -1396,8 +1597,7 @@ class AnemApp(QMainWindow):
             if self.active_spinner_row_in_view == row_in_table_to_update and member.is_processing:
                 icon_item.setIcon(QIcon()) 
             else:
-                qt_icon = self.style().standardIcon(getattr(QStyle, icon_name_str, QStyle.SP_CustomBase))
-                icon_item.setIcon(qt_icon)
+                icon_item.setIcon(self._get_status_icon(icon_name_str))
                 icon_item.setText("") 
         
         self.highlight_processing_row(row_in_table_to_update, force_processing_display=None) 
@@ -1406,8 +1606,9 @@ class AnemApp(QMainWindow):
         if not self.suppress_initial_messages: 
             member_display_for_toast = self._get_member_display_name_with_index(member, original_member_index)
             current_status_for_toast = status_text 
+            status_severity = get_status_style(current_status_for_toast).severity
             
-            if "فشل" in current_status_for_toast or "خطأ" in current_status_for_toast or "غير مؤهل" in current_status_for_toast:
+            if status_severity == "error":
                 error_attr = msg_attr_prefix + current_status_for_toast.replace(" ", "_") 
                 if not hasattr(self, error_attr) or not getattr(self, error_attr):
                     self._show_toast(f"{member.full_last_activity_detail}", type="error", duration=5000, member_obj=member, original_idx_if_member=original_member_index)
@@ -1479,16 +1680,18 @@ class AnemApp(QMainWindow):
 
 
     def start_monitoring(self):
+        if self.activation_state != "active":
+            self._show_toast("جاري التحقق من تفعيل البرنامج، يرجى الانتظار قليلاً.", type="warning")
+            return
         if not self.members_list:
             self._show_toast("يرجى إضافة أعضاء أولاً لبدء المراقبة.", type="warning") 
             return
-        if not self.monitoring_thread.isRunning():
+        if not self._is_monitoring_running():
             logger.info("بدء المراقبة...")
+            self._ensure_monitoring_thread()
             self.monitoring_thread.members_list_ref = self.members_list 
             self.monitoring_thread.is_running = True
-            self.monitoring_thread.is_connection_lost_mode = False 
             self.monitoring_thread.current_member_index_to_process = 0 
-            self.monitoring_thread.consecutive_network_error_trigger_count = 0 
             self.monitoring_thread.update_thread_settings(self.settings.copy()) 
             self.monitoring_thread.start()
             self.start_button.setEnabled(False)
@@ -1504,7 +1707,7 @@ class AnemApp(QMainWindow):
             self.update_status_bar_message("المراقبة جارية بالفعل.", is_general_message=True)
 
     def stop_monitoring(self):
-        if self.monitoring_thread.isRunning():
+        if self._is_monitoring_running():
             logger.info("تم طلب إيقاف المراقبة.")
             self.monitoring_thread.stop_monitoring() 
             if self.row_spinner_timer.isActive():
@@ -1550,7 +1753,9 @@ class AnemApp(QMainWindow):
                     for member in self.members_list:
                         member.is_processing = False
                 self.filtered_members_list = list(self.members_list) 
+                startup_profiler.mark("members_load")
                 self.update_table() 
+                startup_profiler.mark("table_build")
                 logger.info(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DATA_FILE}")
                 self.update_status_bar_message(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DATA_FILE}", is_general_message=True)
             else:
@@ -1594,27 +1799,35 @@ class AnemApp(QMainWindow):
     def closeEvent(self, event):
         logger.info("إغلاق التطبيق...")
         self.update_status_bar_message("جاري إغلاق التطبيق...", is_general_message=True) 
-        if self.monitoring_thread.isRunning():
+        if self._is_monitoring_running():
             logger.info("إيقاف المراقبة قبل الإغلاق...")
             self.monitoring_thread.stop_monitoring() 
             if not self.monitoring_thread.wait(3000): 
                 logger.warning("خيط المراقبة لم ينتهِ في الوقت المناسب.")
+        if self.bulk_pdf_download_thread and self.bulk_pdf_download_thread.isRunning():
+            self.bulk_pdf_download_thread.stop()
+            if not self.bulk_pdf_download_thread.wait(5000):
+                logger.warning("خيط تحميل الشهادات الجماعي لم ينتهِ في الوقت المناسب.")
         
         self.save_members_data() 
         self.save_app_settings() 
+        from response_cache import RESPONSE_CACHE
+        RESPONSE_CACHE.save()
+        from slot_learner import SLOT_LEARNER
+        SLOT_LEARNER.save()
+        logger.info(f"إحصائيات ذاكرة الاستجابات المؤقتة: {RESPONSE_CACHE.stats_summary()}")
         
-        # logger.info("انتظار إنهاء خيوط الجلب الأولي...") # تعليق مخفف
-        for thread in self.initial_fetch_threads:
-            if thread.isRunning():
-                thread.quit() 
-                if not thread.wait(2000): 
-                    logger.warning(f"الخيط {thread} لم ينتهِ في الوقت المناسب عند الإغلاق.")
-        
-        if self.single_check_thread and self.single_check_thread.isRunning():
-            # logger.info("إيقاف خيط الفحص الفردي قبل الإغلاق...") # تعليق مخفف
-            self.single_check_thread.quit() 
-            if not self.single_check_thread.wait(1000): 
-                 logger.warning("خيط الفحص الفردي لم ينته في الوقت المناسب.")
+        if self.member_import_thread and self.member_import_thread.isRunning():
+            self.member_import_thread.stop()
+            self.member_import_thread.wait(2000)
+        if self.members_export_thread and self.members_export_thread.isRunning():
+            self.members_export_thread.stop() # الملف الجزئي يُحذف، والوجهة السابقة تبقى كما هي
+            self.members_export_thread.wait(2000)
+        self.initial_fetch_batch_timer.stop()
+        if self.member_job_pool is not None:
+            self.member_job_pool.shutdown() # المهام المنتظرة تُلغى، والجارية تتوقف بعد طلبها الحالي
+        from status_history import STATUS_HISTORY
+        STATUS_HISTORY.close() # يكتب الانتقالات المتبقية في الذاكرة
         
         active_pdf_dl_threads_copy = list(self.active_download_all_pdfs_threads.values())
         if active_pdf_dl_threads_copy:
@@ -1627,24 +1840,48 @@ class AnemApp(QMainWindow):
             self.active_download_all_pdfs_threads.clear()
 
 
+        # خيوط بدء التشغيل لا يمكن مقاطعتها (طلبات شبكة قصيرة المهلة)، لذا ننتظر انتهاءها قبل الإغلاق
+        for startup_thread in (self.activation_check_thread, self.device_info_thread):
+            if startup_thread and startup_thread.isRunning():
+                if not startup_thread.wait(10000):
+                    logger.warning(f"خيط بدء التشغيل {startup_thread} لم ينتهِ في الوقت المناسب.")
+
         if hasattr(self, 'datetime_timer') and self.datetime_timer.isActive(): self.datetime_timer.stop()
         if hasattr(self, 'row_spinner_timer') and self.row_spinner_timer.isActive(): self.row_spinner_timer.stop()
         logger.info("تم إغلاق التطبيق.")
         super().closeEvent(event)
 
+STARTUP_BUDGET_EXCEEDED_EXIT_CODE = 3
+_startup_budget_exit_code = 0 # يُحدد في _finish_startup_profile ويُعاد بعد حلقة الأحداث (إغلاق النافذة قد يستدعي quit بالرمز 0)
+
+
+def _finish_startup_profile(app, main_window):
+    # يُستدعى عند أول دورة لحلقة الأحداث بعد إظهار النافذة
+    global _startup_budget_exit_code
+    startup_profiler.mark("show")
+    if startup_profiler.enabled:
+        print(startup_profiler.format_report())
+    if "--exit-after-startup" in sys.argv:
+        total_ms = startup_profiler.elapsed_ms()
+        if total_ms > STARTUP_TIME_BUDGET_MS:
+            _startup_budget_exit_code = STARTUP_BUDGET_EXCEEDED_EXIT_CODE
+            logger.error(f"زمن بدء التشغيل {total_ms:.0f} ms تجاوز الحد المسموح {STARTUP_TIME_BUDGET_MS} ms.")
+            print(f"Startup budget exceeded: {total_ms:.0f} ms > {STARTUP_TIME_BUDGET_MS} ms", file=sys.stderr)
+        else:
+            print(f"Startup budget OK: {total_ms:.0f} ms <= {STARTUP_TIME_BUDGET_MS} ms")
+        main_window.close()
+        app.quit()
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    startup_profiler.mark("qapplication")
     main_window = AnemApp()
-    
-    if not hasattr(main_window, '_should_initialize_ui') or not main_window._should_initialize_ui:
-        logger.critical("__main__: لم يتم تحديد _should_initialize_ui أو قيمته False بعد _initialize_and_check_activation. الخروج من التطبيق.")
-        if hasattr(main_window, 'activation_successful') and not main_window.activation_successful:
-             if hasattr(main_window, 'firebase_service') and not main_window.firebase_service.is_initialized():
-                 QMessageBox.critical(None, "خطأ فادح في Firebase",
-                                     f"لا يمكن تهيئة خدمة Firebase. الرجاء التأكد من وجود ملف '{FIREBASE_SERVICE_ACCOUNT_KEY_FILE}' وأنه صالح.\nسيتم إغلاق البرنامج.",
-                                     QMessageBox.Ok)
-        sys.exit(1) 
-    
-    # logger.info("__main__: نجح التفعيل. جاري إظهار النافذة الرئيسية.") # تعليق مخفف
     main_window.show()
-    sys.exit(app.exec_())
+    QTimer.singleShot(0, lambda: _finish_startup_profile(app, main_window))
+    exit_code = app.exec_()
+    if "--exit-after-startup" in sys.argv:
+        # رمز خروج غير صفري إذا تجاوز بدء التشغيل STARTUP_TIME_BUDGET_MS. خيط التفعيل قد يبقى معلقًا على الشبكة
+        # بعد مهلة الإغلاق، و os._exit يتجنب إنهاء العملية بخطأ "QThread: Destroyed while thread is still running"
+        logging.shutdown()
+        os._exit(_startup_budget_exit_code or exit_code)
+    sys.exit(exit_code)
@@ -0,0 +1,105 @@
+# member_export.py
+"""
+تصدير الأعضاء وحالاتهم إلى CSV أو XLSX صفًا بصف (openpyxl في وضع write_only)،
+فتبقى الذاكرة ثابتة مهما كان عدد الأعضاء. الملف يُكتب في ملف مؤقت ثم يستبدل الوجهة.
+أسماء أعمدة المعرفات نفسها التي يقبلها member_import، فيمكن إعادة استيراد الملف المُصدَّر.
+"""
+import os
+import csv
+import tempfile
+import logging
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    openpyxl = None
+    OPENPYXL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXPORT_EXTENSIONS = (".csv", ".xlsx")
+EXPORT_PROGRESS_EVERY_ROWS = 1000
+EXPORT_COLUMNS = (
+    ("رقم التعريف الوطني", lambda m: m.nin),
+    ("رقم الوسيط", lambda m: m.wassit_no),
+    ("الحساب البريدي", lambda m: m.ccp),
+    ("الهاتف", lambda m: m.phone_number),
+    ("الاسم واللقب", lambda m: m.get_full_name_ar()),
+    ("Nom", lambda m: m.nom_fr),
+    ("Prénom", lambda m: m.prenom_fr),
+    ("الحالة", lambda m: m.status),
+    ("تاريخ الموعد", lambda m: m.rdv_date),
+    ("رقم الموعد", lambda m: m.rdv_id),
+    ("رقم التسجيل المسبق", lambda m: m.pre_inscription_id),
+    ("آخر نشاط", lambda m: m.full_last_activity_detail or m.last_activity_detail),
+)
+
+
+class MemberExportError(Exception):
+    pass
+
+
+def _member_rows(members, progress_callback, should_continue):
+    for row_count, member in enumerate(members, start=1):
+        if should_continue is not None and not should_continue():
+            raise MemberExportError("تم إلغاء التصدير.")
+        yield ["" if value is None else str(value) for value in (getter(member) for _, getter in EXPORT_COLUMNS)]
+        if progress_callback is not None and row_count % EXPORT_PROGRESS_EVERY_ROWS == 0:
+            progress_callback(row_count)
+
+
+def _write_csv(temp_file_path, rows):
+    # utf-8-sig حتى يعرض Excel الأحرف العربية بشكل صحيح
+    with open(temp_file_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([title for title, _ in EXPORT_COLUMNS])
+        writer.writerows(rows)
+
+
+def _write_xlsx(temp_file_path, rows):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("الأعضاء")
+    sheet.sheet_view.rightToLeft = True
+    sheet.append([title for title, _ in EXPORT_COLUMNS])
+    for row in rows:
+        sheet.append(row) # القيم نصوص: NIN (18 رقمًا) لا يتحول إلى رقم عشري في Excel
+    workbook.save(temp_file_path)
+
+
+def export_members(members, file_path, progress_callback=None, should_continue=None):
+    """
+    يكتب members (أي iterable) إلى file_path حسب امتداده.
+    Returns:
+        int: عدد الأعضاء المُصدَّرين.
+    Raises:
+        MemberExportError: صيغة غير مدعومة، openpyxl غير مثبت، أو إلغاء التصدير.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in SUPPORTED_EXPORT_EXTENSIONS:
+        raise MemberExportError(f"صيغة ملف غير مدعومة: {extension or 'بدون امتداد'}. الصيغ المدعومة: CSV و XLSX.")
+    if extension == ".xlsx" and not OPENPYXL_AVAILABLE:
+        raise MemberExportError("التصدير إلى Excel يتطلب الحزمة openpyxl (pip install openpyxl). يمكن التصدير بصيغة CSV بدلًا من ذلك.")
+
+    exported = [0]
+    def counted_rows():
+        for row in _member_rows(members, progress_callback, should_continue):
+            exported[0] += 1
+            yield row
+
+    fd, temp_file_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=extension + ".part")
+    os.close(fd)
+    try:
+        if extension == ".csv":
+            _write_csv(temp_file_path, counted_rows())
+        else:
+            _write_xlsx(temp_file_path, counted_rows())
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+        raise
+    logger.info(f"تم تصدير {exported[0]} عضو إلى {file_path}")
+    return exported[0]
@@ -0,0 +1,161 @@
+# member_import.py
+"""
+استيراد الأعضاء دفعة واحدة من ملف CSV أو XLSX.
+الصفوف تُقرأ كتدفق (لا يُحمّل الملف كاملًا في الذاكرة)، وتُفحص محليًا (validators) بنفس إعداد الفحص الصارم
+المستخدم في المراقبة: خارج الوضع الصارم تُستورد الصفوف المخالفة للقواعد غير المؤكدة مع تحذير،
+ويُستبعد المكرر عبر فهارس (set) على nin و wassit_no بدل البحث في القائمة لكل صف.
+قراءة XLSX تتطلب: pip install openpyxl. ملفات CSV لا تحتاج أي حزمة إضافية.
+"""
+import os
+import csv
+import logging
+
+from member import Member
+from validators import digits_only, validate_member_fields, unverified_rule_warnings
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    openpyxl = None
+    OPENPYXL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_IMPORT_EXTENSIONS = (".csv", ".xlsx")
+# أسماء الأعمدة المقبولة (بعد تحويلها إلى أحرف صغيرة وحذف المسافات)
+COLUMN_ALIASES = {
+    "nin": ("nin", "رقمالتعريفالوطني", "رقمالتعريف", "identite", "identity"),
+    "wassit_no": ("wassit_no", "wassit", "wassitnumber", "رقمالوسيط", "رقمطالبالشغل"),
+    "ccp": ("ccp", "الحسابالبريدي", "رقمالحسابالبريدي", "compteccp"),
+    "phone_number": ("phone_number", "phone", "telephone", "الهاتف", "رقمالهاتف"),
+}
+DEFAULT_COLUMN_ORDER = ("nin", "wassit_no", "ccp", "phone_number")
+
+
+class MemberImportError(Exception):
+    pass
+
+
+class MemberImportResult:
+    def __init__(self):
+        self.members = []
+        self.rows_read = 0
+        self.duplicate_count = 0
+        self.invalid_rows = [] # (رقم الصف في الملف، السبب)
+        self.warning_rows = [] # صفوف مستوردة تخالف القواعد غير المؤكدة: (رقم الصف، التحذير)
+
+
+def _normalize_header(value):
+    return str(value or "").strip().lower().replace(" ", "").replace("_", "").replace("-", "")
+
+
+def _resolve_columns(header_row):
+    """يحدد موقع كل عمود من صف العناوين، أو None إذا لم يكن الصف الأول صف عناوين."""
+    normalized = [_normalize_header(cell) for cell in header_row]
+    positions = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        normalized_aliases = {_normalize_header(alias) for alias in aliases}
+        for position, cell in enumerate(normalized):
+            if cell in normalized_aliases:
+                positions[field] = position
+                break
+    if not {"nin", "wassit_no", "ccp"} <= positions.keys():
+        return None
+    return positions
+
+
+def _cell_text(value):
+    # خلايا Excel الرقمية تصل كـ int/float؛ الأرقام الطويلة يجب أن تُخزن كنص في الملف وإلا فقدت دقتها
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _iter_csv_rows(file_path):
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield row
+
+
+def _iter_xlsx_rows(file_path):
+    if not OPENPYXL_AVAILABLE:
+        raise MemberImportError("قراءة ملفات Excel تتطلب الحزمة openpyxl (pip install openpyxl). يمكن حفظ الملف بصيغة CSV بدلًا من ذلك.")
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_member_rows(file_path):
+    """يعيد (رقم الصف، dict بالحقول) لكل صف غير فارغ في الملف."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        rows = _iter_csv_rows(file_path)
+    elif extension == ".xlsx":
+        rows = _iter_xlsx_rows(file_path)
+    else:
+        raise MemberImportError(f"صيغة ملف غير مدعومة: {extension or 'بدون امتداد'}. الصيغ المدعومة: CSV و XLSX.")
+
+    positions = None
+    for row_number, row in enumerate(rows, start=1):
+        cells = [_cell_text(value) for value in row]
+        if not any(cells):
+            continue
+        if positions is None:
+            positions = _resolve_columns(cells)
+            if positions is not None:
+                continue # صف العناوين
+            positions = {field: position for position, field in enumerate(DEFAULT_COLUMN_ORDER)}
+        yield row_number, {
+            field: cells[position] if position < len(cells) else ""
+            for field, position in positions.items()
+        }
+
+
+def import_members(file_path, existing_members, progress_callback=None, should_continue=None):
+    """
+    يقرأ الملف ويعيد MemberImportResult بالأعضاء الجدد الصالحين فقط (لا يُعدّل existing_members).
+    progress_callback(rows_read) يُستدعى كل 1000 صف؛ should_continue() يسمح بإيقاف القراءة.
+    """
+    result = MemberImportResult()
+    known_nins = {member.nin for member in existing_members}
+    known_wassit_numbers = {member.wassit_no for member in existing_members}
+
+    for row_number, fields in iter_member_rows(file_path):
+        if should_continue is not None and not should_continue():
+            break
+        result.rows_read += 1
+        if progress_callback is not None and result.rows_read % 1000 == 0:
+            progress_callback(result.rows_read)
+
+        nin = digits_only(fields.get("nin"))
+        wassit_no = fields.get("wassit_no", "").replace(" ", "")
+        ccp = digits_only(fields.get("ccp"))
+        error = validate_member_fields(nin, wassit_no, ccp)
+        if error:
+            result.invalid_rows.append((row_number, error))
+            continue
+        if nin in known_nins or wassit_no in known_wassit_numbers:
+            result.duplicate_count += 1
+            continue
+        field_warnings = unverified_rule_warnings(nin)
+        if field_warnings:
+            result.warning_rows.append((row_number, " ".join(field_warnings)))
+        known_nins.add(nin)
+        known_wassit_numbers.add(wassit_no)
+        result.members.append(Member(nin, wassit_no, ccp, fields.get("phone_number", "")))
+
+    logger.info(f"استيراد {file_path}: {result.rows_read} صف، {len(result.members)} عضو جديد، "
+                f"{result.duplicate_count} مكرر، {len(result.invalid_rows)} غير صالح، {len(result.warning_rows)} مع تحذير.")
+    return result
@@ -0,0 +1,588 @@
+# member_pipeline.py
+"""
+مراحل معالجة العضو الواحد (التحقق، جلب الاسم، البحث عن موعد وحجزه، تحميل الشهادات) كدوال بلا حالة.
+تستخدمها حلقة المراقبة والفحص الفوري وجلب المعلومات الأولية على حد سواء.
+كل دالة تستقبل runner: أي كائن يوفر api_client و is_running وإشارات
+update_member_gui_signal و new_data_fetched_signal و global_log_signal.
+إذا وفّر runner الدالة index_of(member) يُحسب صف العضو عند كل إشارة بدل main_list_idx الممرر.
+"""
+import os
+import json
+import time
+import logging
+
+from circuit_breaker import CIRCUIT_OPEN_ERROR_PREFIX
+from pdf_store import is_member_pdf_stored, fetch_member_pdf
+from slot_learner import SLOT_LEARNER
+from status_history import STATUS_HISTORY
+from utils import MemberStatus, get_icon_name_for_status, get_status_style
+from validators import validate_ccp, validate_member_fields, unverified_rule_warnings
+
+logger = logging.getLogger(__name__)
+
+PDF_WORTHY_STATUSES = [MemberStatus.BOOKED, MemberStatus.COMPLETED, MemberStatus.PDF_DOWNLOAD_FAILED, MemberStatus.HAS_RDV]
+
+
+def get_missing_pdf_reports(member):
+    """الشهادات غير الموجودة في مخزن الشهادات: قائمة (report_type, filename_suffix_base, path_attr)."""
+    missing_reports = []
+    if not is_member_pdf_stored(member, "HonneurEngagementReport"):
+        missing_reports.append(("HonneurEngagementReport", "التزام", 'pdf_honneur_path'))
+    if (member.already_has_rdv or member.rdv_id) and not is_member_pdf_stored(member, "RdvReport"):
+        missing_reports.append(("RdvReport", "موعد", 'pdf_rdv_path'))
+    return missing_reports
+
+def _translate_api_error(error_string, operation_name="العملية"):
+    if not error_string:
+        return f"حدث خطأ غير محدد أثناء {operation_name}."
+
+    error_lower = str(error_string).lower()
+
+    if str(error_string).startswith(CIRCUIT_OPEN_ERROR_PREFIX):
+        return f"الخادم لا يستجيب حاليًا لـ {operation_name} (توقف مؤقت بعد أخطاء متكررة، ستُعاد المحاولة تلقائيًا)."
+    if "timeout" in error_lower or "timed out" in error_lower:
+        if "connect" in error_lower:
+            return f"انتهت مهلة الاتصال بالخادم أثناء {operation_name}. يرجى التحقق من اتصالك بالإنترنت."
+        else:
+            return f"انتهت مهلة الاستجابة من الخادم أثناء {operation_name}. قد يكون الخادم بطيئًا أو هناك مشكلة في الشبكة."
+    elif "connectionerror" in error_lower or "could not connect" in error_lower or "failed to establish a new connection" in error_lower:
+        return f"فشل الاتصال بالخادم أثناء {operation_name}. يرجى التحقق من اتصالك بالإنترنت وحالة الخادم."
+    elif "sslerror" in error_lower or "certificate_verify_failed" in error_lower:
+        return f"حدث خطأ في شهادة الأمان (SSL) أثناء {operation_name}. قد يكون الاتصال غير آمن."
+    elif "429" in error_lower or "طلبات كثيرة جدًا" in error_lower:
+        return f"الخادم مشغول حاليًا (طلبات كثيرة جدًا) أثناء {operation_name}. يرجى المحاولة لاحقًا."
+    elif "404" in error_lower or "not found" in error_lower:
+        return f"تعذر العثور على المورد المطلوب على الخادم (404) أثناء {operation_name}."
+    elif "500" in error_lower or "internal server error" in error_lower:
+        return f"حدث خطأ داخلي في الخادم (500) أثناء {operation_name}. يرجى المحاولة لاحقًا."
+    elif "jsondecodeerror" in error_lower or "خطأ في تحليل البيانات" in error_lower:
+        return f"تم استلام استجابة غير صالحة (ليست JSON) من الخادم أثناء {operation_name}."
+    elif "eligible:false" in error_lower or "نعتذر منكم" in error_string: 
+        if "نعتذر منكم! لا يمكنكم حجز موعد" in error_string:
+            return error_string
+        if operation_name == "حجز الموعد" and "\"Eligible\":false" in error_string and "\"serviceUp\":true" in error_string :
+             return "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+        return f"المستخدم غير مؤهل لـ {operation_name} حسب شروط المنصة."
+    
+    max_len = 70
+    snippet = error_string[:max_len] + "..." if len(error_string) > max_len else error_string
+    return f"فشل في {operation_name}: {snippet}"
+
+# إضافة إلى الحالات النهائية (is_terminal): فشل التحقق وعدم الأهلية للحجز يوقفان مراحل هذه الدورة فقط
+NON_TERMINAL_STOP_STATUSES = [MemberStatus.NOT_ELIGIBLE_BOOKING, MemberStatus.VALIDATION_FAILED, MemberStatus.INITIAL_VALIDATION_FAILED]
+BOOKABLE_STATUSES = [MemberStatus.INFO_FETCHED, MemberStatus.VALIDATED, MemberStatus.NO_DATES, MemberStatus.DATES_FETCH_FAILED, MemberStatus.REQUIRES_PRE_INSCRIPTION]
+
+
+def stops_after_validation(status):
+    return get_status_style(status).is_terminal or status in NON_TERMINAL_STOP_STATUSES
+
+
+def get_member_display_name(member_obj, original_index_in_main_list):
+    name_part = member_obj.get_full_name_ar()
+    if not name_part or name_part.isspace():
+        name_part = member_obj.nin 
+    return f"{name_part} (رقم {original_index_in_main_list + 1})"
+
+
+def _row_of(runner, member_obj, main_list_idx):
+    # مهام MemberJobPool قد يُحذف عضو أثناء تنفيذها فتتغير الفهارس؛ لذلك يُحسب الصف لحظة الإرسال
+    index_of = getattr(runner, "index_of", None)
+    return index_of(member_obj) if index_of else main_list_idx
+
+
+def _emit_member_log(runner, message, member_obj, main_list_idx):
+    runner.global_log_signal.emit(message, False, member_obj, _row_of(runner, member_obj, main_list_idx))
+
+
+_warned_member_fields = set() # (nin, ccp) التي سُجل لها تحذير القواعد غير المؤكدة في هذه الجلسة
+
+
+def reject_invalid_member(runner, main_list_idx, member_obj):
+    """
+    فحص محلي لـ NIN ورقم الوسيط و CCP قبل أي طلب. العضو غير الصالح يأخذ الحالة "بيانات الإدخال خاطئة"
+    ولا يُرسل له أي طلب حتى تُعدّل بياناته. العضو الذي قبله الخادم (pre_inscription_id أو rdv_id) لا يُرفض أبدًا.
+    قواعد بنية NIN غير المؤكدة تُسجل كتحذير فقط.
+    Returns:
+        bool: True إذا رُفض العضو.
+    """
+    accepted_by_server = bool(member_obj.pre_inscription_id or member_obj.rdv_id)
+    input_error = validate_member_fields(member_obj.nin, member_obj.wassit_no, member_obj.ccp)
+    if input_error and accepted_by_server:
+        _warn_member_fields_once(member_obj, main_list_idx, [input_error])
+        return False
+    if not input_error:
+        _warn_member_fields_once(member_obj, main_list_idx, unverified_rule_warnings(member_obj.nin))
+        return False
+    logger.warning(f"العضو {get_member_display_name(member_obj, main_list_idx)}: بيانات غير صالحة محليًا، لن يُرسل أي طلب: {input_error}")
+    if member_obj.status != MemberStatus.INPUT_ERROR or member_obj.last_activity_detail != input_error:
+        _emit_member_log(runner, f"بيانات الإدخال خاطئة: {input_error}", member_obj, main_list_idx)
+    _update_member_and_emit(runner, main_list_idx, member_obj, MemberStatus.INPUT_ERROR.value, input_error, get_icon_name_for_status(MemberStatus.INPUT_ERROR.value))
+    return True # الانتقال يُسجل في STATUS_HISTORY بواسطة run_member_checks أو run_initial_fetch
+
+
+def _warn_member_fields_once(member_obj, main_list_idx, warnings):
+    warning_key = (member_obj.nin, member_obj.ccp)
+    if not warnings or warning_key in _warned_member_fields:
+        return
+    _warned_member_fields.add(warning_key)
+    logger.warning(f"العضو {get_member_display_name(member_obj, main_list_idx)}: تحذير فحص محلي (لن يُرفض): {' '.join(warnings)}")
+
+
+def can_attempt_booking(member_obj):
+    return member_obj.status in BOOKABLE_STATUSES and \
+           member_obj.has_actual_pre_inscription and member_obj.pre_inscription_id and \
+           member_obj.demandeur_id and member_obj.structure_id and \
+           not member_obj.already_has_rdv and not member_obj.have_allocation
+
+
+def run_member_checks(runner, main_list_idx, member_obj):
+    """
+    التحقق ثم جلب الاسم (إن كان ناقصًا) ثم البحث عن موعد وحجزه إن كان العضو مؤهلًا.
+    الانتقال بين حالة العضو قبل الفحص وبعده يُسجل في STATUS_HISTORY مع آخر مرحلة نُفذت.
+    Returns:
+        tuple: (bool فشل أحد طلبات الواجهة البرمجية، bool أُرسل طلب واحد على الأقل: False إذا رفضه الفحص المحلي)
+    """
+    previous_status = member_obj.status
+    started_at = time.monotonic()
+    api_error_occurred, last_stage = _run_member_stages(runner, main_list_idx, member_obj)
+    STATUS_HISTORY.record(member_obj, previous_status, last_stage, started_at)
+    return api_error_occurred, last_stage != "local_validation"
+
+
+def run_initial_fetch(runner, main_list_idx, member_obj):
+    """
+    جلب المعلومات الأولية لعضو جديد أو معدّل أو مستورد: نفس مراحل run_member_checks (الفحص المحلي، التحقق،
+    جلب الاسم) دون البحث عن موعد. يُسجل الانتقال في STATUS_HISTORY بالمرحلة "initial_fetch".
+    Returns:
+        bool: True إذا فشل أحد طلبات الواجهة البرمجية.
+    """
+    previous_status = member_obj.status
+    started_at = time.monotonic()
+    api_error_occurred, _ = _run_member_stages(runner, main_list_idx, member_obj, initial=True)
+    STATUS_HISTORY.record(member_obj, previous_status, "initial_fetch", started_at)
+    return api_error_occurred
+
+
+def _run_member_stages(runner, main_list_idx, member_obj, initial=False):
+    """Returns: (bool فشل طلب API، اسم آخر مرحلة نُفذت). initial: بدون مرحلة الحجز."""
+    if reject_invalid_member(runner, main_list_idx, member_obj):
+        return False, "local_validation"
+    validation_success, api_error_occurred = process_validation(runner, main_list_idx, member_obj, initial)
+    # validation_success يسمح بمرحلة جلب الاسم حتى لحالة نهائية (لديه موعد مسبق بلا اسم)؛ الحالة النهائية تمنع الحجز فقط
+    if not runner.is_running or not validation_success:
+        return api_error_occurred, "validation"
+    last_stage = "validation"
+
+    if member_obj.pre_inscription_id and not (member_obj.nom_ar and member_obj.prenom_ar):
+        _, api_error_occurred_info = process_pre_inscription_info(runner, main_list_idx, member_obj)
+        api_error_occurred = api_error_occurred or api_error_occurred_info
+        last_stage = "pre_inscription_info"
+        if not runner.is_running:
+            return api_error_occurred, last_stage
+
+    if not initial and not stops_after_validation(member_obj.status) and can_attempt_booking(member_obj):
+        _, api_error_occurred_booking = process_available_dates_and_book(runner, main_list_idx, member_obj)
+        api_error_occurred = api_error_occurred or api_error_occurred_booking
+        last_stage = "booking"
+    return api_error_occurred, last_stage
+
+
+def _update_member_and_emit(runner, main_list_idx, member_obj_being_updated, new_status, detail_text, icon_name):
+    member_obj_being_updated.status = new_status
+    is_error_flag = get_status_style(new_status).severity == "error" or new_status == MemberStatus.INPUT_ERROR
+    member_obj_being_updated.set_activity_detail(detail_text, is_error=is_error_flag)
+    member_display_name = get_member_display_name(member_obj_being_updated, main_list_idx)
+    logger.info(f"تحديث حالة العضو {member_display_name}: {new_status} - التفاصيل: {member_obj_being_updated.last_activity_detail}")
+    if runner.is_running: 
+        runner.update_member_gui_signal.emit(_row_of(runner, member_obj_being_updated, main_list_idx), member_obj_being_updated.status, member_obj_being_updated.last_activity_detail, icon_name)
+
+
+def process_validation(runner, main_list_idx, member_obj, initial=False): 
+    # initial: جلب المعلومات الأولية لعضو جديد أو معدّل (حالات "فشل التحقق الأولي" و "غير مؤهل مبدئيًا")
+    if not runner.is_running: return False, False
+    context = "أولي" if initial else "دوري"
+    operation_name = "التحقق من بيانات التسجيل" if initial else f"التحقق من البيانات ({context})"
+    failed_status = MemberStatus.INITIAL_VALIDATION_FAILED.value if initial else MemberStatus.VALIDATION_FAILED.value
+    progress_status = MemberStatus.VALIDATING_INSTANT.value if initial else MemberStatus.VALIDATING_CYCLE.value
+    member_display_name = get_member_display_name(member_obj, main_list_idx)
+    _update_member_and_emit(runner, main_list_idx, member_obj, progress_status, f"التحقق من بيانات العضو {member_display_name}" if initial else f"إعادة التحقق للعضو {member_display_name}", get_icon_name_for_status(progress_status))
+    data, error = runner.api_client.validate_candidate(member_obj.wassit_no, member_obj.nin)
+    if not runner.is_running: return False, False
+    
+    new_status = member_obj.status 
+    validation_can_progress = False 
+    api_error_occurred = False 
+    detail_text_for_gui = member_obj.last_activity_detail 
+
+    if error:
+        new_status = failed_status
+        detail_text_for_gui = _translate_api_error(error, operation_name)
+        api_error_occurred = True
+        _emit_member_log(runner, f"فشل التحقق ({context}): {detail_text_for_gui}", member_obj, main_list_idx)
+    elif data:
+        member_obj.have_allocation = data.get("haveAllocation", False)
+        member_obj.allocation_details = data.get("detailsAllocation", {})
+
+        if member_obj.have_allocation and member_obj.allocation_details:
+            new_status = MemberStatus.BENEFITING.value
+            nom_ar = member_obj.allocation_details.get("nomAr", member_obj.nom_ar) 
+            prenom_ar = member_obj.allocation_details.get("prenomAr", member_obj.prenom_ar)
+            nom_fr = member_obj.allocation_details.get("nomFr", member_obj.nom_fr)
+            prenom_fr = member_obj.allocation_details.get("prenomFr", member_obj.prenom_fr)
+            date_debut = member_obj.allocation_details.get("dateDebut", "غير محدد")
+            if date_debut and "T" in date_debut: date_debut = date_debut.split("T")[0]
+
+            if nom_ar != member_obj.nom_ar or prenom_ar != member_obj.prenom_ar: 
+                member_obj.nom_ar = nom_ar
+                member_obj.prenom_ar = prenom_ar
+                member_obj.nom_fr = nom_fr
+                member_obj.prenom_fr = prenom_fr
+                if runner.is_running: runner.new_data_fetched_signal.emit(_row_of(runner, member_obj, main_list_idx), nom_ar, prenom_ar) 
+            
+            detail_text_for_gui = f"مستفيد حاليًا. تاريخ بدء الاستفادة: {date_debut}."
+            _emit_member_log(runner, f"مستفيد حاليًا.", member_obj, main_list_idx)
+            validation_can_progress = False 
+        else: 
+            member_obj.has_actual_pre_inscription = data.get("havePreInscription", False)
+            member_obj.already_has_rdv = data.get("haveRendezVous", False)
+            valid_input = data.get("validInput", True)
+            member_obj.pre_inscription_id = data.get("preInscriptionId")
+            member_obj.demandeur_id = data.get("demandeurId")
+            member_obj.structure_id = data.get("structureId")
+            member_obj.rdv_id = data.get("rendezVousId") 
+
+            if member_obj.already_has_rdv and member_obj.rdv_source != "system": # Don't overwrite if system booked it
+                member_obj.rdv_source = "discovered"
+
+            if not valid_input:
+                controls = data.get("controls", [])
+                error_msg_from_controls = "البيانات المدخلة غير متطابقة أو غير صالحة."
+                for control in controls:
+                    if control.get("result") is False and control.get("name") == "matchIdentity" and control.get("message"):
+                        error_msg_from_controls = control.get("message")
+                        break
+                new_status = MemberStatus.INPUT_ERROR.value
+                detail_text_for_gui = error_msg_from_controls
+                _emit_member_log(runner, f"خطأ في بيانات الإدخال ({context}): {error_msg_from_controls}", member_obj, main_list_idx)
+            elif member_obj.already_has_rdv:
+                new_status = MemberStatus.HAS_RDV.value
+                detail_text_for_gui = f"لديه موعد محجوز بالفعل (ID: {member_obj.rdv_id or 'N/A'})."
+                _emit_member_log(runner, f"لديه موعد مسبق.", member_obj, main_list_idx)
+                if member_obj.pre_inscription_id and not (member_obj.nom_ar and member_obj.prenom_ar):
+                    validation_can_progress = True 
+                else:
+                    validation_can_progress = False 
+            elif data.get("eligible", False) and member_obj.has_actual_pre_inscription:
+                new_status = MemberStatus.VALIDATED.value 
+                detail_text_for_gui = f"مؤهل ولديه تسجيل مسبق ({context})."
+                validation_can_progress = True
+            elif data.get("eligible", False) and not member_obj.has_actual_pre_inscription:
+                new_status = MemberStatus.REQUIRES_PRE_INSCRIPTION.value 
+                detail_text_for_gui = "مؤهل ولكن لا يوجد تسجيل مسبق بعد (بانتظار توفر موعد)."
+                validation_can_progress = True 
+            elif not data.get("eligible", False): 
+                new_status = MemberStatus.NOT_ELIGIBLE_INITIAL.value if initial else MemberStatus.NOT_ELIGIBLE_BOOKING.value 
+                detail_text_for_gui = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+                if isinstance(data, dict) and "message" in data and data["message"]:
+                     detail_text_for_gui = data["message"] 
+                elif isinstance(data, dict) and data.get("Eligible") is False and data.get("serviceUp") is True: 
+                     detail_text_for_gui = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+
+                _emit_member_log(runner, f"غير مؤهل للحجز ({context}): {detail_text_for_gui}", member_obj, main_list_idx)
+            else: 
+                new_status = failed_status 
+                detail_text_for_gui = f"حالة غير معروفة بعد التحقق من البيانات ({context})."
+                api_error_occurred = True
+                _emit_member_log(runner, f"فشل التحقق ({context}): حالة غير معروفة.", member_obj, main_list_idx)
+    else: 
+        new_status = failed_status
+        detail_text_for_gui = f"استجابة فارغة من الخادم عند التحقق من البيانات ({context})."
+        api_error_occurred = True
+        _emit_member_log(runner, f"فشل التحقق ({context}): استجابة فارغة.", member_obj, main_list_idx)
+    
+    icon = get_icon_name_for_status(new_status) 
+    _update_member_and_emit(runner, main_list_idx, member_obj, new_status, detail_text_for_gui, icon)
+    return validation_can_progress, api_error_occurred
+
+
+def process_pre_inscription_info(runner, main_list_idx, member_obj): 
+    if not runner.is_running: return False, False
+    operation_name = "جلب معلومات الاسم"
+    member_display_name = get_member_display_name(member_obj, main_list_idx)
+    if not member_obj.pre_inscription_id:
+        detail_text = "ID التسجيل المسبق غير متوفر لجلب الاسم."
+        _update_member_and_emit(runner, main_list_idx, member_obj, member_obj.status, detail_text, get_icon_name_for_status(member_obj.status))
+        return False, False 
+    
+    _update_member_and_emit(runner, main_list_idx, member_obj, MemberStatus.FETCHING_NAME.value, f"محاولة جلب الاسم واللقب للعضو {member_display_name}", get_icon_name_for_status(MemberStatus.FETCHING_NAME.value))
+    data, error = runner.api_client.get_pre_inscription_info(member_obj.pre_inscription_id)
+    if not runner.is_running: return False, False
+    
+    new_status = member_obj.status 
+    icon = get_icon_name_for_status(new_status)
+    info_fetched_successfully = False
+    api_error_occurred = False
+    detail_text_for_gui = member_obj.last_activity_detail
+
+    if error:
+        if MemberStatus.FETCHING_NAME.value in new_status : new_status = MemberStatus.INFO_FETCH_FAILED.value 
+        detail_text_for_gui = _translate_api_error(error, operation_name)
+        api_error_occurred = True
+        _emit_member_log(runner, f"فشل جلب اسم العضو: {detail_text_for_gui}", member_obj, main_list_idx)
+    elif data:
+        member_obj.nom_fr = data.get("nomDemandeurFr", "")
+        member_obj.prenom_fr = data.get("prenomDemandeurFr", "")
+        member_obj.nom_ar = data.get("nomDemandeurAr", "")
+        member_obj.prenom_ar = data.get("prenomDemandeurAr", "")
+        
+        current_activity = member_obj.last_activity_detail.replace(" جاري جلب الاسم...", "").strip() 
+        
+        if MemberStatus.FETCHING_NAME.value in new_status or new_status == MemberStatus.VALIDATED: 
+            if member_obj.already_has_rdv: 
+                new_status = MemberStatus.HAS_RDV.value 
+                detail_text_for_gui = f"لديه موعد محجوز بالفعل. الاسم: {member_obj.get_full_name_ar()}"
+            else: 
+                new_status = MemberStatus.INFO_FETCHED.value 
+                detail_text_for_gui = f"تم جلب الاسم: {member_obj.get_full_name_ar()}. {current_activity}"
+        elif member_obj.status == MemberStatus.HAS_RDV: 
+             detail_text_for_gui = f"لديه موعد محجوز بالفعل. الاسم: {member_obj.get_full_name_ar()}"
+        else: 
+             new_status = MemberStatus.INFO_FETCHED.value
+             detail_text_for_gui = f"تم جلب الاسم: {member_obj.get_full_name_ar()}. {current_activity}"
+        
+        detail_text_for_gui = detail_text_for_gui.strip()
+        if runner.is_running: runner.new_data_fetched_signal.emit(_row_of(runner, member_obj, main_list_idx), member_obj.nom_ar, member_obj.prenom_ar) 
+        _emit_member_log(runner, f"تم جلب اسم العضو.", member_obj, main_list_idx)
+        info_fetched_successfully = True
+    else: 
+        if MemberStatus.FETCHING_NAME.value in new_status : new_status = MemberStatus.INFO_FETCH_FAILED.value
+        detail_text_for_gui = "استجابة فارغة عند جلب معلومات الاسم."
+        api_error_occurred = True 
+        _emit_member_log(runner, f"فشل جلب اسم العضو: استجابة فارغة.", member_obj, main_list_idx)
+    
+    icon = get_icon_name_for_status(new_status)
+    _update_member_and_emit(runner, main_list_idx, member_obj, new_status, detail_text_for_gui, icon)
+    return info_fetched_successfully, api_error_occurred
+
+
+def process_available_dates_and_book(runner, main_list_idx, member_obj): 
+    if not runner.is_running: return False, False
+    operation_name_dates = "البحث عن مواعيد متاحة"
+    operation_name_book = "حجز الموعد"
+    member_display_name = get_member_display_name(member_obj, main_list_idx)
+
+    if not (member_obj.structure_id and member_obj.pre_inscription_id and member_obj.demandeur_id and member_obj.has_actual_pre_inscription):
+        detail_text = "معلومات ناقصة أو التسجيل المسبق غير مؤكد لمحاولة الحجز."
+        _update_member_and_emit(runner, main_list_idx, member_obj, member_obj.status, detail_text, get_icon_name_for_status(member_obj.status))
+        return False, False 
+    
+    _update_member_and_emit(runner, main_list_idx, member_obj, MemberStatus.SEARCHING_DATES.value, f"البحث عن مواعيد للعضو {member_display_name}", get_icon_name_for_status(MemberStatus.SEARCHING_DATES.value))
+    _emit_member_log(runner, f"جاري البحث عن مواعيد...", member_obj, main_list_idx)
+    data, error = runner.api_client.get_available_dates(member_obj.structure_id, member_obj.pre_inscription_id)
+    if not runner.is_running: return False, False
+    
+    new_status = member_obj.status
+    icon = get_icon_name_for_status(new_status)
+    booking_successful = False
+    api_error_occurred_this_stage = False 
+    detail_text_for_gui = member_obj.last_activity_detail
+
+    if error:
+        new_status = MemberStatus.DATES_FETCH_FAILED.value
+        detail_text_for_gui = _translate_api_error(error, operation_name_dates)
+        api_error_occurred_this_stage = True
+        _emit_member_log(runner, f"فشل جلب التواريخ: {detail_text_for_gui}", member_obj, main_list_idx)
+    elif data and "dates" in data:
+        available_dates = data["dates"]
+        SLOT_LEARNER.observe_dates(member_obj.structure_id, bool(available_dates))
+        if available_dates:
+            selected_date_str = available_dates[0] 
+            try:
+                day, month, year = selected_date_str.split('/')
+                formatted_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}" 
+            except ValueError:
+                new_status = MemberStatus.DATE_FORMAT_ERROR.value
+                detail_text_for_gui = f"تنسيق تاريخ غير صالح من الخادم: {selected_date_str}"
+                api_error_occurred_this_stage = True 
+                _emit_member_log(runner, f"خطأ في تنسيق التاريخ من الخادم: {selected_date_str}", member_obj, main_list_idx)
+                _update_member_and_emit(runner, main_list_idx, member_obj, new_status, detail_text_for_gui, get_icon_name_for_status(new_status))
+                return False, api_error_occurred_this_stage
+            
+            _update_member_and_emit(runner, main_list_idx, member_obj, MemberStatus.BOOKING.value, f"محاولة الحجز في {formatted_date}", get_icon_name_for_status(MemberStatus.BOOKING.value))
+            _emit_member_log(runner, f"جاري حجز موعد في تاريخ {formatted_date}", member_obj, main_list_idx)
+            if not (member_obj.ccp and member_obj.nom_fr and member_obj.prenom_fr):
+                new_status = MemberStatus.BOOKING_FAILED.value
+                detail_text_for_gui = "معلومات CCP أو الاسم الفرنسي مفقودة للحجز."
+                _emit_member_log(runner, f"فشل حجز الموعد: معلومات ناقصة (CCP أو الاسم الفرنسي).", member_obj, main_list_idx)
+                _update_member_and_emit(runner, main_list_idx, member_obj, new_status, detail_text_for_gui, get_icon_name_for_status(new_status))
+                return False, False 
+            ccp_error = validate_ccp(member_obj.ccp) # العضو هنا قبله الخادم: القواعد الأساسية فقط، دون مفتاح CCP
+            if ccp_error: # محاولة حجز برقم حساب خاطئ تُرفض من الخادم وتستهلك فرصة الحجز
+                new_status = MemberStatus.INPUT_ERROR.value
+                _emit_member_log(runner, f"لم تتم محاولة الحجز: {ccp_error}", member_obj, main_list_idx)
+                _update_member_and_emit(runner, main_list_idx, member_obj, new_status, ccp_error, get_icon_name_for_status(new_status))
+                return False, False 
+            
+            if not runner.is_running: return False, api_error_occurred_this_stage 
+            book_data, book_error = runner.api_client.create_rendezvous(
+                member_obj.pre_inscription_id, member_obj.ccp, member_obj.nom_fr, member_obj.prenom_fr,
+                formatted_date, member_obj.demandeur_id
+            )
+            if not runner.is_running: return False, api_error_occurred_this_stage 
+
+            if book_error: 
+                new_status = MemberStatus.BOOKING_FAILED.value
+                detail_text_for_gui = _translate_api_error(book_error, operation_name_book)
+                api_error_occurred_this_stage = True
+                _emit_member_log(runner, f"فشل حجز الموعد: {detail_text_for_gui}", member_obj, main_list_idx)
+            elif book_data: 
+                if isinstance(book_data, dict) and book_data.get("Eligible") is False and book_data.get("serviceUp") is True:
+                    new_status = MemberStatus.NOT_ELIGIBLE_BOOKING.value
+                    api_message = book_data.get("message") 
+                    if not api_message or not isinstance(api_message, str) or api_message.strip() == "":
+                         api_message = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+                    detail_text_for_gui = api_message
+                    _emit_member_log(runner, f"غير مؤهل للحجز: {api_message}", member_obj, main_list_idx)
+                    logger.warning(f"العضو {member_display_name} غير مؤهل للحجز (Eligible:false, serviceUp:true): {book_data}")
+                    api_error_occurred_this_stage = False 
+                elif isinstance(book_data, dict) and book_data.get("Eligible") is False : 
+                    new_status = MemberStatus.NOT_ELIGIBLE_BOOKING.value
+                    api_message = book_data.get("message", "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة.")
+                    detail_text_for_gui = api_message
+                    _emit_member_log(runner, f"غير مؤهل للحجز: {api_message}", member_obj, main_list_idx)
+                    logger.warning(f"العضو {member_display_name} غير مؤهل للحجز حسب استجابة الخادم: {book_data}")
+                    api_error_occurred_this_stage = False 
+                elif isinstance(book_data, dict) and book_data.get("code") == 0 and book_data.get("rendezVousId"): 
+                    member_obj.rdv_id = book_data.get("rendezVousId")
+                    member_obj.rdv_date = formatted_date 
+                    member_obj.rdv_source = "system" # Set source to system
+                    new_status = MemberStatus.BOOKED.value
+                    detail_text_for_gui = f"تم الحجز بنجاح في: {formatted_date}, ID: {member_obj.rdv_id}"
+                    _emit_member_log(runner, f"تم حجز موعد بنجاح في {formatted_date}", member_obj, main_list_idx)
+                    booking_successful = True
+                else: 
+                    new_status = MemberStatus.BOOKING_FAILED.value
+                    err_msg_detail = str(book_data.get("message", "خطأ غير معروف من الخادم عند الحجز")) if isinstance(book_data, dict) else str(book_data)
+                    
+                    if isinstance(book_data, dict) and "raw_text" in book_data and "\"Eligible\":false" in book_data["raw_text"].lower(): 
+                         new_status = MemberStatus.NOT_ELIGIBLE_BOOKING.value
+                         raw_text_message = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة. (استجابة نصية)"
+                         try:
+                             parsed_raw = json.loads(book_data["raw_text"])
+                             if "message" in parsed_raw: raw_text_message = parsed_raw["message"]
+                         except: pass 
+
+                         detail_text_for_gui = raw_text_message
+                         _emit_member_log(runner, f"غير مؤهل للحجز (استجابة نصية): {raw_text_message}", member_obj, main_list_idx)
+                         logger.warning(f"العضو {member_display_name} غير مؤهل للحجز (استجابة نصية): {book_data['raw_text'][:200]}")
+                         api_error_occurred_this_stage = False
+                    else:
+                        detail_text_for_gui = f"فشل الحجز: {err_msg_detail}"
+                        api_error_occurred_this_stage = True 
+                        _emit_member_log(runner, f"فشل حجز الموعد: {detail_text_for_gui}", member_obj, main_list_idx)
+            else: 
+                new_status = MemberStatus.BOOKING_FAILED.value
+                detail_text_for_gui = "استجابة غير متوقعة أو فارغة عند محاولة الحجز."
+                api_error_occurred_this_stage = True
+                _emit_member_log(runner, f"فشل حجز الموعد: استجابة غير متوقعة.", member_obj, main_list_idx)
+        else: 
+            new_status = MemberStatus.NO_DATES.value
+            detail_text_for_gui = "لا توجد مواعيد متاحة حاليًا للحجز."
+            _emit_member_log(runner, f"لا توجد مواعيد متاحة.", member_obj, main_list_idx)
+            if not member_obj.has_actual_pre_inscription: 
+                new_status = MemberStatus.REQUIRES_PRE_INSCRIPTION.value
+                detail_text_for_gui = "مؤهل ولكن لا يوجد تسجيل مسبق بعد (لا مواعيد متاحة حاليًا)."
+    else: 
+        new_status = MemberStatus.DATES_FETCH_FAILED.value
+        detail_text_for_gui = "لم يتم العثور على تواريخ أو استجابة غير صالحة من الخادم."
+        api_error_occurred_this_stage = True
+        _emit_member_log(runner, f"فشل جلب التواريخ: استجابة غير صالحة.", member_obj, main_list_idx)
+    
+    icon = get_icon_name_for_status(new_status)
+    _update_member_and_emit(runner, main_list_idx, member_obj, new_status, detail_text_for_gui, icon)
+    return booking_successful, api_error_occurred_this_stage
+
+
+def _download_single_pdf(runner, main_list_idx, member_obj, report_type, filename_suffix_base):
+    if not runner.is_running: return None, False, "", ""
+    operation_name = f"تحميل شهادة {filename_suffix_base}"
+    member_display_name = get_member_display_name(member_obj, main_list_idx)
+    file_path = None
+    success = False
+    error_msg_for_toast = ""
+    status_msg_for_gui_cell = f"جاري تحميل {filename_suffix_base}..."
+    
+    current_path_attr = 'pdf_honneur_path' if report_type == "HonneurEngagementReport" else 'pdf_rdv_path'
+    
+    already_stored = is_member_pdf_stored(member_obj, report_type)
+    if already_stored:
+        logger.info(f"ملف {report_type} موجود بالفعل في المخزن للعضو {member_display_name}. تخطي التحميل.")
+    else:
+        _update_member_and_emit(runner, main_list_idx, member_obj, status_msg_for_gui_cell, f"بدء تحميل {report_type}", get_icon_name_for_status(status_msg_for_gui_cell))
+        _emit_member_log(runner, f"جاري تحميل شهادة {filename_suffix_base}...", member_obj, main_list_idx)
+    if not runner.is_running: return None, False, "", "" 
+    view_path, api_err, _ = fetch_member_pdf(runner.api_client, member_obj, report_type, filename_suffix_base)
+    if not runner.is_running: return None, False, "", "" 
+
+    if api_err:
+        error_msg_for_toast = _translate_api_error(api_err, operation_name)
+        _emit_member_log(runner, f"فشل تحميل شهادة {filename_suffix_base}: {error_msg_for_toast}", member_obj, main_list_idx)
+    else:
+        file_path = view_path
+        setattr(member_obj, current_path_attr, file_path) 
+        success = True
+        if already_stored:
+            status_msg_for_gui_cell = f"شهادة {filename_suffix_base} موجودة بالفعل."
+        else:
+            status_msg_for_gui_cell = f"تم تحميل {os.path.basename(file_path)} بنجاح."
+            _emit_member_log(runner, f"تم تحميل شهادة {filename_suffix_base} بنجاح.", member_obj, main_list_idx)
+    
+    if not success:
+        status_msg_for_gui_cell = f"فشل تحميل {filename_suffix_base}: {error_msg_for_toast.split(':')[0]}" 
+    
+    return file_path, success, error_msg_for_toast, status_msg_for_gui_cell
+
+
+def process_pdf_download(runner, main_list_idx, member_obj): 
+    if not runner.is_running: return False, False
+    member_display_name = get_member_display_name(member_obj, main_list_idx)
+    previous_status = member_obj.status
+    started_at = time.monotonic()
+    if not member_obj.pre_inscription_id:
+        detail_text = "ID التسجيل مفقود لتحميل PDF."
+        _update_member_and_emit(runner, main_list_idx, member_obj, member_obj.status, detail_text, get_icon_name_for_status(member_obj.status))
+        return False, False 
+    
+    all_relevant_pdfs_downloaded_successfully = True
+    any_api_error_this_pdf_stage = False
+    download_details_agg = [] 
+
+    if not runner.is_running: return False, any_api_error_this_pdf_stage 
+    fp_h, s_h, err_h, stat_h = _download_single_pdf(runner, main_list_idx, member_obj, "HonneurEngagementReport", "التزام")
+    download_details_agg.append(stat_h)
+    if not s_h: all_relevant_pdfs_downloaded_successfully = False
+    if err_h: any_api_error_this_pdf_stage = True 
+    
+    if runner.is_running and (member_obj.already_has_rdv or member_obj.rdv_id): 
+        fp_r, s_r, err_r, stat_r = _download_single_pdf(runner, main_list_idx, member_obj, "RdvReport", "موعد")
+        download_details_agg.append(stat_r)
+        if not s_r: all_relevant_pdfs_downloaded_successfully = False
+        if err_r: any_api_error_this_pdf_stage = True
+    elif runner.is_running: 
+        msg_skip_rdv = "شهادة الموعد غير مطلوبة (لا يوجد موعد مسجل)."
+        logger.info(msg_skip_rdv + f" للعضو {member_display_name}")
+        download_details_agg.append(msg_skip_rdv)
+    
+    final_status_after_pdfs = member_obj.status
+    if all_relevant_pdfs_downloaded_successfully:
+        if member_obj.status != MemberStatus.BENEFITING: 
+             final_status_after_pdfs = MemberStatus.COMPLETED.value
+    else:
+        if MemberStatus.PDF_DOWNLOAD_FAILED.value not in final_status_after_pdfs and member_obj.status != MemberStatus.BENEFITING: 
+            final_status_after_pdfs = MemberStatus.PDF_DOWNLOAD_FAILED.value 
+        
+    final_detail_message = "; ".join(msg for msg in download_details_agg if msg) 
+    _update_member_and_emit(runner, main_list_idx, member_obj, final_status_after_pdfs, final_detail_message, get_icon_name_for_status(final_status_after_pdfs))
+    STATUS_HISTORY.record(member_obj, previous_status, "pdf_download", started_at)
+    
+    return all_relevant_pdfs_downloaded_successfully, any_api_error_this_pdf_stage
@@ -0,0 +1,423 @@
+# pdf_store.py
+"""
+مخزن الشهادات: كل ملف PDF يُحفظ مرة واحدة باسم بصمته (SHA-256) ويُفهرس بالمفتاح (pre_inscription_id, نوع الشهادة)
+في ملف manifest.json. مجلدات الأعضاء بأسمائهم مجرد نسخ عرض (روابط صلبة أو نسخ عادية) فوق المخزن،
+فتغيير اسم العضو أو حذف مجلده لا يفقد الشهادة، ومعرفة وجودها بحث في الفهرس وليس فحصًا للقرص.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+from config import PDF_STORE_DIR_NAME, PDF_MIN_VALID_SIZE_BYTES
+from utils import get_pdf_output_root, get_member_pdf_dir, get_member_pdf_path
+
+logger = logging.getLogger(__name__)
+
+PDF_HEADER = b"%PDF-"
+PDF_EOF_MARKER = b"%%EOF"
+_EOF_SEARCH_BYTES = 2048
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def validate_pdf_file(file_path):
+    """
+    فحص سريع للملف: الحجم الأدنى، ترويسة %PDF-، وعلامة %%EOF في آخره (الملف المقطوع لا يحتويها).
+    Returns:
+        str or None: سبب الرفض، أو None إذا كان الملف صالحًا.
+    """
+    try:
+        size = os.path.getsize(file_path)
+        if size < PDF_MIN_VALID_SIZE_BYTES:
+            return f"حجم الملف صغير جدًا ({size} بايت)"
+        with open(file_path, 'rb') as f:
+            if f.read(len(PDF_HEADER)) != PDF_HEADER:
+                return "ترويسة PDF مفقودة"
+            f.seek(max(0, size - _EOF_SEARCH_BYTES))
+            if PDF_EOF_MARKER not in f.read():
+                return "الملف مقطوع (علامة %%EOF مفقودة)"
+    except OSError as e:
+        return f"تعذر قراءة الملف: {e}"
+    return None
+
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _link_or_copy(source_path, destination_path):
+    # الرابط الصلب لا يستهلك مساحة إضافية؛ يفشل على أنظمة ملفات لا تدعمه أو بين قرصين مختلفين
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copyfile(source_path, destination_path)
+
+
+class PdfFileIndex:
+    """
+    فهرس في الذاكرة لملفات PDF تحت مجلد الشهادات (نسخ العرض وملفات المخزن): المسار -> الحجم.
+    يُبنى بمسح واحد للشجرة عند أول استخدام، ثم يُحدَّث من كتاباتنا ومن مراقب نظام الملفات إن وُجد،
+    فلا تلمس حلقة المراقبة القرص لمعرفة وجود ملف (مهم إذا كان مجلد المستندات على الشبكة).
+    """
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self._files = None
+        self._dirs = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @property
+    def is_built(self):
+        return self._files is not None
+
+    def _scan_tree(self, top_dir):
+        files, dirs = {}, set()
+        for dir_path, _, file_names in os.walk(top_dir):
+            dirs.add(self.normalize(dir_path))
+            for file_name in file_names:
+                if not file_name.lower().endswith(".pdf"):
+                    continue
+                file_path = os.path.join(dir_path, file_name)
+                try:
+                    files[self.normalize(file_path)] = os.path.getsize(file_path)
+                except OSError:
+                    pass
+        return files, dirs
+
+    def _ensure_built(self):
+        if self._files is not None:
+            return
+        started_at = time.perf_counter()
+        self._files, self._dirs = self._scan_tree(self.root_dir)
+        logger.info(f"فهرس ملفات الشهادات: {len(self._files)} ملف في {len(self._dirs)} مجلد ({(time.perf_counter() - started_at) * 1000:.0f} ms).")
+
+    def get_size(self, file_path):
+        if not file_path:
+            return None
+        with self._lock:
+            self._ensure_built()
+            return self._files.get(self.normalize(file_path))
+
+    def contains(self, file_path):
+        return self.get_size(file_path) is not None
+
+    def record(self, file_path, size):
+        with self._lock:
+            self._ensure_built()
+            self._files[self.normalize(file_path)] = size
+            # المجلدات التي أنشأناها (مجلد العضو، blobs/xx) تُضاف حتى يراقبها مراقب نظام الملفات
+            normalized_root = self.normalize(self.root_dir)
+            dir_path = self.normalize(os.path.dirname(file_path))
+            while dir_path not in self._dirs and dir_path.startswith(normalized_root):
+                self._dirs.add(dir_path)
+                dir_path = os.path.dirname(dir_path)
+
+    def discard(self, file_path):
+        with self._lock:
+            if self._files is not None:
+                self._files.pop(self.normalize(file_path), None)
+
+    def watched_dirs(self):
+        with self._lock:
+            self._ensure_built()
+            return sorted(self._dirs)
+
+    def refresh_dir(self, dir_path):
+        """
+        يعيد مسح مجلد واحد بعد تغيير خارجي (مراقب نظام الملفات). المجلدات الفرعية الجديدة تُمسح كاملة.
+        Returns:
+            list: المجلدات الجديدة التي يجب إضافتها للمراقبة.
+        """
+        normalized_dir = self.normalize(dir_path)
+        fresh_files, new_dirs = {}, set()
+        dir_exists = os.path.isdir(dir_path)
+        if dir_exists:
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            if self.normalize(entry.path) not in self._dirs:
+                                sub_files, sub_dirs = self._scan_tree(entry.path)
+                                fresh_files.update(sub_files)
+                                new_dirs.update(sub_dirs)
+                        elif entry.name.lower().endswith(".pdf"):
+                            fresh_files[self.normalize(entry.path)] = entry.stat().st_size
+            except OSError as e:
+                logger.debug(f"تعذر إعادة مسح المجلد {dir_path}: {e}")
+                return []
+        with self._lock:
+            if self._files is None:
+                return []
+            prefix = normalized_dir + os.sep
+            if dir_exists:
+                stale = [p for p in self._files if os.path.dirname(p) == normalized_dir]
+            else:
+                stale = [p for p in self._files if p.startswith(prefix)]
+                self._dirs = {d for d in self._dirs if d != normalized_dir and not d.startswith(prefix)}
+            for stale_path in stale:
+                del self._files[stale_path]
+            self._files.update(fresh_files)
+            self._dirs.update(new_dirs)
+        return sorted(new_dirs)
+
+
+class PdfStore:
+    def __init__(self, root_dir, file_index):
+        self.root_dir = root_dir
+        self.file_index = file_index
+        self.blobs_dir = os.path.join(root_dir, "blobs")
+        self.manifest_file = os.path.join(root_dir, "manifest.json")
+        self._entries = None # key -> {"sha256", "size", "stored_at"}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(pre_inscription_id, report_type):
+        return f"{pre_inscription_id}:{report_type}"
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, sha256[:2], f"{sha256}.pdf")
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        stored_entries = {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                stored_entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"تعذر قراءة فهرس مخزن الشهادات {self.manifest_file}: {e}")
+
+        # مطابقة الفهرس مع فهرس الملفات مرة واحدة عند التحميل: الملف المحذوف أو المختلف الحجم يُسقط ويُعاد تحميله
+        self._entries = {}
+        for key, entry in stored_entries.items():
+            try:
+                if self.file_index.get_size(self._blob_path(entry["sha256"])) == entry["size"]:
+                    self._entries[key] = entry
+                    continue
+            except (KeyError, TypeError):
+                pass
+            logger.warning(f"مخزن الشهادات: الملف المخزن لـ {key} مفقود أو تالف، سيُعاد تحميله.")
+        if len(self._entries) != len(stored_entries):
+            self._save_manifest()
+        logger.info(f"مخزن الشهادات: {len(self._entries)} شهادة مفهرسة في {self.root_dir}")
+
+    def _save_manifest(self):
+        os.makedirs(self.root_dir, exist_ok=True)
+        temp_file = self.manifest_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1)
+            os.replace(temp_file, self.manifest_file)
+        except OSError as e:
+            logger.error(f"خطأ عند حفظ فهرس مخزن الشهادات: {e}")
+
+    def get(self, pre_inscription_id, report_type):
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(self.make_key(pre_inscription_id, report_type))
+            entry = dict(entry) if entry else None
+        # ملف مخزن حذف من خارج البرنامج (يكتشفه مراقب نظام الملفات) يُعامل كغير موجود
+        if entry and self.file_index.get_size(self._blob_path(entry["sha256"])) != entry["size"]:
+            return None
+        return entry
+
+    def has(self, pre_inscription_id, report_type):
+        return self.get(pre_inscription_id, report_type) is not None
+
+    def new_incoming_path(self):
+        """مسار مؤقت داخل المخزن (نفس القرص) لتنزيل ملف جديد قبل put_file."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        fd, incoming_path = tempfile.mkstemp(dir=self.root_dir, prefix="incoming_", suffix=".pdf")
+        os.close(fd)
+        return incoming_path
+
+    def put_file(self, pre_inscription_id, report_type, source_path, move=True):
+        """
+        يتحقق من الملف ويحسب بصمته ثم يضعه في المخزن ويحدّث الفهرس.
+        move=True: يُنقل الملف (تنزيل جديد)، وإلا يُربط/يُنسخ (ملف قديم من مجلد عضو).
+        Returns:
+            tuple: (entry, error_message)
+        """
+        rejection_reason = validate_pdf_file(source_path)
+        if rejection_reason:
+            if move:
+                self._remove_quietly(source_path)
+            return None, f"ملف PDF غير صالح: {rejection_reason}"
+
+        sha256, size = _hash_file(source_path)
+        blob_path = self._blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if os.path.exists(blob_path):
+            if move:
+                self._remove_quietly(source_path) # نفس المحتوى مخزن مسبقًا
+        elif move:
+            os.replace(source_path, blob_path)
+        else:
+            temp_blob_path = blob_path + ".tmp"
+            self._remove_quietly(temp_blob_path)
+            _link_or_copy(source_path, temp_blob_path)
+            os.replace(temp_blob_path, blob_path)
+        self.file_index.record(blob_path, size)
+
+        entry = {"sha256": sha256, "size": size, "stored_at": int(time.time())}
+        key = self.make_key(pre_inscription_id, report_type)
+        with self._lock:
+            self._ensure_loaded()
+            previous_entry = self._entries.get(key)
+            self._entries[key] = entry
+            self._save_manifest()
+            if previous_entry and previous_entry["sha256"] != sha256 and \
+               not any(e["sha256"] == previous_entry["sha256"] for e in self._entries.values()):
+                self._remove_quietly(self._blob_path(previous_entry["sha256"]))
+                self.file_index.discard(self._blob_path(previous_entry["sha256"]))
+        return entry, None
+
+    def export_view(self, pre_inscription_id, report_type, view_path):
+        """ينشئ نسخة العرض في مجلد العضو من الملف المخزن (لا شيء إذا كانت مفهرسة بنفس الحجم)."""
+        entry = self.get(pre_inscription_id, report_type)
+        if entry is None:
+            return False
+        if self.file_index.get_size(view_path) == entry["size"]:
+            return True
+        blob_path = self._blob_path(entry["sha256"])
+        os.makedirs(os.path.dirname(view_path), exist_ok=True)
+        temp_view_path = view_path + ".tmp"
+        self._remove_quietly(temp_view_path)
+        _link_or_copy(blob_path, temp_view_path)
+        os.replace(temp_view_path, view_path)
+        self.file_index.record(view_path, entry["size"])
+        return True
+
+    def verify(self, pre_inscription_id, report_type):
+        """إعادة حساب البصمة (عند الطلب فقط). الملف غير المطابق يُسقط من الفهرس."""
+        entry = self.get(pre_inscription_id, report_type)
+        if entry is None:
+            return False
+        try:
+            sha256, _ = _hash_file(self._blob_path(entry["sha256"]))
+        except OSError:
+            sha256 = None
+        if sha256 == entry["sha256"]:
+            return True
+        logger.warning(f"مخزن الشهادات: بصمة {self.make_key(pre_inscription_id, report_type)} غير مطابقة، تم إسقاطها.")
+        self.file_index.discard(self._blob_path(entry["sha256"]))
+        with self._lock:
+            self._entries.pop(self.make_key(pre_inscription_id, report_type), None)
+            self._save_manifest()
+        return False
+
+    @staticmethod
+    def _remove_quietly(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+_pdf_store = None
+_pdf_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    # المسار يعتمد على QStandardPaths، لذا يُنشأ المخزن عند أول استخدام (في خيط عامل) وليس عند الاستيراد
+    global _pdf_store
+    with _pdf_store_lock:
+        if _pdf_store is None:
+            output_root = get_pdf_output_root()
+            _pdf_store = PdfStore(os.path.join(output_root, PDF_STORE_DIR_NAME), PdfFileIndex(output_root))
+        return _pdf_store
+
+
+def is_member_pdf_stored(member, report_type):
+    """هل الشهادة في المخزن؟ بحث في الفهرس فقط دون أي قراءة أو كتابة للملفات."""
+    return get_pdf_store().has(member.pre_inscription_id, report_type)
+
+
+# مسار الملف القديم (من قبل المخزن) في كائن العضو لكل نوع شهادة
+LEGACY_PATH_ATTRS = {"HonneurEngagementReport": "pdf_honneur_path", "RdvReport": "pdf_rdv_path"}
+
+
+def _adopt_legacy_pdf(store, member, report_type):
+    """
+    يضم ملفًا قديمًا صالحًا من مجلد العضو إلى المخزن بدل تنزيله من جديد.
+    أي خطأ في القراءة أو النسخ يُسجل فقط، فتُنزَّل الشهادة كالمعتاد.
+    Returns:
+        bool: True إذا ضُم الملف.
+    """
+    legacy_path = getattr(member, LEGACY_PATH_ATTRS.get(report_type, ""), None)
+    if not store.file_index.contains(legacy_path):
+        return False
+    try:
+        entry, store_err = store.put_file(member.pre_inscription_id, report_type, legacy_path, move=False)
+    except OSError as e:
+        logger.warning(f"تعذر ضم الملف الموجود {legacy_path} إلى مخزن الشهادات، سيُعاد تنزيله: {e}")
+        return False
+    if not entry:
+        logger.info(f"الملف الموجود {legacy_path} غير صالح ({store_err})، سيُعاد تنزيله.")
+        return False
+    logger.info(f"تم ضم الملف الموجود {legacy_path} إلى مخزن الشهادات.")
+    return True
+
+
+# قفل لكل مفتاح (pre_inscription_id, نوع الشهادة): المراقبة والتحميل الجماعي وزر الصف قد تطلب نفس الشهادة معًا
+_fetch_locks = {}
+_fetch_locks_lock = threading.Lock()
+
+
+def _fetch_lock_for(pre_inscription_id, report_type):
+    with _fetch_locks_lock:
+        return _fetch_locks.setdefault((str(pre_inscription_id), report_type), threading.Lock())
+
+
+def fetch_member_pdf(api_client, member, report_type, filename_suffix_base):
+    """
+    يضمن وجود الشهادة في المخزن (ضم الملف القديم من مجلد العضو أو تنزيلها إذا لزم) ثم ينشئ نسخة العرض في مجلد العضو.
+    الطلبات المتزامنة لنفس الشهادة تُنفذ واحدًا تلو الآخر: الأول ينزلها والبقية يجدونها في المخزن.
+    Returns:
+        tuple: (view_path, error_message, downloaded)
+    """
+    with _fetch_lock_for(member.pre_inscription_id, report_type):
+        return _fetch_member_pdf_locked(api_client, member, report_type, filename_suffix_base)
+
+
+def _fetch_member_pdf_locked(api_client, member, report_type, filename_suffix_base):
+    store = get_pdf_store()
+    downloaded = False
+    if not store.has(member.pre_inscription_id, report_type) and not _adopt_legacy_pdf(store, member, report_type):
+        incoming_path = store.new_incoming_path()
+        _, api_err = api_client.download_pdf_to_file(report_type, member.pre_inscription_id, incoming_path)
+        if api_err:
+            PdfStore._remove_quietly(incoming_path)
+            return None, api_err, False
+        try:
+            _, store_err = store.put_file(member.pre_inscription_id, report_type, incoming_path)
+        except OSError as e:
+            PdfStore._remove_quietly(incoming_path)
+            store_err = f"خطأ في حفظ الملف: {e}"
+        if store_err:
+            logger.error(f"رفض ملف {report_type} للتسجيل {member.pre_inscription_id}: {store_err}")
+            return None, store_err, False
+        downloaded = True
+
+    view_path = get_member_pdf_path(member, filename_suffix_base, get_member_pdf_dir(member))
+    try:
+        store.export_view(member.pre_inscription_id, report_type, view_path)
+    except OSError as e:
+        logger.error(f"فشل إنشاء نسخة العرض {view_path}: {e}")
+        return None, f"خطأ في حفظ الملف: {e}", downloaded
+    return view_path, None, downloaded
@@ -0,0 +1,178 @@
+# pdf_stream.py
+"""
+كتابة ملف PDF من استجابة download/* مباشرة إلى القرص أثناء استلامها.
+الاستجابة إما JSON فيه الحقل "base64Pdf"، أو نص JSON واحد (base64)، أو PDF خام.
+يُحلل النص تدريجيًا ويُفك ترميز base64 على دفعات، فتبقى الذاكرة المستخدمة ثابتة مهما كان حجم الملف.
+"""
+import os
+import base64
+import binascii
+import tempfile
+
+PDF_FIELD_PATTERN = b'"base64Pdf"'
+STREAM_CHUNK_SIZE = 64 * 1024
+_JSON_WHITESPACE = b" \t\r\n"
+_ESCAPE_IGNORED = {ord('n'), ord('r'), ord('t')}
+
+
+class PdfStreamError(Exception):
+    response_preview = b""
+
+
+class Base64PdfStreamWriter:
+    """
+    آلة حالات صغيرة: البحث عن "base64Pdf" ثم ':' ثم '"'، ثم قراءة محتوى السلسلة حتى '"' غير مُهرَّبة.
+    تدعم الهروب '\\/' الذي ترسله بعض خوادم .NET، وتتجاهل فواصل الأسطر داخل base64.
+    """
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.bytes_written = 0
+        self._state = "start" # start / seek_key / seek_colon / seek_quote / in_string / raw / done
+        self._seek_buffer = b""
+        self._b64_buffer = bytearray()
+        self._pending_escape = False
+        self._unicode_escape = None # bytearray أثناء قراءة \uXXXX
+        self.response_preview = b"" # أول بايتات الاستجابة لرسائل الخطأ
+
+    def feed(self, chunk):
+        if len(self.response_preview) < 300:
+            self.response_preview += chunk[:300 - len(self.response_preview)]
+        position = 0
+        while position < len(chunk) and self._state != "done":
+            if self._state == "start":
+                stripped = chunk[position:].lstrip(_JSON_WHITESPACE)
+                if not stripped:
+                    return
+                position = len(chunk) - len(stripped)
+                if stripped.startswith(b"%PDF") or (stripped[:1] == b"%" and len(stripped) < 4):
+                    self._state = "raw"
+                elif stripped[:1] == b'"':
+                    self._state = "in_string" # الاستجابة نفسها سلسلة base64
+                    position += 1
+                else:
+                    self._state = "seek_key"
+            elif self._state == "raw":
+                self._write(chunk[position:])
+                return
+            elif self._state == "seek_key":
+                data = self._seek_buffer + chunk[position:]
+                found = data.find(PDF_FIELD_PATTERN)
+                if found == -1:
+                    self._seek_buffer = data[-(len(PDF_FIELD_PATTERN) - 1):]
+                    return
+                consumed_from_chunk = found + len(PDF_FIELD_PATTERN) - len(self._seek_buffer)
+                self._seek_buffer = b""
+                position += consumed_from_chunk
+                self._state = "seek_colon"
+            elif self._state in ("seek_colon", "seek_quote"):
+                byte = chunk[position]
+                position += 1
+                if byte in _JSON_WHITESPACE:
+                    continue
+                expected = ord(':') if self._state == "seek_colon" else ord('"')
+                if byte != expected:
+                    if self._state == "seek_quote" and byte == ord('n'):
+                        raise PdfStreamError("حقل base64Pdf فارغ (null) في استجابة الخادم.")
+                    # لم يكن مفتاحًا فعليًا (مثلًا النص ظهر داخل قيمة أخرى): نواصل البحث
+                    self._state = "seek_key"
+                    continue
+                self._state = "seek_quote" if self._state == "seek_colon" else "in_string"
+            elif self._state == "in_string":
+                position = self._consume_string(chunk, position)
+        self._flush_b64(final=False)
+
+    def _consume_string(self, chunk, position):
+        end = len(chunk)
+        while position < end:
+            byte = chunk[position]
+            if self._unicode_escape is not None:
+                self._unicode_escape.append(byte)
+                position += 1
+                if len(self._unicode_escape) == 4:
+                    self._b64_buffer.append(int(self._unicode_escape, 16) & 0x7F)
+                    self._unicode_escape = None
+                continue
+            if self._pending_escape:
+                self._pending_escape = False
+                position += 1
+                if byte == ord('u'):
+                    self._unicode_escape = bytearray()
+                elif byte not in _ESCAPE_IGNORED:
+                    self._b64_buffer.append(byte) # '\/' -> '/'
+                continue
+            # أسرع مسار: نسخ كتلة كاملة حتى أول '"' أو '\'
+            next_quote = chunk.find(b'"', position)
+            next_backslash = chunk.find(b'\\', position)
+            stop = min(i for i in (next_quote, next_backslash, end) if i != -1)
+            self._b64_buffer += chunk[position:stop]
+            position = stop
+            if position == end:
+                break
+            if chunk[position] == ord('\\'):
+                self._pending_escape = True
+                position += 1
+            else:
+                self._state = "done"
+                return end
+        return position
+
+    def _flush_b64(self, final):
+        if not self._b64_buffer:
+            return
+        if not final:
+            # نفك فقط أكبر جزء طوله مضاعف لـ 4 بعد حذف فواصل الأسطر
+            cleaned = bytes(self._b64_buffer).translate(None, _JSON_WHITESPACE)
+            usable_length = len(cleaned) - (len(cleaned) % 4)
+            to_decode, remainder = cleaned[:usable_length], cleaned[usable_length:]
+        else:
+            to_decode, remainder = bytes(self._b64_buffer).translate(None, _JSON_WHITESPACE), b""
+        self._b64_buffer = bytearray(remainder)
+        if to_decode:
+            try:
+                self._write(base64.b64decode(to_decode))
+            except (binascii.Error, ValueError) as e:
+                raise PdfStreamError(f"ترميز base64 غير صالح في استجابة الخادم: {e}")
+
+    def _write(self, data):
+        if data:
+            self.output_file.write(data)
+            self.bytes_written += len(data)
+
+    def finish(self):
+        if self._state == "raw":
+            return
+        if self._state != "done":
+            raise PdfStreamError("لم يتم العثور على محتوى PDF (base64Pdf) كامل في استجابة الخادم.")
+        self._flush_b64(final=True)
+
+
+def write_pdf_stream(chunks, destination_path):
+    """
+    يكتب تدفق البايتات (iter_content) إلى ملف مؤقت في نفس المجلد ثم يستبدل به destination_path ذريًا.
+    Returns:
+        int: عدد البايتات المكتوبة.
+    Raises:
+        PdfStreamError: إذا لم تحتوِ الاستجابة على PDF صالح (يُحذف الملف المؤقت).
+    """
+    directory = os.path.dirname(destination_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    writer = None
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            writer = Base64PdfStreamWriter(temp_file)
+            for chunk in chunks:
+                if chunk:
+                    writer.feed(chunk)
+            writer.finish()
+        if writer.bytes_written == 0:
+            raise PdfStreamError("ملف PDF فارغ في استجابة الخادم.")
+        os.replace(temp_path, destination_path)
+        return writer.bytes_written
+    except BaseException as e:
+        if isinstance(e, PdfStreamError) and writer is not None:
+            e.response_preview = writer.response_preview
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
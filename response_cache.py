@@ -0,0 +1,129 @@
+# response_cache.py
+"""
+ذاكرة تخزين مؤقت لاستجابات الواجهة البرمجية ذات البيانات الثابتة (أسماء التسجيل المسبق).
+لكل مسار سياسة خاصة (مدة الصلاحية، الحفظ على القرص، الحقل المطلوب في الاستجابة).
+المسارات غير المذكورة في السياسات لا تُخزن أبدًا (التحقق، التواريخ المتاحة، إنشاء الموعد).
+"""
+import os
+import json
+import time
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from config import RESPONSE_CACHE_FILE, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_POLICIES
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    def __init__(self, policies, max_entries, persist_file=None):
+        self.policies = policies
+        self.max_entries = max_entries
+        self.persist_file = persist_file
+        self._entries = OrderedDict() # key -> (expires_at, endpoint, value) بترتيب آخر استخدام
+        self._lock = threading.Lock()
+        self._loaded = persist_file is None
+        self._stats = {} # endpoint -> [hits, misses]
+
+    def _policy_for(self, endpoint):
+        for endpoint_prefix, policy in self.policies.items():
+            if endpoint.startswith(endpoint_prefix):
+                return policy
+        return None
+
+    @staticmethod
+    def make_key(endpoint, params):
+        return f"{endpoint}?{urlencode(sorted((params or {}).items()))}"
+
+    def is_cacheable(self, endpoint):
+        return self._policy_for(endpoint) is not None
+
+    def get(self, endpoint, params):
+        if not self.is_cacheable(endpoint):
+            return None
+        self._ensure_loaded()
+        key = self.make_key(endpoint, params)
+        stats_key = endpoint.split('?')[0]
+        with self._lock:
+            endpoint_stats = self._stats.setdefault(stats_key, [0, 0])
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                endpoint_stats[1] += 1
+                return None
+            self._entries.move_to_end(key)
+            endpoint_stats[0] += 1
+            value = entry[2]
+        return copy.deepcopy(value)
+
+    def put(self, endpoint, params, value):
+        policy = self._policy_for(endpoint)
+        if policy is None or value is None:
+            return
+        ttl_seconds, _, required_field = policy
+        if required_field and not (isinstance(value, dict) and value.get(required_field)):
+            return # استجابة ناقصة أو رسالة خطأ من الخادم: لا تُخزن
+        self._ensure_loaded()
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, endpoint, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint, params):
+        with self._lock:
+            self._entries.pop(self.make_key(endpoint, params), None)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.persist_file):
+                return
+            try:
+                with open(self.persist_file, 'r', encoding='utf-8') as f:
+                    stored_entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"تعذر قراءة ملف ذاكرة الاستجابات المؤقتة {self.persist_file}: {e}")
+                return
+            now = time.time()
+            for key, (expires_at, endpoint, value) in stored_entries.items():
+                if expires_at > now and self._policy_for(endpoint) is not None:
+                    self._entries[key] = (expires_at, endpoint, value)
+            logger.info(f"تم تحميل {len(self._entries)} استجابة مخزنة مؤقتًا من {self.persist_file}")
+
+    def save(self):
+        if not self.persist_file or not self._loaded:
+            return
+        now = time.time()
+        with self._lock:
+            to_store = {
+                key: list(entry) for key, entry in self._entries.items()
+                if entry[0] > now and self._policy_for(entry[1])[1]
+            }
+        temp_file = self.persist_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(to_store, f, ensure_ascii=False)
+            os.replace(temp_file, self.persist_file)
+        except OSError as e:
+            logger.error(f"خطأ عند حفظ ذاكرة الاستجابات المؤقتة: {e}")
+
+    def stats_summary(self):
+        with self._lock:
+            parts = []
+            for endpoint, (hits, misses) in sorted(self._stats.items()):
+                total = hits + misses
+                parts.append(f"{endpoint}: {hits}/{total} ({hits * 100 // total if total else 0}%)")
+        return "، ".join(parts) if parts else "لا توجد طلبات قابلة للتخزين بعد"
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_POLICIES, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_FILE)
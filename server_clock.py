@@ -0,0 +1,116 @@
+# server_clock.py
+"""
+تقدير فرق الساعة بين الجهاز والخادم وزمن الذهاب والإياب (RTT) من ترويسة Date في كل استجابة.
+ترويسة Date دقتها ثانية واحدة، لكن كل استجابة تحصر الفرق في مجال [Date - وقت الاستلام، Date + 1 - وقت الإرسال]،
+وتقاطع هذه المجالات عبر الاستجابات المتتالية يضيّق التقدير إلى أجزاء من الثانية.
+يسمح ذلك بإرسال طلب بحيث يصل إلى الخادم عند وقت خادم محدد (مثلًا لحظة فتح المواعيد).
+"""
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+from config import SERVER_CLOCK_MAX_DRIFT_PER_SECOND, SERVER_CLOCK_RTT_SMOOTHING
+
+logger = logging.getLogger(__name__)
+
+SLEEP_SLICE_SECONDS = 0.5 # أقصى مدة نوم متواصل في sleep_until قبل إعادة فحص should_continue
+
+
+class ServerClock:
+    def __init__(self, max_drift_per_second=1e-4, rtt_smoothing=0.2):
+        self.max_drift_per_second = max_drift_per_second
+        self.rtt_smoothing = rtt_smoothing
+        self._lock = threading.Lock()
+        self._lower = None # حدود الفرق (ساعة الخادم - ساعة الجهاز) بالثواني
+        self._upper = None
+        self._bounds_updated_at = 0.0
+        self._rtt = None
+        self._samples = 0
+        self._last_date_header = None
+        self._last_date_ts = None
+
+    def _parse_date(self, date_header):
+        if date_header == self._last_date_header:
+            return self._last_date_ts
+        try:
+            date_ts = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return None
+        self._last_date_header, self._last_date_ts = date_header, date_ts
+        return date_ts
+
+    def observe(self, date_header, sent_at, received_at):
+        """sent_at / received_at: time.time() قبل إرسال الطلب وبعد استلام ترويسات الاستجابة."""
+        if not date_header or received_at < sent_at:
+            return
+        with self._lock:
+            date_ts = self._parse_date(date_header)
+            if date_ts is None:
+                return
+            sample_lower = date_ts - received_at
+            sample_upper = date_ts + 1.0 - sent_at
+            rtt = received_at - sent_at
+            self._rtt = rtt if self._rtt is None else self._rtt + self.rtt_smoothing * (rtt - self._rtt)
+            self._samples += 1
+
+            if self._lower is not None:
+                # الحدود القديمة تتسع بمرور الوقت لتسمح بانحراف ساعة أحد الطرفين
+                widen = (received_at - self._bounds_updated_at) * self.max_drift_per_second
+                lower = max(self._lower - widen, sample_lower)
+                upper = min(self._upper + widen, sample_upper)
+                if lower <= upper:
+                    self._lower, self._upper, self._bounds_updated_at = lower, upper, received_at
+                    return
+                logger.info(f"ساعة الخادم: تقدير سابق لا يتوافق مع الاستجابة الحالية (تغيرت إحدى الساعتين؟). إعادة التقدير.")
+            self._lower, self._upper, self._bounds_updated_at = sample_lower, sample_upper, received_at
+
+    def offset(self):
+        """الفرق المقدر (ساعة الخادم - ساعة الجهاز) بالثواني، أو 0.0 قبل أول استجابة."""
+        with self._lock:
+            if self._lower is None:
+                return 0.0
+            return (self._lower + self._upper) / 2
+
+    def uncertainty(self):
+        """نصف عرض مجال التقدير بالثواني (None قبل أول استجابة)."""
+        with self._lock:
+            return None if self._lower is None else (self._upper - self._lower) / 2
+
+    def rtt(self):
+        with self._lock:
+            return self._rtt or 0.0
+
+    def server_now(self):
+        return time.time() + self.offset()
+
+    def local_fire_time(self, server_ts, rtt_fraction=0.5):
+        """وقت الجهاز الذي يجب إرسال الطلب فيه ليصل إلى الخادم عند server_ts (أي T - RTT/2 افتراضيًا)."""
+        return server_ts - self.offset() - self.rtt() * rtt_fraction
+
+    def seconds_until(self, server_ts, rtt_fraction=0.5):
+        return max(0.0, self.local_fire_time(server_ts, rtt_fraction) - time.time())
+
+    def sleep_until(self, server_ts, should_continue=None, rtt_fraction=0.5):
+        """
+        ينام حتى وقت الإرسال المناسب لـ server_ts. التقدير يُعاد حسابه في كل شريحة نوم لأنه قد يتحسن أثناء الانتظار.
+        Returns:
+            bool: False إذا أوقف should_continue() الانتظار.
+        """
+        while True:
+            if should_continue is not None and not should_continue():
+                return False
+            remaining = self.seconds_until(server_ts, rtt_fraction)
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, SLEEP_SLICE_SECONDS))
+
+    def summary(self):
+        with self._lock:
+            if self._lower is None:
+                return "لا توجد استجابات بعد"
+            return (f"الفرق {(self._lower + self._upper) / 2:+.3f}ث (±{(self._upper - self._lower) / 2:.3f})، "
+                    f"RTT {self._rtt * 1000:.0f}ms، {self._samples} استجابة")
+
+
+SERVER_CLOCK = ServerClock(SERVER_CLOCK_MAX_DRIFT_PER_SECOND, SERVER_CLOCK_RTT_SMOOTHING)
@@ -0,0 +1,171 @@
+# slot_learner.py
+"""
+تعلّم أوقات ظهور المواعيد لكل مؤسسة (structure_id): كل انتقال لـ get_available_dates من قائمة فارغة
+إلى قائمة غير فارغة يُحسب كظهور في ساعته من اليوم (مع تقادم تدريجي للملاحظات القديمة).
+polling_rate يعيد معامل تكرار الفحص لكل مؤسسة: أكبر من 1 في الساعات المرجحة وأصغر منه في غيرها،
+ومتوسطه على ساعات اليوم 1 (بعد تطبيق الحدود [min_rate, max_rate] وإعادة التطبيع).
+cycle_rate_for لا يقل عن 1 (إيقاع الإعدادات): إذا كانت كل المؤسسات في ساعات هادئة يُفحص كل عضو
+باحتمال معامله فقط، فتقل طلبات الدورة بدل أن تُفحص كل المؤسسات بالإيقاع الكامل.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+from config import (SLOT_LEARNER_FILE, SLOT_LEARNER_HALF_LIFE_DAYS, SLOT_LEARNER_MIN_RELEASES,
+                    SLOT_LEARNER_PRIOR_PER_HOUR, SLOT_POLLING_MIN_RATE, SLOT_POLLING_MAX_RATE)
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_DAY = 24
+SMOOTHING_KERNEL = (0.25, 0.5, 0.25) # الساعة السابقة، الساعة نفسها، الساعة التالية (الظهور قرب حد الساعة)
+NORMALIZE_ROUNDS = 20 # الحدود تغير المتوسط؛ إعادة القسمة على المتوسط ثم الحدود حتى يعود 1
+
+
+class SlotReleaseLearner:
+    def __init__(self, persist_file=None, half_life_days=14, min_releases=3, prior_per_hour=1.0,
+                 min_rate=0.5, max_rate=3.0):
+        self.persist_file = persist_file
+        self.half_life_seconds = half_life_days * 86400
+        self.min_releases = min_releases
+        self.prior_per_hour = prior_per_hour
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._histograms = {} # structure_id -> {"counts": [24 float], "updated_at": ts}
+        self._dates_available = {} # structure_id -> آخر نتيجة (هل كانت هناك تواريخ) في هذه الجلسة
+        self._lock = threading.Lock()
+        self._loaded = persist_file is None
+        self._dirty = False
+
+    def _decayed_counts(self, histogram, now):
+        factor = 0.5 ** (max(0.0, now - histogram["updated_at"]) / self.half_life_seconds)
+        return [count * factor for count in histogram["counts"]]
+
+    def observe_dates(self, structure_id, has_dates, when=None):
+        """يُستدعى بعد كل استجابة ناجحة لـ get_available_dates."""
+        if not structure_id:
+            return
+        self._ensure_loaded()
+        key = str(structure_id)
+        now = when if when is not None else time.time()
+        with self._lock:
+            was_available = self._dates_available.get(key)
+            self._dates_available[key] = has_dates
+            # أول نتيجة في الجلسة لا تُحسب: المواعيد ربما ظهرت والتطبيق مغلق
+            if not has_dates or was_available is not False:
+                return
+            histogram = self._histograms.get(key)
+            counts = self._decayed_counts(histogram, now) if histogram else [0.0] * HOURS_PER_DAY
+            counts[time.localtime(now).tm_hour] += 1.0
+            self._histograms[key] = {"counts": counts, "updated_at": now}
+            self._dirty = True
+        logger.info(f"ظهور مواعيد في المؤسسة {key} على الساعة {time.strftime('%H:%M', time.localtime(now))}.")
+
+    def polling_rate(self, structure_id, when=None):
+        """معامل تكرار الفحص لهذه المؤسسة في الساعة الحالية (1.0 إذا لم تتوفر ملاحظات كافية)."""
+        if not structure_id:
+            return 1.0
+        self._ensure_loaded()
+        now = when if when is not None else time.time()
+        with self._lock:
+            histogram = self._histograms.get(str(structure_id))
+            counts = self._decayed_counts(histogram, now) if histogram else None
+        if not counts or sum(counts) < self.min_releases:
+            return 1.0
+        weights = [
+            sum(kernel_weight * counts[(hour + offset) % HOURS_PER_DAY]
+                for offset, kernel_weight in zip((-1, 0, 1), SMOOTHING_KERNEL)) + self.prior_per_hour
+            for hour in range(HOURS_PER_DAY)
+        ]
+        return self._normalized_rates(weights)[time.localtime(now).tm_hour]
+
+    def _normalized_rates(self, weights):
+        """معاملات الساعات الـ 24 بين min_rate و max_rate ومتوسطها 1."""
+        total = sum(weights)
+        rates = [weight * HOURS_PER_DAY / total for weight in weights]
+        for _ in range(NORMALIZE_ROUNDS):
+            rates = [min(self.max_rate, max(self.min_rate, rate)) for rate in rates]
+            mean = sum(rates) / HOURS_PER_DAY
+            if abs(mean - 1.0) < 1e-3:
+                break
+            rates = [rate / mean for rate in rates]
+        return [min(self.max_rate, max(self.min_rate, rate)) for rate in rates]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.persist_file):
+                return
+            try:
+                with open(self.persist_file, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                for key, histogram in stored.items():
+                    if len(histogram["counts"]) == HOURS_PER_DAY:
+                        self._histograms[key] = {"counts": [float(c) for c in histogram["counts"]],
+                                                 "updated_at": float(histogram["updated_at"])}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"تعذر قراءة ملف أنماط ظهور المواعيد {self.persist_file}: {e}")
+                return
+            logger.info(f"تم تحميل أنماط ظهور المواعيد لـ {len(self._histograms)} مؤسسة من {self.persist_file}")
+
+    def save(self):
+        if not self.persist_file or not self._dirty:
+            return
+        with self._lock:
+            to_store = {key: dict(histogram) for key, histogram in self._histograms.items()}
+            self._dirty = False
+        temp_file = self.persist_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(to_store, f)
+            os.replace(temp_file, self.persist_file)
+        except OSError as e:
+            logger.error(f"خطأ عند حفظ أنماط ظهور المواعيد: {e}")
+
+
+def cycle_rate_for(member_rates):
+    """
+    معامل دورة المراقبة: أعلى معامل بين الأعضاء، ولا يقل عن 1. العضو يُفحص في الدورة باحتمال
+    (معامله / معامل الدورة)، فالعضو الذي معامله 0.5 يُفحص في نصف الدورات فقط حتى لو كانت كل المؤسسات هادئة.
+    """
+    return max([1.0, *member_rates])
+
+
+SLOT_LEARNER = SlotReleaseLearner(SLOT_LEARNER_FILE, SLOT_LEARNER_HALF_LIFE_DAYS, SLOT_LEARNER_MIN_RELEASES,
+                                  SLOT_LEARNER_PRIOR_PER_HOUR, SLOT_POLLING_MIN_RATE, SLOT_POLLING_MAX_RATE)
+
+
+if __name__ == '__main__':
+    # اختبار: إذا كانت كل المؤسسات في ساعة هادئة تقل الفحوص المتوقعة في الدورة عن عدد الأعضاء
+    learner = SlotReleaseLearner(half_life_days=SLOT_LEARNER_HALF_LIFE_DAYS, min_releases=SLOT_LEARNER_MIN_RELEASES,
+                                 prior_per_hour=SLOT_LEARNER_PRIOR_PER_HOUR, min_rate=SLOT_POLLING_MIN_RATE,
+                                 max_rate=SLOT_POLLING_MAX_RATE)
+    today = time.localtime()
+    for structure_id in ("101", "202"):
+        for days_ago in range(5, 0, -1):
+            release_at = time.mktime((today.tm_year, today.tm_mon, today.tm_mday - days_ago, 9, 30, 0, 0, 0, -1))
+            learner.observe_dates(structure_id, False, release_at - 600)
+            learner.observe_dates(structure_id, True, release_at)
+    members_per_structure = 10
+
+    def expected_checks_per_cycle(hour):
+        when = time.mktime((today.tm_year, today.tm_mon, today.tm_mday, hour, 0, 0, 0, 0, -1))
+        member_rates = [learner.polling_rate(structure_id, when)
+                        for structure_id in ("101", "202") for _ in range(members_per_structure)]
+        cycle_rate = cycle_rate_for(member_rates)
+        return sum(min(1.0, rate / cycle_rate) for rate in member_rates), cycle_rate
+
+    cold_checks, cold_cycle_rate = expected_checks_per_cycle(21)
+    hot_checks, hot_cycle_rate = expected_checks_per_cycle(9)
+    print(f"ساعة هادئة: معامل الدورة {cold_cycle_rate:.2f}، فحوص متوقعة {cold_checks:.1f} من {2 * members_per_structure}")
+    print(f"ساعة ظهور: معامل الدورة {hot_cycle_rate:.2f}، فحوص متوقعة {hot_checks:.1f} من {2 * members_per_structure}")
+    assert cold_cycle_rate == 1.0
+    assert cold_checks < 2 * members_per_structure # بدون الحد الأدنى 1 لمعامل الدورة تُفحص كل الأعضاء
+    assert hot_checks == 2 * members_per_structure
+    assert cycle_rate_for([]) == 1.0
+    print("OK")
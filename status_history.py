@@ -0,0 +1,217 @@
+# status_history.py
+"""
+سجل انتقالات حالات الأعضاء (الوقت، الحالة السابقة، الحالة الجديدة، المرحلة، المدة) في قاعدة SQLite محلية.
+السجل إضافي فقط (append-only): الكتابة تتم في خيط خلفي على دفعات، والسجلات الأقدم من مدة الاحتفاظ تُحذف دوريًا.
+الاستعلامات (مدة الانتظار حتى الحجز، الأعضاء العالقون في حالة ما، أوقات ظهور المواعيد لكل مؤسسة) تعتمد على فهارس.
+"""
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+from config import (STATUS_HISTORY_DB_FILE, STATUS_HISTORY_RETENTION_DAYS,
+                    STATUS_HISTORY_FLUSH_INTERVAL_SECONDS, STATUS_HISTORY_BATCH_SIZE)
+
+logger = logging.getLogger(__name__)
+
+# الحالات التي يكون فيها العضو مؤهلًا وينتظر موعدًا
+ELIGIBLE_STATUSES = ("تم التحقق", "تم جلب المعلومات", "لا توجد مواعيد", "يتطلب تسجيل مسبق", "فشل جلب التواريخ")
+BOOKED_STATUS = "تم الحجز"
+# نتائج مرحلة الحجز التي تعني أن الخادم أعاد تواريخ متاحة (ظهور مواعيد في مؤسسة العضو)
+SLOT_SEEN_STATUSES = ("تم الحجز", "فشل الحجز", "غير مؤهل للحجز", "خطأ في تنسيق التاريخ")
+PURGE_INTERVAL_SECONDS = 3600
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS transitions (
+        ts REAL NOT NULL,
+        member_key TEXT NOT NULL,
+        from_status TEXT,
+        to_status TEXT NOT NULL,
+        stage TEXT,
+        latency_ms INTEGER,
+        structure_id TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_transitions_member_ts ON transitions (member_key, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_transitions_status_ts ON transitions (to_status, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_transitions_structure_ts ON transitions (structure_id, ts)",
+)
+
+
+class StatusHistoryStore:
+    def __init__(self, db_file, retention_days, flush_interval_seconds=2.0, batch_size=500):
+        self.db_file = db_file
+        self.retention_days = retention_days
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._last_status = {} # member_key -> آخر حالة مسجلة (لتفادي تكرار نفس الانتقال من عدة مسارات)
+        self._writer_thread = None
+        self._closed = False
+        self._disabled = False
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_file, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL") # القراءة لا تنتظر خيط الكتابة
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _ensure_writer(self):
+        if self._writer_thread is None and not self._closed:
+            self._writer_thread = threading.Thread(target=self._writer_loop, name="status-history-writer", daemon=True)
+            self._writer_thread.start()
+
+    def record(self, member_obj, from_status, stage, started_at=None):
+        """
+        يسجل انتقال العضو من from_status إلى حالته الحالية. الحالات المؤقتة ("جاري...")
+        والانتقالات التي لا تغير الحالة لا تُسجل. started_at: قيمة time.monotonic() عند بداية المرحلة.
+        """
+        to_status = member_obj.status
+        if self._disabled or self._closed or not to_status or to_status == from_status or to_status.startswith("جاري"):
+            return
+        member_key = member_obj.nin
+        with self._lock:
+            if self._last_status.get(member_key) == to_status:
+                return
+            self._last_status[member_key] = to_status
+            self._ensure_writer()
+        latency_ms = int((time.monotonic() - started_at) * 1000) if started_at is not None else None
+        structure_id = member_obj.structure_id
+        self._queue.put((time.time(), member_key, from_status, to_status, stage, latency_ms,
+                         str(structure_id) if structure_id is not None else None))
+
+    def _writer_loop(self):
+        try:
+            connection = self._connect()
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._purge_expired(connection)
+        except sqlite3.Error as e:
+            logger.error(f"تعذر فتح سجل الحالات {self.db_file}: {e}. لن تُسجل انتقالات الحالات.")
+            self._disabled = True
+            self._drain_queue()
+            return
+        last_purge = time.monotonic()
+        stop_requested = False
+        while not stop_requested:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval_seconds))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            rows = [row for row in batch if row is not None]
+            stop_requested = len(rows) != len(batch)
+            try:
+                if rows:
+                    connection.executemany("INSERT INTO transitions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    connection.commit()
+                if time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._purge_expired(connection)
+                    last_purge = time.monotonic()
+            except sqlite3.Error as e:
+                logger.error(f"فشل حفظ {len(rows)} انتقال حالة في {self.db_file}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _drain_queue(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._queue.task_done()
+
+    def _purge_expired(self, connection):
+        cutoff = time.time() - self.retention_days * 86400
+        deleted = connection.execute("DELETE FROM transitions WHERE ts < ?", (cutoff,)).rowcount
+        connection.commit()
+        if deleted:
+            logger.info(f"سجل الحالات: حذف {deleted} انتقال أقدم من {self.retention_days} يومًا.")
+
+    def flush(self):
+        """ينتظر حتى تُكتب كل الانتقالات المسجلة حتى الآن."""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._queue.put(None)
+            self._writer_thread.join(10)
+
+    def _query(self, sql, params=()):
+        self.flush()
+        try:
+            connection = self._connect()
+        except sqlite3.Error as e:
+            logger.error(f"تعذر فتح سجل الحالات {self.db_file}: {e}")
+            return []
+        try:
+            return connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e: # الجدول غير موجود بعد (لم يُسجل أي انتقال)
+            logger.debug(f"استعلام سجل الحالات: {e}")
+            return []
+        finally:
+            connection.close()
+
+    def time_to_booked(self):
+        """
+        لكل عضو تم حجز موعده: (member_key, أول وقت أصبح فيه مؤهلًا، وقت الحجز، المدة بالثواني).
+        """
+        eligible_placeholders = ", ".join("?" * len(ELIGIBLE_STATUSES))
+        rows = self._query(
+            f"""SELECT member_key,
+                       MIN(CASE WHEN to_status IN ({eligible_placeholders}) THEN ts END) AS first_eligible,
+                       MIN(CASE WHEN to_status = ? THEN ts END) AS booked
+                FROM transitions
+                WHERE member_key IN (SELECT member_key FROM transitions WHERE to_status = ?)
+                GROUP BY member_key""",
+            (*ELIGIBLE_STATUSES, BOOKED_STATUS, BOOKED_STATUS))
+        return [(member_key, first_eligible, booked, booked - first_eligible)
+                for member_key, first_eligible, booked in rows
+                if first_eligible is not None and booked >= first_eligible]
+
+    def members_stuck_in(self, status, min_seconds=86400):
+        """الأعضاء الذين آخر انتقال لهم إلى status منذ min_seconds أو أكثر: قائمة (member_key, وقت الدخول)."""
+        return self._query(
+            """SELECT t.member_key, MAX(t.ts) AS entered_at
+               FROM transitions t
+               WHERE t.to_status = ? AND t.ts <= ?
+                 AND NOT EXISTS (SELECT 1 FROM transitions later
+                                 WHERE later.member_key = t.member_key AND later.ts > t.ts)
+               GROUP BY t.member_key
+               ORDER BY entered_at""",
+            (status, time.time() - min_seconds))
+
+    def slot_release_times(self, structure_id=None, since=None):
+        """أوقات ظهور مواعيد متاحة: قائمة (structure_id, الوقت)، لمؤسسة واحدة أو لكل المؤسسات."""
+        status_placeholders = ", ".join("?" * len(SLOT_SEEN_STATUSES))
+        sql = (f"SELECT structure_id, ts FROM transitions "
+               f"WHERE stage = 'booking' AND to_status IN ({status_placeholders}) AND ts >= ?")
+        params = [*SLOT_SEEN_STATUSES, since or 0]
+        if structure_id is not None:
+            sql += " AND structure_id = ?"
+            params.append(str(structure_id))
+        return self._query(sql + " ORDER BY ts", params)
+
+    def slot_release_hours(self, structure_id=None):
+        """عدد مرات ظهور المواعيد لكل (مؤسسة، ساعة من اليوم بالتوقيت المحلي)."""
+        status_placeholders = ", ".join("?" * len(SLOT_SEEN_STATUSES))
+        sql = (f"SELECT structure_id, CAST(strftime('%H', ts, 'unixepoch', 'localtime') AS INTEGER) AS hour, COUNT(*) "
+               f"FROM transitions WHERE stage = 'booking' AND to_status IN ({status_placeholders})")
+        params = list(SLOT_SEEN_STATUSES)
+        if structure_id is not None:
+            sql += " AND structure_id = ?"
+            params.append(str(structure_id))
+        return self._query(sql + " GROUP BY structure_id, hour ORDER BY structure_id, hour", params)
+
+
+STATUS_HISTORY = StatusHistoryStore(STATUS_HISTORY_DB_FILE, STATUS_HISTORY_RETENTION_DAYS,
+                                    STATUS_HISTORY_FLUSH_INTERVAL_SECONDS, STATUS_HISTORY_BATCH_SIZE)
@@ -1,7 +1,16 @@
 # utils.py
+import os
+import time
+from collections import namedtuple
+from functools import lru_cache
+from enum import Enum
+
+from PyQt5.QtCore import QStandardPaths
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QApplication, QStyle 
 
+from config import PDF_OUTPUT_DIR_NAME
+
 class QColorConstants: # Dark Theme Specific Colors
     PINK_DARK_THEME = QColor(176, 56, 73)
     LIGHT_PINK_DARK_THEME = QColor(130, 70, 80) 
@@ -12,32 +21,184 @@ class QColorConstants: # Dark Theme Specific Colors
     PROCESSING_ROW_DARK_THEME = QColor(80, 80, 110) 
     BENEFITING_GREEN_DARK_THEME = QColor(30, 100, 50) # New color for "مستفيد حاليًا"
 
+
+class MemberStatus(str, Enum):
+    """الحالات المعروفة للعضو. القيمة هي النص العربي المخزن في members_data.json والمعروض في الجدول."""
+    NEW = "جديد"
+    BENEFITING = "مستفيد حاليًا من المنحة"
+    COMPLETED = "مكتمل"
+    BOOKED = "تم الحجز"
+    INFO_FETCHED = "تم جلب المعلومات"
+    VALIDATED = "تم التحقق"
+    VALIDATED_INSTANT = "تم التحقق (فوري)"
+    INFO_FETCHED_INSTANT = "تم جلب المعلومات (فوري)"
+    HAS_RDV = "لديه موعد مسبق"
+    REQUIRES_PRE_INSCRIPTION = "يتطلب تسجيل مسبق"
+    NO_DATES = "لا توجد مواعيد"
+    INPUT_ERROR = "بيانات الإدخال خاطئة"
+    NOT_ELIGIBLE_INITIAL = "غير مؤهل مبدئيًا"
+    NOT_ELIGIBLE_BOOKING = "غير مؤهل للحجز"
+    VALIDATION_FAILED = "فشل التحقق"
+    INITIAL_VALIDATION_FAILED = "فشل التحقق الأولي"
+    INFO_FETCH_FAILED = "فشل جلب المعلومات"
+    DATES_FETCH_FAILED = "فشل جلب التواريخ"
+    BOOKING_FAILED = "فشل الحجز"
+    PDF_DOWNLOAD_FAILED = "فشل تحميل PDF"
+    REPEATED_FAILURE = "فشل بشكل متكرر"
+    DATE_FORMAT_ERROR = "خطأ في تنسيق التاريخ"
+    PROCESSING_ERROR = "خطأ في المعالجة"
+    INITIAL_FETCH_ERROR = "خطأ في الجلب الأولي"
+    INSTANT_CHECK_ERROR = "خطأ في الفحص الفوري"
+    VALIDATING_CYCLE = "جاري التحقق (دورة)..."
+    VALIDATING_INSTANT = "جاري التحقق (فوري)..."
+    FETCHING_NAME = "جاري جلب الاسم..."
+    SEARCHING_DATES = "جاري البحث عن مواعيد..."
+    BOOKING = "جاري حجز الموعد..."
+
+
+# severity: "success" / "info" / "warning" / "error" / "progress" / "neutral"
+# is_terminal: لا يتقدم مسار الحجز بعد هذه الحالة دون تدخل (أو تم الوصول للهدف)
+StatusStyle = namedtuple("StatusStyle", ["icon_name", "color", "severity", "is_terminal"])
+
+_ERROR_STYLE = StatusStyle("SP_MessageBoxCritical", QColorConstants.LIGHT_PINK_DARK_THEME, "error", False)
+_PROGRESS_STYLE = StatusStyle("SP_ArrowRight", None, "progress", False)
+_NEUTRAL_STYLE = StatusStyle("SP_CustomBase", None, "neutral", False)
+
+_STATUS_STYLES = {
+    MemberStatus.NEW.value: _NEUTRAL_STYLE,
+    MemberStatus.BENEFITING.value: StatusStyle("SP_DialogApplyButton", QColorConstants.BENEFITING_GREEN_DARK_THEME, "success", True),
+    MemberStatus.COMPLETED.value: StatusStyle("SP_DialogYesButton", QColorConstants.LIGHT_GREEN_DARK_THEME, "success", True),
+    MemberStatus.BOOKED.value: StatusStyle("SP_DialogSaveButton", None, "success", True),
+    MemberStatus.INFO_FETCHED.value: StatusStyle("SP_DialogApplyButton", None, "info", False),
+    MemberStatus.VALIDATED.value: StatusStyle("SP_DialogApplyButton", None, "info", False),
+    MemberStatus.VALIDATED_INSTANT.value: StatusStyle("SP_DialogApplyButton", None, "info", False),
+    MemberStatus.INFO_FETCHED_INSTANT.value: StatusStyle("SP_DialogApplyButton", None, "info", False),
+    MemberStatus.HAS_RDV.value: StatusStyle("SP_MessageBoxInformation", QColorConstants.LIGHT_BLUE_DARK_THEME, "info", True),
+    MemberStatus.REQUIRES_PRE_INSCRIPTION.value: StatusStyle("SP_MessageBoxWarning", QColorConstants.LIGHT_YELLOW_DARK_THEME, "warning", False),
+    MemberStatus.NO_DATES.value: StatusStyle("SP_MessageBoxInformation", None, "info", False),
+    # "warning" وليس "error": خطأ الإدخال يلوّن الصف فقط ولا يظهر كإشعار خطأ (كما قبل جدول الأنماط)
+    MemberStatus.INPUT_ERROR.value: StatusStyle("SP_MessageBoxCritical", QColorConstants.PINK_DARK_THEME, "warning", True),
+    MemberStatus.NOT_ELIGIBLE_INITIAL.value: StatusStyle("SP_MessageBoxCritical", QColorConstants.LIGHT_PINK_DARK_THEME, "error", True),
+    MemberStatus.NOT_ELIGIBLE_BOOKING.value: StatusStyle("SP_MessageBoxCritical", QColorConstants.ORANGE_RED_DARK_THEME, "error", False),
+    MemberStatus.VALIDATION_FAILED.value: _ERROR_STYLE,
+    MemberStatus.INITIAL_VALIDATION_FAILED.value: _ERROR_STYLE,
+    MemberStatus.INFO_FETCH_FAILED.value: _ERROR_STYLE,
+    MemberStatus.DATES_FETCH_FAILED.value: _ERROR_STYLE,
+    MemberStatus.BOOKING_FAILED.value: _ERROR_STYLE,
+    MemberStatus.PDF_DOWNLOAD_FAILED.value: _ERROR_STYLE,
+    MemberStatus.REPEATED_FAILURE.value: StatusStyle("SP_MessageBoxWarning", QColorConstants.LIGHT_PINK_DARK_THEME, "error", True),
+    MemberStatus.DATE_FORMAT_ERROR.value: _ERROR_STYLE,
+    MemberStatus.PROCESSING_ERROR.value: _ERROR_STYLE,
+    MemberStatus.INITIAL_FETCH_ERROR.value: _ERROR_STYLE,
+    MemberStatus.INSTANT_CHECK_ERROR.value: _ERROR_STYLE,
+    MemberStatus.VALIDATING_CYCLE.value: _PROGRESS_STYLE,
+    MemberStatus.VALIDATING_INSTANT.value: _PROGRESS_STYLE,
+    MemberStatus.FETCHING_NAME.value: _PROGRESS_STYLE,
+    MemberStatus.SEARCHING_DATES.value: _PROGRESS_STYLE,
+    MemberStatus.BOOKING.value: _PROGRESS_STYLE,
+}
+
+# جميع أسماء الأيقونات المستخدمة، لبناء كائنات QIcon مرة واحدة عند بدء التشغيل
+STATUS_ICON_NAMES = tuple(sorted({style.icon_name for style in _STATUS_STYLES.values()}))
+
+
+def _classify_dynamic_status(status_text):
+    # حالات نصية غير ثابتة (مثل "جاري تحميل التزام..." أو "فشل تحميل موعد: ...")
+    if "فشل" in status_text or "خاطئة" in status_text or "خطأ" in status_text or "غير مؤهل" in status_text:
+        return _ERROR_STYLE
+    if "لديه موعد مسبق" in status_text or "لا توجد مواعيد" in status_text:
+        return StatusStyle("SP_MessageBoxInformation", None, "info", False)
+    if "يتطلب تسجيل مسبق" in status_text:
+        return StatusStyle("SP_MessageBoxWarning", QColorConstants.LIGHT_YELLOW_DARK_THEME, "warning", False)
+    if "جاري" in status_text or "البحث" in status_text or "محاولة" in status_text:
+        return _PROGRESS_STYLE
+    return _NEUTRAL_STYLE
+
+
+@lru_cache(maxsize=1024) # ذاكرة منفصلة وآمنة بين الخيوط؛ _STATUS_STYLES لا يُعدّل بعد التحميل
+def _dynamic_status_style(status_text):
+    return _classify_dynamic_status(status_text)
+
+
+def get_status_style(status_text):
+    """
+    يعيد StatusStyle (الأيقونة، اللون، الخطورة، نهائية الحالة) لنص الحالة.
+    الحالات المعروفة محسوبة مسبقًا؛ الحالات الديناميكية تُصنف مرة واحدة ثم تُحفظ في _dynamic_status_style.
+    """
+    style = _STATUS_STYLES.get(status_text)
+    if style is None:
+        style = _dynamic_status_style(status_text or "")
+    return style
+
+
 def get_icon_name_for_status(status_text):
     """
     Determines the QStyle standard pixmap name string based on member status.
     Returns a string like "SP_DialogYesButton".
     """
-    # Order matters: more specific checks should come before general ones.
-    
-    if status_text == "مستفيد حاليًا من المنحة": return "SP_ FEATURE_खुशी" # Using a "happy" or "star" like icon if available, SP_DialogApplyButton as fallback
-    if status_text == "مكتمل": return "SP_DialogYesButton"
-    if status_text == "تم الحجز": return "SP_DialogSaveButton" 
-    if status_text == "تم جلب المعلومات": return "SP_DialogApplyButton" 
-    if status_text == "تم التحقق": return "SP_DialogApplyButton"
-    if status_text == "تم التحقق (فوري)": return "SP_DialogApplyButton"
-    if status_text == "تم جلب المعلومات (فوري)": return "SP_DialogApplyButton"
-
-
-    if "فشل" in status_text or "خاطئة" in status_text or "خطأ" in status_text: return "SP_MessageBoxCritical"
-    if "غير مؤهل" in status_text : return "SP_MessageBoxCritical" 
-    
-    if "لديه موعد مسبق" in status_text: return "SP_MessageBoxInformation" 
-    if "يتطلب تسجيل مسبق" in status_text: return "SP_MessageBoxWarning"
-    if "لا توجد مواعيد" in status_text: return "SP_MessageBoxInformation"
-    if status_text == "فشل بشكل متكرر": return "SP_MessageBoxWarning" 
-
-    if "جاري" in status_text or "البحث" in status_text or "محاولة" in status_text : return "SP_ArrowRight" 
-    
-    if status_text == "جديد": return "SP_CustomBase" 
-    
-    return "SP_CustomBase" 
+    return get_status_style(status_text).icon_name
+
+
+def build_status_icon_cache(style):
+    """يبني قاموس اسم الأيقونة -> QIcon مرة واحدة باستخدام QStyle المعطى."""
+    return {icon_name: style.standardIcon(getattr(QStyle, icon_name)) for icon_name in STATUS_ICON_NAMES}
+
+
+def _safe_file_name_part(text, fallback):
+    safe_part = "".join(c for c in (text or "") if c.isalnum() or c in (' ', '_', '-')).rstrip().replace(" ", "_")
+    return safe_part or fallback
+
+
+_pdf_output_root = None
+
+
+def get_pdf_output_root():
+    # مسار المستندات لا يتغير أثناء التشغيل، ويكون بطيئًا أحيانًا (مجلد شبكة)، لذا يُحسب مرة واحدة
+    global _pdf_output_root
+    if _pdf_output_root is None:
+        _pdf_output_root = os.path.join(QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation), PDF_OUTPUT_DIR_NAME)
+    return _pdf_output_root
+
+
+def get_member_pdf_dir(member):
+    """مجلد شهادات العضو: Documents/ملفات_المنحة_البرنامج/<الاسم بالعربية أو NIN>."""
+    member_name_for_folder = member.get_full_name_ar()
+    if not member_name_for_folder or member_name_for_folder.isspace():
+        member_name_for_folder = member.nin
+    return os.path.join(get_pdf_output_root(), _safe_file_name_part(member_name_for_folder, member.nin))
+
+
+def get_member_pdf_path(member, filename_suffix_base, member_dir):
+    """مسار ملف الشهادة، مثل: التزام_<الاسم>.pdf داخل مجلد العضو."""
+    safe_member_name_part = _safe_file_name_part(member.get_full_name_ar() or member.nin, member.nin)
+    return os.path.join(member_dir, f"{filename_suffix_base}_{safe_member_name_part}.pdf")
+
+
+class StartupProfiler:
+    """
+    يقيس زمن كل مرحلة من مراحل بدء التشغيل (الاستيرادات، الخطوط، التنسيق، تحميل الأعضاء، بناء الجدول...).
+    mark(name) يسجل الزمن المنقضي منذ العلامة السابقة، وrecord(name, seconds) لمراحل تُقاس بشكل مستقل (خيوط الخلفية).
+    """
+    def __init__(self, start_time=None, enabled=False):
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self.enabled = enabled
+        self._last_mark = self.start_time
+        self.phases = []
+
+    def mark(self, phase_name):
+        now = time.perf_counter()
+        self.phases.append((phase_name, now - self._last_mark))
+        self._last_mark = now
+
+    def record(self, phase_name, seconds):
+        self.phases.append((phase_name, seconds))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start_time) * 1000
+
+    def format_report(self):
+        lines = ["Startup profile:"]
+        for phase_name, seconds in self.phases:
+            lines.append(f"  {phase_name:<28}{seconds * 1000:9.1f} ms")
+        lines.append(f"  {'total (until now)':<28}{self.elapsed_ms():9.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,63 @@
+# validators.py
+"""
+فحص محلي لبيانات العضو (NIN، رقم الوسيط، CCP) قبل إرسال أي طلب إلى الخادم.
+كل دالة validate_* تعيد رسالة خطأ بالعربية، أو None إذا كانت القيمة صالحة.
+قواعد بنية NIN غير مؤكدة على حسابات حقيقية، لذلك لا ترفض أي عضو: تُعاد كتحذيرات فقط من unverified_rule_warnings.
+مفتاح CCP لا يُفحص: الصيغة المعروفة لا تطابق مفاتيح حسابات حقيقية قبلها الخادم.
+"""
+import re
+
+NIN_LENGTH = 18
+NIN_SEX_DIGITS = "12" # الرقم الأول: 1 ذكر، 2 أنثى
+CCP_ACCOUNT_LENGTH = 10 # الحد الأقصى؛ بعض الحسابات أقصر (مثل 0042476057: حساب من 8 أرقام + المفتاح)
+CCP_KEY_LENGTH = 2 # آخر رقمين؛ يدخل في الطول فقط ولا تُفحص قيمته
+WASSIT_NO_PATTERN = re.compile(r"^[0-9]{6,20}$")
+
+
+def digits_only(value):
+    return ''.join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def validate_nin(nin):
+    if not nin:
+        return "رقم التعريف الوطني مفقود."
+    if not nin.isdigit() or len(nin) != NIN_LENGTH:
+        return f"رقم التعريف الوطني يجب أن يتكون من {NIN_LENGTH} رقمًا."
+    return None
+
+
+def validate_nin_structure(nin):
+    """قواعد بنية NIN غير المؤكدة (تُفترض صحة الطول والأرقام)."""
+    # البنية: الجنس (1) + رمز (1) + سنة الميلاد (3) + رمز بلدية الميلاد (4: الولاية ثم البلدية) + رقم العقد...
+    if nin[0] not in NIN_SEX_DIGITS:
+        return "رقم التعريف الوطني غير صالح (يجب أن يبدأ بالرقم 1 أو 2)."
+    if nin[5:7] == "00":
+        return "رقم التعريف الوطني غير صالح (رمز ولاية الميلاد 00)."
+    return None
+
+
+def validate_wassit_no(wassit_no):
+    if not wassit_no:
+        return "رقم الوسيط مفقود."
+    if not WASSIT_NO_PATTERN.match(wassit_no):
+        return "رقم الوسيط يجب أن يتكون من أرقام فقط (6 إلى 20 رقمًا)."
+    return None
+
+
+def validate_ccp(ccp):
+    if not ccp:
+        return "رقم الحساب البريدي مفقود."
+    if not ccp.isdigit() or not CCP_KEY_LENGTH < len(ccp) <= CCP_ACCOUNT_LENGTH + CCP_KEY_LENGTH:
+        return f"رقم الحساب البريدي يجب أن يتكون من أرقام فقط (الحساب حتى {CCP_ACCOUNT_LENGTH} أرقام + {CCP_KEY_LENGTH} للمفتاح)."
+    return None
+
+
+def validate_member_fields(nin, wassit_no, ccp):
+    """يعيد أول خطأ في بيانات العضو، أو None إذا كانت كلها صالحة."""
+    return validate_nin(nin) or validate_wassit_no(wassit_no) or validate_ccp(ccp)
+
+
+def unverified_rule_warnings(nin):
+    """رسائل القواعد غير المؤكدة التي لا يطابقها NIN (للتحذير فقط). تُفترض صحة القواعد الأساسية."""
+    warning = validate_nin_structure(nin)
+    return [warning] if warning else []